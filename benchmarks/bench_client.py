@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+"""Benchmark suite of :class:`~pyjulius.core.Client` against a local fake julius server
+
+The server runs in its own process so that only the client is measured. For each configuration
+the suite reports blocks/s, bytes/s, end-to-end latency percentiles from the moment a block is
+sent to the moment its result is delivered, CPU time per result and peak memory.
+
+Usage: ``python -m benchmarks.bench_client [utterances] [rate] [nbest] [words] [recorded file]``
+
+"""
+from benchmarks.fakejulius import FakeServer, load, utterance
+from pyjulius.core import Client
+import multiprocessing
+import resource
+import sys
+import time
+
+
+#: Client configurations to benchmark, by name
+CONFIGURATIONS = [('default', {}),
+                  ('elementtree', {'fastpath': False}),
+                  ('streaming', {'streaming': True}),
+                  ('nbest', {'nbest': True})]
+
+
+def percentile(values, p):
+    """Percentile *p* of sorted *values*"""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+
+def serve(server, conn):
+    conn.send(server.serve(timestamps=True))
+    conn.close()
+
+
+def run(blocks, count, rate, options):
+    """Run a client against a fake server sending *blocks* *count* times at *rate*
+
+    :return: statistics of the run
+    :rtype: dict
+
+    """
+    options = dict(options)
+    fastpath = options.pop('fastpath', True)
+    server = FakeServer(blocks, count, rate)
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(server, child))
+    process.start()
+    server.listener.close()
+    received = []
+    client = Client(server.host, server.port, **options)
+    client.fastpath = fastpath
+    client.subscribe(lambda result: received.append(time.time()))
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.time()
+    client.connect()
+    client.start()
+    client.join()
+    elapsed = time.time() - start
+    cpu = resource.getrusage(resource.RUSAGE_SELF)
+    client.disconnect()
+    sent = parent.recv()
+    process.join()
+    latencies = sorted(r - s for r, s in zip(received, sent))
+    return {'results': len(received),
+            'blocks/s': len(received) / elapsed,
+            'MB/s': sum(len(b) for b in blocks) * count / elapsed / 1e6,
+            'p50 ms': percentile(latencies, 50) * 1e3,
+            'p99 ms': percentile(latencies, 99) * 1e3,
+            'max ms': percentile(latencies, 100) * 1e3,
+            'CPU us/result': ((cpu.ru_utime + cpu.ru_stime) - (usage.ru_utime + usage.ru_stime)) / max(1, len(received)) * 1e6,
+            'peak RSS MB': cpu.ru_maxrss / 1024.0}
+
+
+def main(utterances=2000, rate=0, nbest=5, words=10, path=None):
+    blocks = load(path) if path else utterance(int(nbest), int(words))
+    count = int(utterances) if not path else 1
+    columns = ['results', 'blocks/s', 'MB/s', 'p50 ms', 'p99 ms', 'max ms', 'CPU us/result', 'peak RSS MB']
+    print('%-12s' % 'client' + ''.join('%14s' % c for c in columns))
+    for name, options in CONFIGURATIONS:
+        stats = run(blocks, count, float(rate), options)
+        print('%-12s' % name + ''.join('%14.1f' % stats[c] for c in columns))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
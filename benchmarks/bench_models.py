@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+"""Memory used to keep recognition history as :mod:`~pyjulius.models`
+
+Usage: ``python -m benchmarks.bench_models [count] [words]``
+
+"""
+from pyjulius.compat import text_type
+from pyjulius.models import Sentence, SentenceBatch, Word
+import array
+import numbers
+import sys
+
+
+class LegacySentence(object):
+    """Dict-backed sentence of pyjulius 0.3, for reference"""
+    def __init__(self, words, score=0):
+        self.words = words
+        self.score = score
+
+
+class LegacyWord(object):
+    """Dict-backed word of pyjulius 0.3, for reference"""
+    def __init__(self, word, confidence=0.0):
+        self.word = word
+        self.confidence = confidence
+
+
+def deepsize(obj, seen=None):
+    """Approximate memory used by *obj* and everything it references"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (bytes, text_type, numbers.Number, array.array)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deepsize(k, seen) + deepsize(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return size + sum(deepsize(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deepsize(obj.__dict__, seen)
+    for cls in type(obj).__mro__:
+        for slot in cls.__dict__.get('__slots__', ()):
+            if hasattr(obj, slot):
+                size += deepsize(getattr(obj, slot), seen)
+    return size
+
+
+def history(sentence_class, word_class, count, words):
+    vocabulary = ['word%d' % i for i in range(500)]
+    return [sentence_class([word_class(vocabulary[(i * 7 + j) % 500], 0.5) for j in range(words)], -6000.0 - i)
+        for i in range(count)]
+
+
+def main(count=10000, words=10):
+    legacy = deepsize(history(LegacySentence, LegacyWord, count, words))
+    slotted = deepsize(history(Sentence, Word, count, words))
+    batch = deepsize(SentenceBatch(history(Sentence, Word, count, words)))
+    for name, size in (('dict-backed', legacy), ('slotted', slotted), ('SentenceBatch', batch)):
+        print('%-13s %8.1f bytes per sentence' % (name, float(size) / count))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+"""Cost of turning a raw *RECOGOUT* block into a :class:`~pyjulius.models.Sentence`
+
+Usage: ``python -m benchmarks.bench_parser [nbest] [words]``
+
+"""
+from benchmarks.fakejulius import recogout
+from pyjulius.models import Sentence
+from pyjulius.parser import escape, parse_recogout
+from xml.etree.ElementTree import XML
+import sys
+import timeit
+
+
+def elementtree(block, encoding='utf-8'):
+    return Sentence.from_shypo(XML(escape(block.decode(encoding))).find('SHYPO'), encoding)
+
+
+def main(nbest=5, words=10):
+    block = recogout(nbest, words)[:-len(b'.\n')]
+    for function in (elementtree, parse_recogout):
+        number, elapsed = 2000, min(timeit.repeat(lambda: function(block), repeat=3, number=2000))
+        print('%-14s %8.1f us per block' % (function.__name__, elapsed / number * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
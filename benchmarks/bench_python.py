@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+"""Compare the hot path of pyjulius on Python 2 and Python 3
+
+Runs the parser, reader and client benchmarks with each interpreter and prints their reports one after
+the other. Interpreters that are not installed are skipped.
+
+Usage: ``python -m benchmarks.bench_python [interpreter ...]``, defaults to ``python2 python3``
+
+"""
+import os
+import subprocess
+import sys
+
+
+#: Benchmarks to run with each interpreter, with their arguments
+BENCHMARKS = [('benchmarks.bench_parser', ['5', '10']),
+              ('benchmarks.bench_reader', ['5', '200']),
+              ('benchmarks.bench_client', ['2000'])]
+
+
+def run(interpreter, args):
+    """Run an interpreter from the root of the repository
+
+    :return: the output or ``None`` if the interpreter is not installed
+    :rtype: string
+
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    try:
+        return subprocess.check_output([interpreter] + args, cwd=root, env=env).decode('utf-8').rstrip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(*interpreters):
+    for interpreter in interpreters or ('python2', 'python3'):
+        version = run(interpreter, ['-c', 'import sys; print(sys.version.split()[0])'])
+        if version is None:
+            print('%s: not installed' % interpreter)
+            continue
+        print('== %s (%s)' % (interpreter, version))
+        for module, args in BENCHMARKS:
+            print('-- %s' % module)
+            print(run(interpreter, ['-m', module] + args))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+"""Throughput of the :class:`~pyjulius.core.Client` read path against a local fake julius server
+
+Usage: ``python -m benchmarks.bench_reader [nbest] [count]``
+
+"""
+from benchmarks.fakejulius import FakeServer, recogout
+from pyjulius.core import Client
+import select
+import sys
+import time
+
+
+class LegacyClient(Client):
+    """Client with the byte-at-a-time read path of pyjulius 0.3, for reference"""
+    def _readline(self):
+        line = u''
+        while 1:
+            readable, _, __ = select.select([self.sock], [], [], 0.5)
+            if self._stopping:
+                break
+            if not readable:
+                continue
+            data = readable[0].recv(1)
+            if data in (b'\n', b''):
+                break
+            line += data.decode(self.encoding)
+        return line
+
+    def _readblock(self):
+        block = u''
+        while not self._stopping:
+            line = self._readline()
+            if line in (u'.', u''):
+                break
+            block += line
+        return block
+
+
+def bench(client_class, payload, count):
+    server = FakeServer(payload, count)
+    server.start()
+    client = client_class(server.host, server.port)
+    client.connect()
+    blocks = 0
+    start = time.time()
+    while client._readblock():
+        blocks += 1
+    elapsed = time.time() - start
+    client.disconnect()
+    server.join()
+    return blocks, elapsed
+
+
+def main(nbest=5, count=2000):
+    payload = recogout(nbest, 10)
+    for client_class in (LegacyClient, Client):
+        blocks, elapsed = bench(client_class, payload, count)
+        print('%-13s %6d blocks in %.3fs: %9.1f blocks/s, %7.2f MB/s' % (client_class.__name__, blocks, elapsed,
+            blocks / elapsed, len(payload) * blocks / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
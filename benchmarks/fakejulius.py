@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+"""Fake julius module server used to exercise :class:`~pyjulius.core.Client` without a recognizer"""
+from pyjulius.compat import to_bytes
+import socket
+import threading
+import time
+
+
+__all__ = ['recogout', 'utterance', 'split', 'load', 'FakeServer']
+
+
+def recogout(nbest=1, words=5):
+    """Build a synthetic *RECOGOUT* block as sent by julius in module mode
+
+    :param integer nbest: number of *SHYPO* in the block
+    :param integer words: number of words per *SHYPO*, sentence delimiters excluded
+    :return: the block, terminated by a ``.`` line
+    :rtype: bytes
+
+    """
+    lines = ['<RECOGOUT>']
+    for rank in range(1, nbest + 1):
+        lines.append('  <SHYPO RANK="%d" SCORE="%.6f">' % (rank, -6000.0 - rank))
+        lines.append('    <WHYPO WORD="<s>" CLASSID="<s>" PHONE="silB" CM="0.588"/>')
+        for i in range(words):
+            lines.append('    <WHYPO WORD="WORD%d" CLASSID="%d" PHONE="w er d" CM="0.%03d"/>' % (i, i, (i * 37) % 1000))
+        lines.append('    <WHYPO WORD="</s>" CLASSID="</s>" PHONE="silE" CM="1.000"/>')
+        lines.append('  </SHYPO>')
+    lines.append('</RECOGOUT>')
+    lines.append('.')
+    return ('\n'.join(lines) + '\n').encode('ascii')
+
+
+def utterance(nbest=1, words=5, frames=200):
+    """Build the synthetic blocks julius sends for one utterance
+
+    :param integer nbest: number of *SHYPO* in the *RECOGOUT* block
+    :param integer words: number of words per *SHYPO*, sentence delimiters excluded
+    :param integer frames: number of input frames
+    :return: the blocks, each terminated by a ``.`` line
+    :rtype: list of bytes
+
+    """
+    now = int(time.time())
+    return [('<INPUT STATUS="STARTREC" TIME="%d"/>\n.\n' % now).encode('ascii'),
+            b'<STARTRECOG/>\n.\n',
+            ('<INPUT STATUS="ENDREC" TIME="%d"/>\n.\n' % now).encode('ascii'),
+            b'<ENDRECOG/>\n.\n',
+            ('<INPUTPARAM FRAMES="%d" MSEC="%d"/>\n.\n' % (frames, frames * 10)).encode('ascii'),
+            recogout(nbest, words)]
+
+
+def split(data):
+    """Split raw julius output into blocks
+
+    :param bytes data: the raw output
+    :return: the blocks, each terminated by a ``.`` line
+    :rtype: list of bytes
+
+    """
+    blocks = []
+    start = 0
+    index = data.find(b'\n.\n')
+    while index != -1:
+        blocks.append(data[start:index + 3])
+        start = index + 3
+        index = data.find(b'\n.\n', start)
+    return blocks
+
+
+def load(path):
+    """Load blocks from a file of recorded julius output
+
+    :param string path: path to the file
+    :return: the blocks, each terminated by a ``.`` line
+    :rtype: list of bytes
+
+    """
+    with open(path, 'rb') as f:
+        return split(f.read())
+
+
+class FakeServer(threading.Thread):
+    """Fake julius module server that accepts *connections* clients one after the other and sends each
+    of them *payload* *count* times before closing the connection
+
+    :param payload: data to send, either raw output made of ``.``-terminated blocks or a list of blocks,
+        unicode is encoded in utf-8
+    :type payload: string or list of string
+    :param integer count: number of times to send the payload
+    :param float rate: number of blocks to send per second, ``0`` to send as fast as possible
+    :param string host: host to listen on
+    :param integer port: port to listen on, ``0`` picks a free port
+    :param integer connections: number of clients to accept
+    :param dict responses: block to answer each command with, by command name, either bytes or a function
+        called with the command line. The connection is then kept open until the client closes it
+
+    .. attribute:: port
+
+        Port the server listens on
+
+    .. attribute:: received
+
+        Data received from the clients, one bytes string per connection
+
+    .. attribute:: sent
+
+        Time at which each block was sent, if :attr:`rate` is set or :meth:`serve` is asked to
+
+    """
+    def __init__(self, payload, count=1, rate=0, host='localhost', port=0, connections=1, responses=None):
+        super(FakeServer, self).__init__()
+        self.daemon = True
+        self.payload = [to_bytes(block) for block in payload] if isinstance(payload, list) else to_bytes(payload)
+        self.count = count
+        self.rate = rate
+        self.connections = connections
+        self.responses = responses or {}
+        self.sent = []
+        self.received = []
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(1)
+        self.host, self.port = self.listener.getsockname()[:2]
+
+    def run(self):
+        self.serve()
+
+    def serve(self, timestamps=None):
+        """Accept the clients and send them the payload
+
+        :param boolean timestamps: record in :attr:`sent` the time at which each block is sent,
+            defaults to ``True`` if :attr:`rate` is set
+        :return: :attr:`sent`
+        :rtype: list of float
+
+        """
+        if timestamps is None:
+            timestamps = bool(self.rate)
+        blocks = self.payload
+        if not timestamps and isinstance(blocks, list):
+            blocks = b''.join(blocks)
+        elif timestamps and not isinstance(blocks, list):
+            blocks = split(blocks)
+        for _ in range(self.connections):
+            conn, _ = self.listener.accept()
+            self.received.append(b'')
+            lock = threading.Lock()
+            receiver = threading.Thread(target=self._receive, args=(conn, len(self.received) - 1, lock))
+            receiver.daemon = True
+            receiver.start()
+            try:
+                if not timestamps:
+                    for _ in range(self.count):
+                        with lock:
+                            conn.sendall(blocks)
+                else:
+                    self._send(conn, blocks, lock)
+            except socket.error:
+                pass
+            finally:
+                if not self.responses:
+                    try:
+                        conn.shutdown(socket.SHUT_WR)
+                    except socket.error:  # the client is gone
+                        pass
+                receiver.join()
+                conn.close()
+        self.listener.close()
+        return self.sent
+
+    def _receive(self, conn, index, lock):
+        """Record the data received on a connection until the client closes it and answer the commands
+        listed in :attr:`responses`"""
+        try:
+            data = conn.recv(4096)
+            while data:
+                self.received[index] += data
+                if self.responses:
+                    self._respond(conn, index, data, lock)
+                data = conn.recv(4096)
+        except socket.error:
+            pass
+
+    def _respond(self, conn, index, data, lock):
+        """Answer the command lines completed by the data just received on a connection"""
+        received = self.received[index]
+        lines = received[:len(received) - len(data)].split(b'\n')[-1] + data
+        for line in lines.split(b'\n')[:-1]:
+            words = line.decode('utf-8').split(None, 1)
+            response = self.responses.get(words[0].upper()) if words else None
+            if callable(response):
+                response = response(line.decode('utf-8'))
+            if response is not None:
+                with lock:
+                    conn.sendall(to_bytes(response))
+
+    def _send(self, conn, blocks, lock):
+        """Send the blocks one by one at :attr:`rate`, recording when they were sent"""
+        interval = 1.0 / self.rate if self.rate else 0
+        start = time.time()
+        for i in range(self.count * len(blocks)):
+            if interval:
+                delay = start + i * interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            self.sent.append(time.time())
+            with lock:
+                conn.sendall(blocks[i % len(blocks)])
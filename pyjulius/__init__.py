@@ -15,9 +15,17 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
-from core import *
-from exceptions import *
-from models import *
+from pyjulius.compat import PY2
+from pyjulius.core import *
+from pyjulius.exceptions import *
+from pyjulius.models import *
+from pyjulius.grammar import *
+from pyjulius.pool import *
+from pyjulius.recording import *
+if PY2:
+    from pyjulius.dispatcher import *
+else:
+    from pyjulius.aio import *
 import logging
 try:
     from logging import NullHandler
@@ -27,5 +35,6 @@ except ImportError:
             pass
 
 
-__all__ = ['Client', 'Sentence', 'Word', 'Error', 'ConnectionError']
+__all__ = ['Client', 'ClientPool', 'ReplayClient', 'Recorder', 'Recording', 'Sentence', 'Word', 'SentenceBatch', 'Recognition', 'Utterance', 'Grammar', 'GrammarManager', 'Error', 'ConnectionError']
+__all__.append('DispatcherClient' if PY2 else 'AsyncioClient')
 logging.getLogger(__name__).addHandler(NullHandler())
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import queue, to_bytes
+from pyjulius.core import CONNECTED, DISCONNECTED, BaseClient
+from pyjulius.exceptions import ConnectionError
+from pyjulius.results import BLOCK
+from pyjulius.stream import BlockReader
+import asyncio
+import logging
+
+
+__all__ = ['AsyncioClient']
+logger = logging.getLogger(__name__)
+
+
+class AsyncioClient(BaseClient):
+    """Client to connect to a julius module server from an :mod:`asyncio` event loop, on Python 3
+
+    Blocks are read and delivered while the client is iterated with ``async for``, which yields the
+    results no subscriber handled::
+
+        client = AsyncioClient('localhost', 10500)
+        await client.connect()
+        async for result in client:
+            print(result)
+
+    The :class:`~pyjulius.results.Response` of a :meth:`~pyjulius.core.BaseClient.call` is set when
+    its block is read, so do not wait for it in the thread of the event loop. As putting a result in a full
+    :attr:`~pyjulius.core.BaseClient.results` with the :data:`~pyjulius.results.BLOCK` policy would stop
+    the event loop, bound it with another policy.
+
+    :param string host: host of the server
+    :param integer port: port of the server
+    :param string encoding: encoding to use to decode socket's output
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean nbest: interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+    :param integer maxsize: maximum number of results in :attr:`~pyjulius.core.BaseClient.results`, ``0`` means unbounded
+    :param integer policy: what to do when :attr:`~pyjulius.core.BaseClient.results` is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`
+    :param allow: tags of the blocks to parse, ``None`` for all
+    :type allow: iterable of string
+    :param deny: tags of the blocks to discard without parsing them
+    :type deny: iterable of string
+
+    .. attribute:: host
+
+        Host of the server
+
+    .. attribute:: port
+
+        Port of the server
+
+    .. attribute:: reader
+
+        The :class:`~pyjulius.stream.BlockReader` that buffers data received from the server
+
+    .. attribute:: state
+
+        Current state. State can be:
+
+        * :data:`~pyjulius.core.CONNECTED`
+        * :data:`~pyjulius.core.DISCONNECTED`
+
+    """
+    def __init__(self, host='localhost', port=10500, encoding='utf-8', modelize=True, nbest=False, maxsize=0, policy=BLOCK,
+                 allow=None, deny=()):
+        BaseClient.__init__(self, encoding, modelize, nbest, maxsize, policy, allow, deny)
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.state = DISCONNECTED
+        self._stream = None
+        self._writer = None
+
+    async def connect(self):
+        """Connect to the server
+
+        :raise ConnectionError: If socket cannot connect
+
+        """
+        logger.info(u'Connecting %s:%d' % (self.host, self.port))
+        try:
+            self._stream, self._writer = await asyncio.open_connection(self.host, self.port)
+        except OSError:
+            raise ConnectionError()
+        self.reader = BlockReader(None)
+        self.state = CONNECTED
+        logger.info(u'Connected %s:%d' % (self.host, self.port))
+
+    async def disconnect(self):
+        """Disconnect from the server"""
+        logger.info(u'Disconnecting')
+        writer = self._close()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:  # the connection was lost
+                pass
+
+    def _close(self):
+        """Close the connection and fail the pending :class:`~pyjulius.results.Response`
+
+        :return: the closed writer, if it was open
+
+        """
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        self.state = DISCONNECTED
+        self._fail_pending(ConnectionError())
+        return writer
+
+    async def send(self, command):
+        """Send a command to the server and wait until it can take more
+
+        :param string command: command to send
+        :raise ConnectionError: If the client is not connected
+
+        """
+        self._send([command])
+        try:
+            await self._writer.drain()
+        except OSError:
+            raise ConnectionError()
+
+    def _sendall(self, commands):
+        if self._writer is None:
+            raise ConnectionError()
+        for command in commands:
+            logger.info('Sending %s', command)
+            self._writer.write(to_bytes(command, self.encoding) + b'\n')
+
+    async def _read(self):
+        """Read data from the server and deliver the results of the complete blocks
+
+        :return: whether the connection is still open
+        :rtype: boolean
+
+        """
+        if self._writer is None:
+            return False
+        try:
+            data = await self._stream.read(self.reader.bufsize)
+        except OSError:
+            logger.exception(u'Connection error')
+            data = b''
+        if not data:
+            logger.info(u'Connection closed %s:%d' % (self.host, self.port))
+            self._close()
+            return False
+        self.reader.feed(data)
+        if self._stats is not None:
+            self._stats.count('bytes', len(data))
+
+        # Disconnect on invalid XML
+        if not self._process_blocks(self._deliver):
+            self._close()
+            return False
+        return True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        """Next result no subscriber handled, reading from the server until there is one
+
+        :raise StopAsyncIteration: when the connection is closed and all the results were yielded
+
+        """
+        while 1:
+            try:
+                return self.results.get_nowait()
+            except queue.Empty:
+                pass
+            if not await self._read():
+                try:
+                    return self.results.get_nowait()
+                except queue.Empty:
+                    raise StopAsyncIteration
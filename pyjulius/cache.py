@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+
+
+__all__ = ['BlockCache', 'DUPLICATE', 'RESULT_TAGS']
+
+
+#: Returned by :meth:`BlockCache.get` for a result already delivered within the dedup window
+DUPLICATE = object()
+
+#: Tags of the recognition results, the only blocks not delivered again within the dedup window by default
+RESULT_TAGS = frozenset(['RECOGOUT', 'RECOGFAIL'])
+
+
+class BlockCache(object):
+    """Bounded LRU cache of the results of raw blocks
+
+    Julius often outputs the same block many times, identical blocks then share the same result instead
+    of being parsed again. Cached results are shared and must not be modified.
+
+    :param integer maxsize: maximum number of cached results
+    :param float window: delay during which a result is not delivered again, in seconds, ``None`` to deliver all of them
+    :param tags: tags of the blocks not delivered again within the *window*, markers such as *STARTRECOG*
+        are identical for every utterance and must not be dropped
+    :type tags: iterable of string
+
+    .. attribute:: maxsize
+
+        Maximum number of cached results, the least recently used is evicted when it is reached
+
+    .. attribute:: window
+
+        Delay during which a result is not delivered again, in seconds, ``None`` to deliver all of them
+
+    .. attribute:: tags
+
+        Tags of the blocks not delivered again within the :attr:`window`
+
+    .. attribute:: hits
+
+        Number of blocks found in the cache
+
+    .. attribute:: misses
+
+        Number of blocks not found in the cache
+
+    .. attribute:: evictions
+
+        Number of results evicted from the cache
+
+    .. attribute:: duplicates
+
+        Number of results suppressed because they were delivered within the :attr:`window`
+
+    """
+    def __init__(self, maxsize=1024, window=None, tags=RESULT_TAGS):
+        self.maxsize = maxsize
+        self.window = window
+        self.tags = frozenset(tags)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.duplicates = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, block, now=None, dedup=True):
+        """Get the result of a block
+
+        :param string block: the raw block
+        :param float now: current time, required with a :attr:`window`
+        :param boolean dedup: return :data:`DUPLICATE` for a result delivered within the :attr:`window` if ``True``
+        :return: the result, :data:`DUPLICATE` if it was delivered within the :attr:`window` or ``None`` if not cached
+
+        """
+        entry = self._entries.pop(block, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries[block] = entry
+        self.hits += 1
+        if self.window is not None:
+            if dedup and now - entry[1] < self.window:
+                self.duplicates += 1
+                return DUPLICATE
+            entry[1] = now
+        return entry[0]
+
+    def put(self, block, result, now=None):
+        """Cache the result of a block
+
+        :param string block: the raw block
+        :param result: the result
+        :param float now: current time, required with a :attr:`window`
+
+        """
+        self._entries[block] = [result, now]
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all the cached results"""
+        self._entries.clear()
+
+    def snapshot(self):
+        """Counters of the cache
+
+        :return: ``size``, ``maxsize``, ``hits``, ``misses``, ``evictions`` and ``duplicates``
+        :rtype: dict
+
+        """
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'duplicates': self.duplicates}
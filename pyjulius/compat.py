@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+import select
+import socket
+import sys
+
+
+__all__ = ['PY2', 'text_type', 'string_types', 'range', 'queue', 'socketpair', 'DefaultSelector', 'EVENT_READ', 'EVENT_WRITE',
+           'to_bytes', 'native', 'unicode_compatible']
+
+
+#: Whether this is Python 2
+PY2 = sys.version_info[0] == 2
+
+if PY2:
+    import Queue as queue
+    text_type = unicode
+    string_types = basestring
+    range = xrange
+
+    def native(value, encoding='utf-8'):
+        """Convert a value to a native string, bytes on Python 2 and unicode on Python 3"""
+        if isinstance(value, unicode):
+            return value.encode(encoding)
+        return value
+else:
+    import queue
+    text_type = str
+    string_types = str
+    range = range
+
+    def native(value, encoding='utf-8'):
+        """Convert a value to a native string, bytes on Python 2 and unicode on Python 3"""
+        if isinstance(value, bytes):
+            return value.decode(encoding)
+        return value
+
+
+try:
+    from socket import socketpair
+except ImportError:  # Python 2 on Windows
+    def socketpair():
+        """Pair of connected sockets, made with a listening socket on the loopback interface"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen(1)
+            first = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            first.connect(listener.getsockname())
+            second, _ = listener.accept()
+        finally:
+            listener.close()
+        return first, second
+
+
+try:
+    from selectors import DefaultSelector, EVENT_READ, EVENT_WRITE
+except ImportError:  # Python 2
+    EVENT_READ = 1
+    EVENT_WRITE = 2
+    SelectorKey = collections.namedtuple('SelectorKey', ['fileobj', 'fd', 'events', 'data'])
+
+    class DefaultSelector(object):
+        """The part of :class:`selectors.DefaultSelector` used by pyjulius, on top of :func:`select.select`"""
+        def __init__(self):
+            self._keys = {}
+
+        def register(self, fileobj, events, data=None):
+            if fileobj in self._keys:
+                raise KeyError('%r is already registered' % fileobj)
+            key = self._keys[fileobj] = SelectorKey(fileobj, fileobj.fileno(), events, data)
+            return key
+
+        def unregister(self, fileobj):
+            return self._keys.pop(fileobj)
+
+        def modify(self, fileobj, events, data=None):
+            key = self._keys[fileobj] = self._keys[fileobj]._replace(events=events, data=data)
+            return key
+
+        def get_key(self, fileobj):
+            return self._keys[fileobj]
+
+        def select(self, timeout=None):
+            readers = [key.fileobj for key in self._keys.values() if key.events & EVENT_READ]
+            writers = [key.fileobj for key in self._keys.values() if key.events & EVENT_WRITE]
+            readable, writable, _ = select.select(readers, writers, [], timeout)
+            ready = collections.OrderedDict((fileobj, EVENT_READ) for fileobj in readable)
+            for fileobj in writable:
+                ready[fileobj] = ready.get(fileobj, 0) | EVENT_WRITE
+            return [(self._keys[fileobj], events) for fileobj, events in ready.items()]
+
+        def close(self):
+            self._keys.clear()
+
+
+def to_bytes(value, encoding='utf-8'):
+    """Encode a value if it is unicode"""
+    if isinstance(value, text_type):
+        return value.encode(encoding)
+    return value
+
+
+def unicode_compatible(cls):
+    """Class decorator that makes ``__str__`` return ``__unicode__`` on Python 3"""
+    if not PY2:
+        cls.__str__ = cls.__unicode__
+    return cls
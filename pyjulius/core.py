@@ -15,19 +15,29 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
-from exceptions import ConnectionError
-from models import Sentence
-from pyjulius.exceptions import SendTimeoutError
+from pyjulius.cache import DUPLICATE, RESULT_TAGS, BlockCache
+from pyjulius.compat import queue, string_types, to_bytes
+from pyjulius.correlation import Correlator
+from pyjulius.exceptions import ConnectionError, SendTimeoutError
+from pyjulius.grammar import grammars_command
+from pyjulius.models import PartialSentence, Recognition, Sentence
+from pyjulius.parser import StreamParser, escape, parse_recogout, sniff
+from pyjulius.recording import Recorder, Recording
+from pyjulius.results import BLOCK, Response, ResultQueue, TimedResult
+from pyjulius.stats import BlockStats, RollingHistogram, Stats, clock
+from pyjulius.stream import BlockReader, Wakeup
 from xml.etree.ElementTree import XML, ParseError
-import Queue
+import collections
+import errno
 import logging
-import re
+import random
 import select
 import socket
 import threading
+import time
 
 
-__all__ = ['CONNECTED', 'DISCONNECTED', 'Client']
+__all__ = ['CONNECTED', 'DISCONNECTED', 'BaseClient', 'Client', 'ReplayClient']
 logger = logging.getLogger(__name__)
 
 
@@ -37,22 +47,74 @@ CONNECTED = 1
 #: Disconnected client state
 DISCONNECTED = 2
 
+#: Commands that pause or resume the recognition
+PAUSE_COMMANDS = frozenset(['PAUSE', 'TERMINATE', 'RESUME'])
 
-class Client(threading.Thread):
-    """Threaded Client to connect to a julius module server
+#: Errors of a non-blocking connection that is in progress
+CONNECTING = frozenset([errno.EINPROGRESS, errno.EALREADY, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)])
 
-    :param string host: host of the server
-    :param integer port: port of the server
-    :param string encoding: encoding to use to decode socket's output
-    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
 
-    .. attribute:: host
+#: Tag of the block the server answers each command with, commands that are not answered are not listed
+RESPONSES = {'STATUS': 'SYSINFO', 'GRAMINFO': 'GRAMINFO', 'CHANGEGRAM': 'GRAMMAR', 'ADDGRAM': 'GRAMMAR',
+             'DELGRAM': 'GRAMMAR', 'ACTIVATEGRAM': 'GRAMMAR', 'DEACTIVATEGRAM': 'GRAMMAR', 'SYNCGRAM': 'GRAMMAR',
+             'ADDWORD': 'GRAMMAR', 'LISTPROCESS': 'ENGINEINFO', 'CURRENTPROCESS': 'RECOGPROCESS',
+             'SHIFTPROCESS': 'RECOGPROCESS'}
 
-        Host of the server
 
-    .. attribute:: port
+def command_name(command):
+    """Name of a module command, e.g. ``ADDGRAM`` for ``ADDGRAM name\\n...``
 
-        Port of the server
+    :param string command: the command
+    :rtype: string
+
+    """
+    words = command.split(None, 1)
+    return words[0].upper() if words else ''
+
+
+#: Clients used by :func:`process_block` in worker processes, by settings
+_workers = {}
+
+
+def process_block(block, encoding='utf-8', modelize=True, nbest=False, fastpath=True, instrumented=False):
+    """Turn a raw block into a result, in a worker process of :attr:`Client.workers`
+
+    :param string block: the raw block
+    :param string encoding: see :attr:`BaseClient.encoding`
+    :param boolean modelize: see :attr:`BaseClient.modelize`
+    :param boolean nbest: see :attr:`BaseClient.nbest`
+    :param boolean fastpath: see :attr:`BaseClient.fastpath`
+    :param boolean instrumented: record the counters and timings of the block if ``True``, see :meth:`BaseClient.instrument`
+    :return: the result or ``None`` if the block is not valid xml, with its :class:`~pyjulius.stats.BlockStats`
+        in a tuple if *instrumented*
+
+    """
+    settings = (encoding, modelize, nbest, fastpath)
+    client = _workers.get(settings)
+    if client is None:
+        client = _workers[settings] = BaseClient(encoding, modelize, nbest)
+        client.fastpath = fastpath
+    if not instrumented:
+        return client._process(block)
+    client._stats = stats = BlockStats()
+    try:
+        return client._process(block), stats
+    finally:
+        client._stats = None
+
+
+class BaseClient(object):
+    """Base class for clients that turn the output of a julius module server into results
+
+    :param string encoding: encoding to use to decode socket's output
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean nbest: interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+    :param integer maxsize: maximum number of results in :attr:`~BaseClient.results`, ``0`` means unbounded
+    :param integer policy: what to do when :attr:`~BaseClient.results` is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`
+    :param allow: tags of the blocks to parse, ``None`` for all
+    :type allow: iterable of string
+    :param deny: tags of the blocks to discard without parsing them
+    :type deny: iterable of string
 
     .. attribute:: encoding
 
@@ -62,15 +124,632 @@ class Client(threading.Thread):
 
         Try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
 
+    .. attribute:: nbest
+
+        Interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses
+        instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+
+    .. attribute:: allow
+
+        Tags of the blocks to parse, ``None`` for all. The tag of a block is read from its first bytes
+        and other blocks are discarded without being parsed
+
+    .. attribute:: deny
+
+        Tags of the blocks to discard without parsing them
+
+    .. attribute:: fastpath
+
+        Build the :class:`~pyjulius.models.Sentence` of *RECOGOUT* blocks with :func:`~pyjulius.parser.parse_recogout`
+        instead of parsing them as xml when possible if ``True``
+
+    .. attribute:: partials
+
+        Deliver the :class:`~pyjulius.models.PartialSentence` of julius' progressive output if ``True``, see :meth:`progressive`
+
+    .. attribute:: partial_interval
+
+        Minimum delay between two delivered :class:`~pyjulius.models.PartialSentence`, in seconds, ``None`` to deliver all of them
+
     .. attribute:: results
 
-        Results received when listening to the server. This :class:`~Queue.Queue` is filled with
+        Results received when listening to the server. This :class:`~pyjulius.results.ResultQueue` is filled with
         raw xml :class:`~xml.etree.ElementTree.Element` objects and :class:`~pyjulius.models` (if :attr:`modelize`)
+        that no subscriber handled, see :meth:`subscribe`
+
+    .. attribute:: cache
+
+        :class:`~pyjulius.cache.BlockCache` of the results of the blocks already received, if any, see :meth:`memoize`
+
+    .. attribute:: correlator
+
+        :class:`~pyjulius.correlation.Correlator` that joins the results into utterances, if any, see :meth:`correlate`
+
+    """
+    def __init__(self, encoding='utf-8', modelize=True, nbest=False, maxsize=0, policy=BLOCK, allow=None, deny=()):
+        self.encoding = encoding
+        self.modelize = modelize
+        self.nbest = nbest
+        self.allow = frozenset(allow) if allow is not None else None
+        self.deny = frozenset(deny)
+        self.fastpath = True
+        self.partials = True
+        self.partial_interval = None
+        self._partial_last = None
+        self.cache = None
+        self.correlator = None
+        self._stats = None
+        self._latencies = None
+        self._speech_end = None
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self.results = ResultQueue(maxsize, policy)
+        self._subscriptions = []
+        self._subscriptions_lock = threading.Lock()
+
+    def call(self, command):
+        """Send a command and return its :class:`~pyjulius.results.Response`
+
+        The response is the next block with the tag listed for the command in :data:`~pyjulius.core.RESPONSES`,
+        it is not delivered as a result. Commands the server does not answer are done once sent.
+
+        :param string command: command to send
+        :rtype: :class:`~pyjulius.results.Response`
+
+        """
+        return self.calls([command])[0]
+
+    def calls(self, commands):
+        """Send many commands at once and return their :class:`~pyjulius.results.Response`, see :meth:`call`
+
+        :param commands: commands to send
+        :type commands: list of string
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        responses = [Response(command) for command in commands]
+        self._submit(responses)
+        for response in responses:
+            if command_name(response.command) not in RESPONSES:
+                response.set_result(None)
+        return responses
+
+    def _send(self, commands, *args):
+        """Send commands without waiting for their response, see :meth:`_submit`
+
+        :param commands: commands to send
+        :type commands: list of string
+
+        """
+        self._submit([Response(command) for command in commands], *args)
+
+    def _submit(self, responses, *args):
+        """Register the :class:`~pyjulius.results.Response` of commands and send the commands
+
+        Responses are registered for all the commands the server answers, discarded ones included,
+        so that an answer is never taken for the answer to another command. Registering and sending
+        are done at once so that responses are registered in the order the commands are sent.
+
+        :param responses: responses of the commands to send
+        :type responses: list of :class:`~pyjulius.results.Response`
+        :param args: extra arguments of :meth:`_sendall`
+
+        """
+        with self._send_lock:
+            self._expect(responses)
+            try:
+                self._sendall([response.command for response in responses], *args)
+            except Exception as e:
+                with self._pending_lock:
+                    for pending in self._pending.values():
+                        for response in responses:
+                            if response in pending:
+                                pending.remove(response)
+                for response in responses:
+                    response.set_error(e)
+                raise
+
+    def _expect(self, responses):
+        """Register the :class:`~pyjulius.results.Response` of the commands the server answers
+
+        :param responses: responses of the commands about to be sent
+        :type responses: list of :class:`~pyjulius.results.Response`
+
+        """
+        with self._pending_lock:
+            for response in responses:
+                tag = RESPONSES.get(command_name(response.command))
+                if tag is not None:
+                    self._pending.setdefault(tag, collections.deque()).append(response)
+
+    def _sendall(self, commands):
+        """Send many commands at once, called by :meth:`_submit` with the send lock held
+
+        :param commands: commands to send
+        :type commands: list of string
+
+        """
+        raise NotImplementedError('%s does not implement sending commands' % type(self).__name__)
+
+    def _respond(self, result):
+        """Set the oldest pending :class:`~pyjulius.results.Response` with the tag of *result*
+
+        :param result: the result
+        :return: whether *result* was a response
+        :rtype: boolean
+
+        """
+        tag = getattr(result, 'tag', None)
+        with self._pending_lock:
+            pending = self._pending.get(tag)
+            if not pending:
+                return False
+            response = pending.popleft()
+        if isinstance(result, TimedResult):
+            result = result.result
+        response.set_result(result)
+        return True
+
+    def _fail_pending(self, error):
+        """Fail all the pending :class:`~pyjulius.results.Response`
+
+        :param error: the exception to raise from :meth:`Response.result <pyjulius.results.Response.result>`
+
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for responses in pending.values():
+            for response in responses:
+                response.set_error(error)
+
+    def instrument(self, enabled=True, exporter=None, interval=10.0):
+        """Enable or disable the instrumentation of the client
+
+        When enabled, the time spent in each stage of the processing of the server's output is measured
+        and can be retrieved with :meth:`stats`. When disabled, the overhead is a test per stage.
+
+        :param boolean enabled: whether to enable the instrumentation, disabling it resets the stats
+        :param exporter: function called with the :meth:`stats` every *interval* seconds
+        :param float interval: interval between two calls of *exporter*, in seconds
+
+        """
+        self._stats = Stats(exporter, interval) if enabled else None
+
+    def memoize(self, maxsize=1024, window=None, tags=RESULT_TAGS):
+        """Enable or disable the memoization of the results of the blocks
+
+        Identical blocks then share the same result, which must not be modified, instead of being parsed again.
+        Results are not memoized in :attr:`Client.streaming` mode or when parsed by :attr:`Client.workers`.
+
+        :param integer maxsize: maximum number of memoized results, ``0`` disables the memoization
+        :param float window: delay during which an identical result is not delivered again, in seconds,
+            ``None`` to deliver all of them
+        :param tags: tags of the blocks not delivered again within the *window*, the recognition results by default
+        :type tags: iterable of string
+
+        """
+        self.cache = BlockCache(maxsize, window, tags) if maxsize else None
+
+    def track(self, enabled=True, window=60.0):
+        """Enable or disable the timing of the results
+
+        When enabled, results are delivered wrapped in a :class:`~pyjulius.results.TimedResult` with the time
+        they went through each stage and the duration of the stages during the last *window* seconds can be
+        retrieved with :meth:`stats`. Responses to :meth:`call` are not wrapped.
+
+        :param boolean enabled: whether to enable the timing, disabling it resets the durations
+        :param float window: duration covered by the durations, in seconds
+
+        """
+        self._latencies = dict((stage, RollingHistogram(window)) for stage in TimedResult.STAGES) if enabled else None
+        self._speech_end = None
+
+    def correlate(self, enabled=True):
+        """Enable or disable the correlation of the results into utterances
+
+        When enabled, the *INPUT*, *STARTRECOG*, *ENDRECOG* and *INPUTPARAM* results of an utterance are
+        not delivered, a single :class:`~pyjulius.models.Utterance` is delivered instead of the *RECOGOUT*,
+        *RECOGFAIL* or *REJECTED* result that completes it. Other results are delivered as usual.
+
+        :param boolean enabled: whether to enable the correlation
+
+        """
+        self.correlator = Correlator() if enabled else None
+
+    def progressive(self, enabled=True, interval=None):
+        """Enable or disable the delivery of the partial results of julius' progressive output (*-progout* option)
+
+        Interim hypotheses are delivered as :class:`~pyjulius.models.PartialSentence`, tagged ``PARTIAL``, before
+        the final *RECOGOUT* result of the utterance. Only the latest partial sentence waits in :attr:`results`.
+
+        :param boolean enabled: whether to deliver the partial sentences, they are dropped otherwise
+        :param float interval: minimum delay between two delivered partial sentences, in seconds, those received
+            within the delay are dropped, ``None`` to deliver all of them
+
+        """
+        self.partials = enabled
+        self.partial_interval = interval
+        self._partial_last = None
+
+    def stats(self):
+        """Snapshot of the stats of the client
+
+        * ``counters``: ``bytes`` received, ``blocks`` processed, ``results`` delivered, partial sentences ``throttled``
+        * ``timers``: summary of the durations, in seconds, of the ``wait`` for the socket, ``recv``,
+          xml ``parse``, ``modelize``, ``fastpath`` parse and modelization and ``deliver`` stages,
+          see :meth:`Histogram.snapshot <pyjulius.stats.Histogram.snapshot>`
+        * ``queue``: ``size``, ``maxsize``, ``dropped`` and ``coalesced`` of :attr:`results`
+        * ``cache``: the :meth:`BlockCache.snapshot <pyjulius.cache.BlockCache.snapshot>` of :attr:`cache`, if any
+        * ``latency``: summary of the durations of the :meth:`TimedResult.stages <pyjulius.results.TimedResult.stages>`
+          during the last window, if the results are timed, see :meth:`track`
+
+        Counters and timers are empty unless the client is instrumented, see :meth:`instrument`
+
+        :rtype: dict
+
+        """
+        if self._stats is not None:
+            snapshot = self._stats.snapshot()
+        else:
+            snapshot = {'counters': {}, 'timers': {}}
+        snapshot['queue'] = {'size': self.results.qsize(), 'maxsize': self.results.maxsize,
+                             'dropped': self.results.dropped, 'coalesced': self.results.coalesced}
+        if self.cache is not None:
+            snapshot['cache'] = self.cache.snapshot()
+        latencies = self._latencies
+        if latencies is not None:
+            now = clock()
+            snapshot['latency'] = dict((stage, histogram.snapshot(now)) for stage, histogram in latencies.items())
+        return snapshot
+
+    def subscribe(self, handler, tag=None, predicate=None, pool=None):
+        """Call *handler* with every result that has the given tag and matches *predicate*
+
+        Handled results are not put in :attr:`results`. Handlers are called from the thread that
+        receives the results unless a *pool* is given.
+
+        :param handler: function called with the result
+        :param string tag: tag of the results to handle, e.g. ``RECOGOUT`` or ``INPUT``, ``None`` for all the results
+        :param predicate: function called with the result, the result is handled only if it returns ``True``
+        :param pool: pool to call *handler* in, such as a :class:`multiprocessing.pool.ThreadPool`
+        :return: the subscription, to give to :meth:`unsubscribe`
+
+        """
+        subscription = (tag, handler, predicate, pool)
+        with self._subscriptions_lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Cancel a subscription
+
+        :param subscription: the subscription returned by :meth:`subscribe`
+
+        """
+        with self._subscriptions_lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def _dispatch(self, result):
+        """Call the handlers of the subscriptions *result* matches
+
+        A result is not handled by a subscription whose predicate raises or whose pool rejects the handler.
+
+        :param result: the result
+        :return: whether a handler was called or submitted to its pool
+        :rtype: boolean
+
+        """
+        handled = False
+        tag = getattr(result, 'tag', None)
+        for subscription_tag, handler, predicate, pool in self._subscriptions:
+            if subscription_tag is not None and subscription_tag != tag:
+                continue
+            if predicate is not None:
+                try:
+                    matches = predicate(result)
+                except Exception:
+                    logger.exception(u'Error in predicate %r' % predicate)
+                    continue
+                if not matches:
+                    continue
+            if pool is not None:
+                try:
+                    pool.apply_async(handler, (result,))
+                except Exception:
+                    logger.exception(u'Error submitting handler %r' % handler)
+                    continue
+            else:
+                try:
+                    handler(result)
+                except Exception:
+                    logger.exception(u'Error in handler %r' % handler)
+            handled = True
+        return handled
+
+    def _deliver(self, result):
+        """Answer a pending :meth:`call` with a result, or dispatch it to the subscribers or put it in
+        :attr:`results` if none handled it
+
+        :param result: the result
+
+        """
+        stats = self._stats
+        tag = getattr(result, 'tag', None)
+        if (tag == 'PARTIAL' or tag == 'RECOGOUT') and self._throttled(tag):
+            if stats is not None:
+                stats.count('throttled')
+            return
+        if stats is not None:
+            start = clock()
+        correlator = self.correlator
+        if correlator is not None:
+            result = correlator.feed(result)
+        if result is None:
+            pass
+        elif self._pending and self._respond(result):
+            pass
+        elif not self._dispatch(result):
+            self._enqueue(result)
+        if stats is not None:
+            stats.time('deliver', clock() - start)
+            if result is not None:
+                stats.count('results')
+            stats.tick()
+
+    def _enqueue(self, result):
+        """Put a result no subscriber handled in :attr:`results`, override to queue it elsewhere
+
+        :param result: the result
+
+        """
+        self.results.put(result)
+
+    def _throttled(self, tag):
+        """Whether a result is a partial sentence not to be delivered, see :meth:`progressive`
+
+        :param string tag: tag of the result, ``PARTIAL`` or ``RECOGOUT``
+        :rtype: boolean
+
+        """
+        if tag == 'RECOGOUT':
+            self._partial_last = None
+            return False
+        if not self.partials:
+            return True
+        if self.partial_interval is None:
+            return False
+        now = clock()
+        if self._partial_last is not None and now - self._partial_last < self.partial_interval:
+            return True
+        self._partial_last = now
+        return False
+
+    def _observe(self, block, tag):
+        """Remember when julius detected the end of the speech, to time the next *RECOGOUT*
+
+        :param string block: the raw block, accepted or not
+        :param string tag: tag of the block
+
+        """
+        if tag == 'INPUT' and b'"ENDREC"' in block:
+            self._speech_end = self.reader.completed
+
+    def _timing(self, tag=None):
+        """Start the timing of the block last extracted from the reader
+
+        :param string tag: tag of the block, if known
+        :rtype: :class:`~pyjulius.results.TimedResult`
+
+        """
+        timing = TimedResult(self.reader.received, self.reader.completed)
+        if tag == 'RECOGOUT':
+            timing.speech_end, self._speech_end = self._speech_end, None
+        return timing
+
+    def _timed(self, timing, result):
+        """Finish the timing of a result when it is about to be delivered
+
+        :param timing: the timing started with :meth:`_timing`, with :attr:`~pyjulius.results.TimedResult.parsed` set
+        :type timing: :class:`~pyjulius.results.TimedResult`
+        :param result: the result
+        :return: *timing*, wrapping *result*
+
+        """
+        timing.result = result
+        timing.enqueued = now = clock()
+        latencies = self._latencies
+        if latencies is not None:
+            for stage, duration in timing.stages().items():
+                latencies[stage].add(duration, now)
+        return timing
+
+    def _process_blocks(self, deliver):
+        """Turn the complete blocks buffered in the reader into results and deliver them, for clients
+        that are told when data is received
+
+        :param deliver: function called with each result
+        :return: ``False`` if a block is not valid xml and the connection is to be closed
+        :rtype: boolean
+
+        """
+        block = self.reader.readblock()
+        while block is not None:
+            tag = sniff(block)
+            if self._latencies is not None:
+                self._observe(block, tag)
+            if block and not self._accepts(tag):
+                block = self.reader.readblock()
+                continue
+            timing = self._timing(tag) if self._latencies is not None else None
+            result = self._process(block, tag)
+            if result is None:
+                return False
+            if result is not DUPLICATE:
+                if timing is not None:
+                    timing.parsed = clock()
+                    result = self._timed(timing, result)
+                deliver(result)
+            block = self.reader.readblock()
+        return True
+
+    def _accepts(self, tag):
+        """Whether blocks with the given tag are to be parsed according to :attr:`allow` and :attr:`deny`,
+        blocks that answer a pending :meth:`call` are always parsed
+
+        :param string tag: the tag, ``None`` if unknown
+        :rtype: boolean
+
+        """
+        if tag is None or self._pending.get(tag):
+            return True
+        if self.allow is not None and tag not in self.allow:
+            return False
+        return tag not in self.deny
+
+    def _process(self, block, tag=None):
+        """Turn a raw block into a result
+
+        :param string block: the raw block
+        :param string tag: tag of the block if already known
+        :return: the result, :data:`~pyjulius.cache.DUPLICATE` if it is not to be delivered again
+            or ``None`` if the block is not valid xml. Blocks answering a pending :meth:`call` are always delivered
+
+        """
+        stats = self._stats
+        if stats is not None:
+            stats.count('blocks')
+        cache = self.cache
+        if cache is None:
+            return self._build(block, tag)
+        now, dedup = None, False
+        if cache.window is not None:
+            now = clock()
+            if tag is None:
+                tag = sniff(block)
+            # Responses to a pending call are never duplicates
+            dedup = tag in cache.tags and not self._pending.get(tag)
+        result = cache.get(block, now, dedup)
+        if result is None:
+            result = self._build(block, tag)
+            if result is not None:
+                cache.put(block, result, now)
+        return result
+
+    def _build(self, block, tag=None):
+        """Parse and modelize a raw block
+
+        :param string block: the raw block
+        :param string tag: tag of the block if already known
+        :return: the result or ``None`` if the block is not valid xml
+
+        """
+        stats = self._stats
+        if stats is not None:
+            start = clock()
+        if self.fastpath and self.modelize and not self.nbest and (tag or sniff(block)) == 'RECOGOUT':
+            sentence = parse_recogout(block, self.encoding)
+            if sentence is not None:
+                if stats is not None:
+                    stats.time('fastpath', clock() - start)
+                logger.info(u'Modelized recognition: %r', sentence)
+                return sentence
+        xml = self._parse(block.decode(self.encoding))
+        if xml is None:
+            return None
+        if stats is not None:
+            parsed = clock()
+            stats.time('parse', parsed - start)
+        result = self._modelize(xml)
+        if stats is not None:
+            stats.time('modelize', clock() - parsed)
+        return result
+
+    def _parse(self, block):
+        """Parse a decoded block as XML
+
+        :param string block: the block
+        :return: block as xml or ``None`` if the block is not valid xml
+        :rtype: xml.etree.ElementTree
+
+        """
+        try:
+            xml = XML(escape(block))
+        except ParseError:
+            xml = None
+        return xml
+
+    def _modelize(self, xml):
+        """Interpret a raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if :attr:`modelize`
+
+        :param xml: the raw xml
+        :type xml: :class:`~xml.etree.ElementTree.Element`
+        :return: the model or *xml* if it cannot be interpreted
+
+        """
+        # Raw xml only
+        if not self.modelize:
+            logger.info(u'Raw xml: %s', xml)
+            return xml
+
+        # Model objects + raw xml as fallback
+        if xml.tag == 'RECOGOUT' and xml.find('PHYPO') is not None:
+            sentence = PartialSentence.from_phypo(xml.find('PHYPO'), self.encoding)
+            logger.info(u'Modelized partial recognition: %r', sentence)
+            return sentence
+        if xml.tag == 'RECOGOUT' and self.nbest:
+            recognition = Recognition.from_recogout(xml, self.encoding)
+            logger.info(u'Modelized recognition: %r', recognition)
+            return recognition
+        if xml.tag == 'RECOGOUT':
+            sentence = Sentence.from_shypo(xml.find('SHYPO'), self.encoding)
+            logger.info(u'Modelized recognition: %r', sentence)
+            return sentence
+        logger.info(u'Unmodelized xml: %s', xml)
+        return xml
+
+
+class Client(BaseClient, threading.Thread):
+    """Threaded Client to connect to a julius module server
+
+    :param string host: host of the server
+    :param integer port: port of the server
+    :param string encoding: encoding to use to decode socket's output
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean nbest: interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+    :param integer maxsize: maximum number of results in :attr:`~BaseClient.results`, ``0`` means unbounded
+    :param integer policy: what to do when :attr:`~BaseClient.results` is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`
+    :param allow: tags of the blocks to parse, ``None`` for all
+    :type allow: iterable of string
+    :param deny: tags of the blocks to discard without parsing them
+    :type deny: iterable of string
+    :param boolean streaming: parse the server's output incrementally as it is received if ``True``
+    :param boolean reconnect: reconnect to the server when the connection is lost if ``True``
+    :param workers: pool of processes to parse the blocks in
+    :type workers: :class:`multiprocessing.pool.Pool`
+    :param record: path of a log or :class:`~pyjulius.recording.Recorder` to capture the server's output in
+
+    .. attribute:: host
+
+        Host of the server
+
+    .. attribute:: port
+
+        Port of the server
+
+    .. attribute:: streaming
+
+        Parse the server's output incrementally with a :class:`~pyjulius.parser.StreamParser` if ``True``.
+        Elements are available as soon as they are closed instead of once their block is complete
 
     .. attribute:: sock
 
         The socket used
 
+    .. attribute:: reader
+
+        The :class:`~pyjulius.stream.BlockReader` that buffers data received on :attr:`sock`
+
     .. attribute:: state
 
         Current state. State can be:
@@ -78,68 +757,295 @@ class Client(threading.Thread):
         * :data:`~pyjulius.core.CONNECTED`
         * :data:`~pyjulius.core.DISCONNECTED`
 
+    .. attribute:: reconnect
+
+        Reconnect to the server when the connection is lost or the output cannot be parsed if ``True``.
+        Reconnection is attempted with an exponential backoff and the :attr:`replay` commands are sent
+        again once connected
+
+    .. attribute:: reconnect_delay
+
+        Delay before the first reconnection attempt, in seconds. It is doubled after each failed attempt
+        and randomized to avoid many clients reconnecting at once
+
+    .. attribute:: reconnect_max_delay
+
+        Maximum delay between two reconnection attempts, in seconds
+
+    .. attribute:: reconnects
+
+        Number of successful reconnections
+
+    .. attribute:: reconnect_time
+
+        Time it took to reconnect the last time the connection was lost, in seconds
+
+    .. attribute:: connect_timeout
+
+        Maximum time to wait for the connection to be established, in seconds, ``None`` to wait as long as the
+        system does. :meth:`stop` and :meth:`disconnect` interrupt the connection in any case
+
+    .. attribute:: replay
+
+        Commands to send again after a reconnection to restore the state of the server changed with :meth:`send`:
+        the grammars added, with the words added to them, the grammars activated or deactivated, the input change
+        mode and the pause state. Grammars are tracked by name and only their current state is kept. They are
+        left out when :attr:`grammars` is set
+
+    .. attribute:: grammars
+
+        :class:`~pyjulius.grammar.GrammarManager` that loads the grammars again after a reconnection, before the
+        :attr:`replay` commands are sent. It is set by the manager
+
+    .. attribute:: workers
+
+        :class:`multiprocessing.pool.Pool` of processes to parse the blocks in, ``None`` to parse them in the thread of the client.
+        The thread of the client then only reads the blocks and results are delivered in order by a second thread.
+        A pool can be shared by many clients. Blocks that are not valid xml are skipped and :attr:`streaming`
+        must be ``False``
+
+    .. attribute:: inflight
+
+        Maximum number of blocks being parsed by the :attr:`workers` at once, reading waits when it is reached
+
+    .. attribute:: recorder
+
+        :class:`~pyjulius.recording.Recorder` that captures the server's output, if any. It is closed when
+        the thread stops if it was created from a path
+
     """
-    def __init__(self, host='localhost', port=10500, encoding='utf-8', modelize=True):
-        super(Client, self).__init__()
+    def __init__(self, host='localhost', port=10500, encoding='utf-8', modelize=True, nbest=False, maxsize=0, policy=BLOCK,
+                 allow=None, deny=(), streaming=False, reconnect=False, workers=None, record=None):
+        threading.Thread.__init__(self)
+        BaseClient.__init__(self, encoding, modelize, nbest, maxsize, policy, allow, deny)
         self.host = host
         self.port = port
-        self.encoding = encoding
+        self._owns_recorder = isinstance(record, string_types)
+        self.recorder = Recorder(record) if self._owns_recorder else record
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.reader = BlockReader(self.sock, recorder=self.recorder)
         self.state = DISCONNECTED
-        self._stop = False
-        self.results = Queue.Queue()
-        self.modelize = modelize
+        self._stopping = False
+        self._closed = False
+        self.streaming = streaming
+        self._parser = None
+        self._elements = collections.deque()
+        self.reconnect = reconnect
+        self.reconnect_delay = 0.1
+        self.reconnect_max_delay = 30.0
+        self.reconnects = 0
+        self.reconnect_time = None
+        self.connect_timeout = 10.0
+        self._paused = None
+        self._inputonchange = None
+        self._grammars = collections.OrderedDict()
+        self._activations = collections.OrderedDict()
+        self._changed = False
+        self._replay_lock = threading.Lock()
+        self.grammars = None
+        self.workers = workers
+        self.inflight = 64
+        self._inflight = None
+        self._timed_block = None
+        self._wakeup = Wakeup()
+        self._state_lock = threading.Lock()
+        self._listening = False
 
     def stop(self):
-        """Stop the thread"""
-        self._stop = True
+        """Stop the thread. The thread stops at once, even if it is waiting for the server"""
+        self._stopping = True
+        self._wakeup.wake()
 
     def run(self):
         """Start listening to the server"""
         logger.info(u'Started listening')
-        while not self._stop:
-            xml = self._readxml()
+        with self._state_lock:
+            self._listening = not self._stopping
+        pooled = self.workers is not None and not self.streaming
+        if pooled:
+            self._inflight = queue.Queue(self.inflight)
+            delivery = threading.Thread(target=self._deliver_parsed)
+            delivery.daemon = True
+            delivery.start()
+        while not self._stopping:
+            timing = None
+            try:
+                result = self._readresult()
+                if self._latencies is not None:
+                    timing = self._timed_block
+            except socket.error:
+                logger.exception(u'Connection error')
+                self._closed = True
+                result = None
 
-            # Exit on invalid XML
-            if xml is None:
-                break
+            if result is None:
+                # Exit when stopped, disconnected or on invalid XML
+                if self._stopping or not self.reconnect or self.state != CONNECTED:
+                    break
+
+                # Skip invalid XML if the stream is still usable
+                if not self._closed and not self.streaming:
+                    logger.warning(u'Skipping invalid block')
+                    continue
 
-            # Raw xml only
-            if not self.modelize:
-                logger.info(u'Raw xml: %s' % xml)
-                self.results.put(xml)
+                if not self._reconnect():
+                    break
+                continue
+            if result is DUPLICATE:
                 continue
 
-            # Model objects + raw xml as fallback
-            if xml.tag == 'RECOGOUT':
-                sentence = Sentence.from_shypo(xml.find('SHYPO'), self.encoding)
-                logger.info(u'Modelized recognition: %r' % sentence)
-                self.results.put(sentence)
+            if pooled:
+                self._inflight.put((result, timing))
+            elif timing is not None:
+                timing.parsed = clock()
+                self._deliver(self._timed(timing, result))
             else:
-                logger.info(u'Unmodelized xml: %s' % xml)
-                self.results.put(xml)
+                self._deliver(result)
 
+        if pooled:
+            self._inflight.put(None)
+            delivery.join()
+        self._fail_pending(ConnectionError())
+        if self._owns_recorder:
+            self.recorder.close()
+        elif self.recorder is not None:
+            self.recorder.flush()
+        with self._state_lock:
+            self._listening = False
+            disconnected = self.state == DISCONNECTED
+        if disconnected:
+            self._close()
         logger.info(u'Stopped listening')
 
+    def _deliver_parsed(self):
+        """Deliver the results parsed by the :attr:`workers` in the order the blocks were read"""
+        while 1:
+            parsing = self._inflight.get()
+            if parsing is None:
+                break
+            parsing, timing = parsing
+            try:
+                result = parsing.get()
+            except Exception:
+                logger.exception(u'Error in worker')
+                continue
+            if isinstance(result, tuple):
+                result, block_stats = result
+                if self._stats is not None:
+                    self._stats.merge(block_stats)
+            if result is None:
+                logger.warning(u'Skipping invalid block')
+                continue
+            if timing is not None:
+                timing.parsed = clock()
+                result = self._timed(timing, result)
+            self._deliver(result)
+
+    def _reconnect(self):
+        """Reconnect to the server with an exponential backoff, load the :attr:`grammars` again and send the :attr:`replay` commands
+
+        :return: whether the client reconnected before being stopped
+        :rtype: boolean
+
+        """
+        logger.info(u'Reconnecting %s:%d' % (self.host, self.port))
+        start = clock()
+        self._fail_pending(ConnectionError())
+        self.sock.close()
+        delay = self.reconnect_delay
+        while not self._stopping:
+            self._sleep(delay * random.uniform(0.5, 1.0))
+            if self._stopping:
+                break
+            if self.recorder is not None:
+                self.recorder.reset()
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.reader = BlockReader(self.sock, recorder=self.recorder)
+            self._closed = False
+            self._parser = None
+            self._elements.clear()
+            try:
+                self.connect()
+                if self.grammars is not None:
+                    self.grammars.reload()
+                with self._send_lock:
+                    with self._replay_lock:
+                        replay = self._replay()
+                    if replay:
+                        self._expect([Response(command) for command in replay])
+                        self._write(replay)
+            except (ConnectionError, SendTimeoutError, socket.error):
+                self.sock.close()
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            self.reconnects += 1
+            self.reconnect_time = clock() - start
+            if self._stats is not None:
+                self._stats.count('reconnects')
+                self._stats.time('reconnect', self.reconnect_time)
+            logger.info(u'Reconnected %s:%d in %.3fs' % (self.host, self.port, self.reconnect_time))
+            return True
+        return False
+
+    def _sleep(self, delay):
+        """Sleep for *delay* seconds or until the thread is stopped"""
+        if not self._stopping:
+            self._wakeup.wait(delay)
+
     def connect(self):
         """Connect to the server
 
+        The connection is interrupted by :meth:`stop` and :meth:`disconnect` and fails after :attr:`connect_timeout`.
+        It also fails if the client is stopped or disconnected once the connection is established, the new
+        connection is then closed.
+
         :raise ConnectionError: If socket cannot establish a connection
 
         """
+        logger.info(u'Connecting %s:%d' % (self.host, self.port))
         try:
-            logger.info(u'Connecting %s:%d' % (self.host, self.port))
-            self.sock.connect((self.host, self.port))
-        except socket.error:
+            self.sock.setblocking(False)
+            error = self.sock.connect_ex((self.host, self.port))
+            if error in CONNECTING:
+                stopped, writable, failed = select.select([self._wakeup], [self.sock], [self.sock], self.connect_timeout)
+                if stopped or not writable and not failed:
+                    raise ConnectionError()  # stopped or timed out
+                error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise ConnectionError()
+            self.sock.setblocking(True)
+        except (socket.error, ValueError):  # ValueError if the socket was closed by disconnect
             raise ConnectionError()
-        self.state = CONNECTED
+        with self._state_lock:
+            if self._stopping:
+                self.sock.close()
+                raise ConnectionError()
+            self.state = CONNECTED
 
     def disconnect(self):
-        """Disconnect from the server"""
+        """Disconnect from the server and stop the thread
+
+        If the thread is listening, it is woken up and closes the socket itself when it stops
+        so that the socket is never closed while it is being read.
+
+        """
         logger.info(u'Disconnecting')
-        self.sock.shutdown(socket.SHUT_RDWR)
+        with self._state_lock:
+            self.state = DISCONNECTED
+            self._stopping = True
+            if self._listening:
+                self._wakeup.wake()
+                return
+        self._close()
+
+    def _close(self):
+        """Close the socket and the :class:`~pyjulius.stream.Wakeup`"""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:  # already closed
+            pass
         self.sock.close()
-        self.state = DISCONNECTED
+        self._wakeup.close()
 
     def send(self, command, timeout=5):
         """Send a command to the server
@@ -147,11 +1053,121 @@ class Client(threading.Thread):
         :param string command: command to send
 
         """
-        logger.info(u'Sending %s' % command)
+        self._send([command], timeout)
+
+    def _sendall(self, commands, timeout=5):
+        for command in commands:
+            self._record(command)
+        self._write(commands, timeout)
+
+    def _write(self, commands, timeout=5):
+        """Send commands to the server in a single write without recording them in :attr:`replay`
+
+        :param commands: commands to send
+        :type commands: list of string
+
+        """
+        for command in commands:
+            logger.info('Sending %s', command)
         _, writable, __ = select.select([], [self.sock], [], timeout)
         if not writable:
             raise SendTimeoutError()
-        writable[0].sendall(command + '\n')
+        writable[0].sendall(b''.join(to_bytes(command, self.encoding) + b'\n' for command in commands))
+
+    @property
+    def replay(self):
+        with self._replay_lock:
+            return self._replay()
+
+    def _replay(self):
+        """Build the :attr:`replay` commands, with the replay lock held
+
+        :rtype: list of string
+
+        """
+        commands = []
+        if self.grammars is None:
+            for grammar in self._grammars.values():
+                commands.extend(grammar)
+        if self._changed and commands and command_name(commands[0]) == 'ADDGRAM':
+            commands[0] = 'CHANGEGRAM' + commands[0][len('ADDGRAM'):]
+        deactivated = [name for name, active in self._activations.items() if not active]
+        if deactivated:
+            commands.append(grammars_command('DEACTIVATEGRAM', deactivated))
+        activated = [name for name, active in self._activations.items() if active]
+        if activated:
+            commands.append(grammars_command('ACTIVATEGRAM', activated))
+        if self._inputonchange is not None:
+            commands.append(self._inputonchange)
+        if self._paused is not None:
+            commands.append(self._paused)
+        return commands
+
+    def _record(self, command):
+        """Record the change of the state of the server a command makes, see :attr:`replay`
+
+        :param string command: the command
+
+        """
+        name = command_name(command)
+        with self._replay_lock:
+            if name in PAUSE_COMMANDS:
+                self._paused = command if name != 'RESUME' else None
+            elif name == 'INPUTONCHANGE':
+                self._inputonchange = command
+            elif name == 'CHANGEGRAM' or name == 'ADDGRAM':
+                if name == 'CHANGEGRAM':
+                    self._grammars.clear()
+                    self._activations.clear()
+                    self._changed = True
+                grammar = command.split('\n', 1)[0].split()[1:2]
+                grammar = grammar[0] if grammar else command
+                self._grammars.pop(grammar, None)
+                self._activations.pop(grammar, None)
+                self._grammars[grammar] = [command]
+            elif name == 'ADDWORD':
+                grammar = command.split()[1:2]
+                if grammar:
+                    self._grammars.setdefault(grammar[0], []).append(command)
+            elif name == 'DELGRAM':
+                for grammar in command.split()[1:]:
+                    self._grammars.pop(grammar, None)
+                    self._activations.pop(grammar, None)
+            elif name == 'ACTIVATEGRAM' or name == 'DEACTIVATEGRAM':
+                for grammar in command.split()[1:]:
+                    self._activations.pop(grammar, None)
+                    if name == 'DEACTIVATEGRAM' or grammar not in self._grammars:
+                        self._activations[grammar] = name == 'ACTIVATEGRAM'
+
+    def _read(self, extract):
+        """Read from the server until *extract* returns something or the thread is stopped
+
+        :param extract: method of :attr:`reader` that extracts data from its buffer
+        :return: the extracted data or an empty string if stopped or disconnected
+        :rtype: string
+
+        """
+        stats = self._stats
+        data = extract()
+        while data is None and not self._stopping:
+            if stats is not None:
+                start = clock()
+            readable, _, __ = select.select([self.sock, self._wakeup], [], [])
+            if stats is not None:
+                waited = clock()
+                stats.time('wait', waited - start)
+            if self.sock not in readable:
+                continue  # woken up to stop
+            received = self.reader.fill()
+            if not received:
+                logger.info(u'Connection closed by the server')
+                self._closed = True
+                break
+            if stats is not None:
+                stats.time('recv', clock() - waited)
+                stats.count('bytes', received)
+            data = extract()
+        return data or b''
 
     def _readline(self):
         """Read a line from the server. Data is read from the socket until a character ``\n`` is found
@@ -160,18 +1176,7 @@ class Client(threading.Thread):
         :rtype: string
 
         """
-        line = ''
-        while 1:
-            readable, _, __ = select.select([self.sock], [], [], 0.5)
-            if self._stop:
-                break
-            if not readable:
-                continue
-            data = readable[0].recv(1)
-            if data == '\n':
-                break
-            line += unicode(data, self.encoding)
-        return line
+        return self._read(self.reader.readline).decode(self.encoding)
 
     def _readblock(self):
         """Read a block from the server. Lines are read until a character ``.`` is found
@@ -180,13 +1185,56 @@ class Client(threading.Thread):
         :rtype: string
 
         """
-        block = ''
-        while not self._stop:
-            line = self._readline()
-            if line == '.':
-                break
-            block += line
-        return block
+        return self._read(self.reader.readblock).decode(self.encoding)
+
+    def _readresult(self):
+        """Read a block and turn it into a result
+
+        :return: the result, the :class:`~multiprocessing.pool.AsyncResult` of the result if parsed by
+            the :attr:`workers`, or ``None`` if the block is not valid xml
+
+        """
+        if self.streaming:
+            xml = self._readxml_stream()
+            if xml is None:
+                return None
+            if self._latencies is not None:
+                self._timed_block = self._timing()
+            stats = self._stats
+            if stats is None:
+                return self._modelize(xml)
+            stats.count('blocks')
+            start = clock()
+            result = self._modelize(xml)
+            stats.time('modelize', clock() - start)
+            return result
+        block, tag = self._readaccepted()
+        if not block:
+            return None
+        if self._latencies is not None:
+            self._timed_block = self._timing(tag)
+        if self.workers is not None:
+            return self.workers.apply_async(process_block, (block, self.encoding, self.modelize, self.nbest, self.fastpath,
+                                                            self._stats is not None))
+        return self._process(block, tag)
+
+    def _readaccepted(self):
+        """Read blocks until one is accepted by :attr:`~BaseClient.allow` and :attr:`~BaseClient.deny`
+
+        :return: the raw block and its tag
+        :rtype: tuple
+
+        """
+        block = self._read(self.reader.readblock)
+        tag = sniff(block)
+        if self._latencies is not None:
+            self._observe(block, tag)
+        while block and not self._accepts(tag):
+            block = self._read(self.reader.readblock)
+            tag = sniff(block)
+            if self._latencies is not None:
+                self._observe(block, tag)
+        return block, tag
 
     def _readxml(self):
         """Read a block and return the result as XML
@@ -195,9 +1243,135 @@ class Client(threading.Thread):
         :rtype: xml.etree.ElementTree
 
         """
-        block = re.sub(r'<(/?)s>', r'&lt;\1s&gt;', self._readblock())
-        try:
-            xml = XML(block)
-        except ParseError:
-            xml = None
-        return xml
+        if self.streaming:
+            return self._readxml_stream()
+        block, _ = self._readaccepted()
+        return self._parse(block.decode(self.encoding))
+
+    def _readxml_stream(self):
+        """Feed the :class:`~pyjulius.parser.StreamParser` until an element is closed
+
+        :return: the next element
+        :rtype: xml.etree.ElementTree
+
+        """
+        if self._parser is None:
+            self._parser = StreamParser(self.encoding, self._accepts)
+        while not self._elements:
+            data = self._read(self.reader.readlines)
+            if not data:
+                return None
+            if self._stats is not None:
+                start = clock()
+            try:
+                self._elements.extend(self._parser.feed(data))
+            except ParseError:
+                return None
+            if self._stats is not None:
+                self._stats.time('parse', clock() - start)
+        return self._elements.popleft()
+
+
+class ReplayClient(BaseClient, threading.Thread):
+    """Threaded client that replays a log captured with the *record* option of :class:`Client`
+
+    Blocks are read from the memory-mapped :class:`~pyjulius.recording.Recording` and go through the same
+    filtering, parsing and delivery as the blocks received from a server, either as fast as possible or
+    with the timing they were received with. Commands cannot be sent.
+
+    :param string path: path of the log
+    :param string encoding: encoding to use to decode the log
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean nbest: interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+    :param integer maxsize: maximum number of results in :attr:`~BaseClient.results`, ``0`` means unbounded
+    :param integer policy: what to do when :attr:`~BaseClient.results` is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`
+    :param allow: tags of the blocks to parse, ``None`` for all
+    :type allow: iterable of string
+    :param deny: tags of the blocks to discard without parsing them
+    :type deny: iterable of string
+    :param float speed: replay speed relative to the original timing, ``None`` to replay as fast as possible
+
+    .. attribute:: recording
+
+        The :class:`~pyjulius.recording.Recording` being replayed
+
+    .. attribute:: speed
+
+        Replay speed relative to the original timing, ``None`` to replay as fast as possible
+
+    .. attribute:: position
+
+        Index of the next block to replay
+
+    """
+    def __init__(self, path, encoding='utf-8', modelize=True, nbest=False, maxsize=0, policy=BLOCK,
+                 allow=None, deny=(), speed=None):
+        threading.Thread.__init__(self)
+        BaseClient.__init__(self, encoding, modelize, nbest, maxsize, policy, allow, deny)
+        self.recording = Recording(path)
+        self.speed = speed
+        self.position = 0
+        self._stopping = False
+        self._wakeup = Wakeup()
+
+    def stop(self):
+        """Stop the thread. The thread stops at once, even if it is waiting for the time of a block"""
+        self._stopping = True
+        self._wakeup.wake()
+
+    def send(self, command):
+        """Commands cannot be sent to a log
+
+        :raise ConnectionError: always
+
+        """
+        raise ConnectionError('ReplayClient cannot send commands')
+
+    def call(self, command):
+        """Commands cannot be sent to a log
+
+        :raise ConnectionError: always
+
+        """
+        raise ConnectionError('ReplayClient cannot send commands')
+
+    def calls(self, commands):
+        """Commands cannot be sent to a log
+
+        :raise ConnectionError: always
+
+        """
+        raise ConnectionError('ReplayClient cannot send commands')
+
+    def run(self):
+        """Replay the log"""
+        logger.info(u'Started replaying %s', self.recording.path)
+        recording = self.recording
+        stats = self._stats
+        start = origin = None
+        while self.position < len(recording) and not self._stopping:
+            block, timestamp = recording[self.position]
+            self.position += 1
+            if self.speed:
+                if origin is None:
+                    start, origin = time.time(), timestamp
+                delay = start + (timestamp - origin) / self.speed - time.time()
+                if delay > 0 and self._wakeup.wait(delay):
+                    break
+            if not block:
+                continue
+            if stats is not None:
+                stats.count('bytes', len(block))
+            tag = sniff(block)
+            if not self._accepts(tag):
+                continue
+            result = self._process(block, tag)
+            if result is None:
+                logger.warning(u'Skipping invalid block')
+                continue
+            if result is not DUPLICATE:
+                self._deliver(result)
+        self._fail_pending(ConnectionError())
+        recording.close()
+        self._wakeup.close()
+        logger.info(u'Stopped replaying %s', recording.path)
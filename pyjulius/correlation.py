@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.models import Utterance
+from pyjulius.results import TimedResult
+from pyjulius.stats import clock
+
+
+__all__ = ['Correlator']
+
+
+#: Tags of the blocks that complete an utterance
+COMPLETIONS = frozenset(['RECOGOUT', 'RECOGFAIL', 'REJECTED'])
+
+
+class Correlator(object):
+    """Incremental state machine that joins the blocks of an utterance into an :class:`~pyjulius.models.Utterance`
+
+    Only the utterance in progress is kept, it is emitted as soon as the block that completes it is fed.
+    Other results go through unchanged. An utterance cut by a lost connection is dropped when julius
+    starts the next one.
+
+    .. attribute:: utterance
+
+        The :class:`~pyjulius.models.Utterance` in progress, ``None`` if there is none
+
+    .. attribute:: utterances
+
+        Number of utterances emitted
+
+    """
+    def __init__(self):
+        self.utterance = None
+        self.utterances = 0
+
+    def feed(self, result):
+        """Feed a result
+
+        Results wrapped in a :class:`~pyjulius.results.TimedResult` are timed when received and an utterance
+        is emitted wrapped in the :class:`~pyjulius.results.TimedResult` of the block that completed it.
+
+        :param result: the result
+        :return: the :class:`~pyjulius.models.Utterance` if *result* completed it, ``None`` if *result* is
+            a part of the utterance in progress or *result* itself if it is not a part of an utterance
+
+        """
+        original = result
+        timing = now = None
+        if isinstance(result, TimedResult):
+            timing, result = result, result.result
+            now = timing.completed
+        tag = getattr(result, 'tag', None)
+        if tag == 'INPUT':
+            status = result.get('STATUS')
+            if status == 'STARTREC':
+                self.utterance = Utterance()
+                self.utterance.start = _time(result)
+            elif status == 'ENDREC':
+                self._current().end = _time(result)
+            else:
+                return original
+        elif tag == 'STARTRECOG':
+            self._current().started = now if now is not None else clock()
+        elif tag == 'ENDRECOG':
+            self._current().ended = now if now is not None else clock()
+        elif tag == 'INPUTPARAM':
+            utterance = self._current()
+            utterance.frames = _int(result.get('FRAMES'))
+            utterance.msec = _int(result.get('MSEC'))
+        elif tag in COMPLETIONS:
+            utterance, self.utterance = self._current(), None
+            utterance.completed = now if now is not None else clock()
+            utterance.status = tag
+            if tag == 'RECOGOUT':
+                utterance.result = result
+            elif tag == 'REJECTED':
+                utterance.reason = result.get('REASON')
+            self.utterances += 1
+            if timing is not None:
+                timing.result = utterance
+                return timing
+            return utterance
+        else:
+            return original
+        return None
+
+    def _current(self):
+        """The utterance in progress, started if julius did not tell when the speech began"""
+        if self.utterance is None:
+            self.utterance = Utterance()
+        return self.utterance
+
+
+def _int(value):
+    return int(value) if value is not None else None
+
+
+def _time(xml):
+    return _int(xml.get('TIME'))
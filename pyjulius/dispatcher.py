@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import queue, to_bytes
+from pyjulius.core import CONNECTED, DISCONNECTED, BaseClient
+from pyjulius.exceptions import ConnectionError
+from pyjulius.results import BLOCK
+from pyjulius.stream import BlockReader
+import asyncore
+import collections
+import errno
+import logging
+import os
+import socket
+
+
+__all__ = ['DispatcherClient']
+logger = logging.getLogger(__name__)
+
+
+class DispatcherClient(BaseClient, asyncore.dispatcher):
+    """Client to connect to a julius module server without a thread
+
+    Many clients can share the same :mod:`asyncore` map and be served by a single :func:`asyncore.loop`.
+    Results are delivered by :meth:`handle_result` as soon as their block is received. It is exported by
+    :mod:`pyjulius` on Python 2 only, see :class:`~pyjulius.aio.AsyncioClient` for Python 3.
+
+    :param string host: host of the server
+    :param integer port: port of the server
+    :param string encoding: encoding to use to decode socket's output
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean nbest: interpret *RECOGOUT* as :class:`~pyjulius.models.Recognition` with all the hypotheses instead of the best :class:`~pyjulius.models.Sentence` if ``True``
+    :param integer maxsize: maximum number of results in :attr:`~pyjulius.core.BaseClient.results`, ``0`` means unbounded
+    :param integer policy: what to do when :attr:`~pyjulius.core.BaseClient.results` is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`
+    :param allow: tags of the blocks to parse, ``None`` for all
+    :type allow: iterable of string
+    :param deny: tags of the blocks to discard without parsing them
+    :type deny: iterable of string
+    :param dict map: :mod:`asyncore` map to register the client in, defaults to the global map
+
+    .. attribute:: host
+
+        Host of the server
+
+    .. attribute:: port
+
+        Port of the server
+
+    .. attribute:: reader
+
+        The :class:`~pyjulius.stream.BlockReader` that buffers data received on the socket
+
+    .. attribute:: state
+
+        Current state. State can be:
+
+        * :data:`~pyjulius.core.CONNECTED`
+        * :data:`~pyjulius.core.DISCONNECTED`
+
+    """
+    def __init__(self, host='localhost', port=10500, encoding='utf-8', modelize=True, nbest=False, maxsize=0, policy=BLOCK,
+                 allow=None, deny=(), map=None):
+        asyncore.dispatcher.__init__(self, map=map)
+        BaseClient.__init__(self, encoding, modelize, nbest, maxsize, policy, allow, deny)
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.state = DISCONNECTED
+        self._commands = collections.deque()
+        self._output = b''
+
+    def __iter__(self):
+        """Iterate over the results received so far without blocking"""
+        while 1:
+            try:
+                yield self.results.get_nowait()
+            except queue.Empty:
+                return
+
+    def connect(self):
+        """Start connecting to the server, the connection is established by the :mod:`asyncore` loop
+
+        :raise ConnectionError: If socket cannot start a connection
+
+        """
+        logger.info(u'Connecting %s:%d' % (self.host, self.port))
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.reader = BlockReader(self.socket)
+        try:
+            asyncore.dispatcher.connect(self, (self.host, self.port))
+        except socket.error:
+            self.close()
+            raise ConnectionError()
+
+    def disconnect(self):
+        """Disconnect from the server"""
+        logger.info(u'Disconnecting')
+        self.close()
+
+    def send(self, command):
+        """Queue a command to be sent to the server by the :mod:`asyncore` loop. This can be called from any thread
+
+        :param string command: command to send
+
+        """
+        self._send([command])
+
+    def _sendall(self, commands):
+        for command in commands:
+            logger.info('Sending %s', command)
+            self._commands.append(to_bytes(command, self.encoding) + b'\n')
+
+    def handle_result(self, result):
+        """Called for every result received, dispatches it to the subscribers or puts it in :attr:`~pyjulius.core.BaseClient.results`.
+        Override to process results directly
+
+        :param result: raw xml :class:`~xml.etree.ElementTree.Element` or :mod:`~pyjulius.models` (if :attr:`~pyjulius.core.BaseClient.modelize`),
+            wrapped in a :class:`~pyjulius.results.TimedResult` if the results are timed, see :meth:`~pyjulius.core.BaseClient.track`
+
+        """
+        self._deliver(result)
+
+    # asyncore.dispatcher interface
+    def writable(self):
+        return not self.connected or bool(self._output or self._commands)
+
+    def handle_connect(self):
+        error = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            raise socket.error(error, os.strerror(error))
+        logger.info(u'Connected %s:%d' % (self.host, self.port))
+        self.state = CONNECTED
+
+    def handle_read(self):
+        received = self.reader.fill()
+        if not received:
+            self.handle_close()
+            return
+        if self._stats is not None:
+            self._stats.count('bytes', received)
+
+        # Disconnect on invalid XML
+        if not self._process_blocks(self.handle_result):
+            self.handle_close()
+
+    def handle_write(self):
+        while self._commands:
+            self._output += self._commands.popleft()
+        if not self._output:
+            return
+        try:
+            sent = self.socket.send(self._output)
+        except socket.error as e:
+            if e.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return
+            raise
+        self._output = self._output[sent:]
+
+    def handle_close(self):
+        logger.info(u'Connection closed %s:%d' % (self.host, self.port))
+        self.close()
+
+    def handle_error(self):
+        logger.exception(u'Error on %s:%d' % (self.host, self.port))
+        self.close()
+
+    def close(self):
+        asyncore.dispatcher.close(self)
+        self.state = DISCONNECTED
+        self._fail_pending(ConnectionError())
@@ -15,7 +15,7 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
-__all__ = ['Error', 'ConnectionError', 'SendTimeoutError']
+__all__ = ['Error', 'ConnectionError', 'SendTimeoutError', 'ResponseTimeoutError']
 
 
 class Error(Exception):
@@ -28,3 +28,7 @@ class ConnectionError(Error):
 
 class SendTimeoutError(Error):
     """Raised when could not send the command (timeout)"""
+
+
+class ResponseTimeoutError(Error):
+    """Raised when the response to a command was not received in time"""
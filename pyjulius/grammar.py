@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import native, to_bytes
+import collections
+import hashlib
+import logging
+import threading
+
+
+__all__ = ['Grammar', 'GrammarManager']
+logger = logging.getLogger(__name__)
+
+
+class Grammar(object):
+    """A julius grammar made of a DFA and a dictionary, as produced by julius' *mkdfa.pl*
+
+    :param string name: name of the grammar
+    :param string dfa: content of the *.dfa* file
+    :param string dict: content of the *.dict* file
+
+    .. attribute:: name
+
+        Name of the grammar
+
+    .. attribute:: dfa
+
+        Content of the *.dfa* file
+
+    .. attribute:: dict
+
+        Content of the *.dict* file
+
+    .. attribute:: digest
+
+        Hash of the content of the grammar
+
+    """
+    def __init__(self, name, dfa, dict):
+        self.name = name
+        self.dfa = dfa
+        self.dict = dict
+        self.digest = hashlib.sha1(to_bytes(dfa) + b'\0' + to_bytes(dict)).hexdigest()
+
+    @classmethod
+    def from_files(cls, name, prefix):
+        """Constructor from the *prefix.dfa* and *prefix.dict* files
+
+        :param string name: name of the grammar
+        :param string prefix: path of the files without extension
+
+        """
+        with open(prefix + '.dfa', 'rb') as f:
+            dfa = f.read()
+        with open(prefix + '.dict', 'rb') as f:
+            dict = f.read()
+        return cls(name, dfa, dict)
+
+    def command(self, name, encoding='utf-8'):
+        """Build the module command to send the grammar
+
+        :param string name: name of the command, *ADDGRAM* or *CHANGEGRAM*
+        :param string encoding: encoding of the content
+        :return: the command as a native string
+        :rtype: string
+
+        """
+        return '%s %s\n%s\nDFAEND\n%s\nDICEND' % (name, native(self.name, encoding),
+                                                  native(self.dfa, encoding).rstrip('\n'),
+                                                  native(self.dict, encoding).rstrip('\n'))
+
+    def __repr__(self):
+        return "<Grammar(%s, %s)>" % (self.name, self.digest[:8])
+
+
+def grammars_command(name, grammars):
+    """Build a module command that applies to many grammars, such as *DELGRAM* or *ACTIVATEGRAM*
+
+    Julius reads the names or ids of the grammars from the line that follows the command.
+
+    :param string name: name of the command
+    :param grammars: names or ids of the grammars
+    :type grammars: list of string
+    :return: the command as a native string
+    :rtype: string
+
+    """
+    return '%s\n%s' % (name, ' '.join(str(g) for g in grammars))
+
+
+class GrammarManager(object):
+    """Manage the grammars of a julius module server through a client
+
+    The manager remembers the content of the grammars the server accepted so that loading an
+    unchanged grammar again sends nothing. Commands are sent in batches with
+    :meth:`~pyjulius.core.BaseClient.calls` and a grammar is considered loaded once the server
+    answered its commands without an error: a grammar the server rejected, or whose commands were
+    lost with the connection, is sent again by the next :meth:`load`.
+
+    The manager loads its grammars again when a :class:`~pyjulius.core.Client` reconnects, see
+    :meth:`reload`, instead of the :attr:`~pyjulius.core.Client.replay` commands of the client.
+
+    :param client: the client, connected to the server
+    :type client: :class:`~pyjulius.core.BaseClient`
+
+    .. attribute:: client
+
+        The client
+
+    .. attribute:: loaded
+
+        Digest of the grammars loaded on the server, by name
+
+    """
+    def __init__(self, client):
+        self.client = client
+        self.loaded = {}
+        self._commands = collections.OrderedDict()
+        self._sent = {}
+        self._lock = threading.Lock()
+        if hasattr(client, 'grammars'):
+            client.grammars = self
+
+    def load(self, grammars):
+        """Add the grammars that are not loaded on the server with the same content, replacing the others
+
+        :param grammars: the grammars
+        :type grammars: list of :class:`Grammar`
+        :return: the responses of the commands sent
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        with self._lock:
+            known = dict(self.loaded)
+            known.update(self._sent)
+        changed = [g for g in grammars if known.get(g.name) != g.digest]
+        replaced = [g.name for g in changed if g.name in known]
+        commands = []
+        if replaced:
+            commands.append(grammars_command('DELGRAM', replaced))
+        commands.extend(g.command('ADDGRAM', self.client.encoding) for g in changed)
+        logger.info(u'Loading %d grammars, %d already loaded' % (len(changed), len(grammars) - len(changed)))
+        responses = self._send(commands)
+        for grammar, response in zip(changed, responses[len(commands) - len(changed):]):
+            self._confirm([response], grammar.name, grammar.digest, [response.command])
+        return responses
+
+    def change(self, grammars):
+        """Replace all the grammars of the server, unless they are already the only ones loaded
+
+        :param grammars: the grammars
+        :type grammars: list of :class:`Grammar`
+        :return: the responses of the commands sent
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        if self.loaded == dict((g.name, g.digest) for g in grammars):
+            return []
+        commands = [g.command('CHANGEGRAM' if i == 0 else 'ADDGRAM', self.client.encoding) for i, g in enumerate(grammars)]
+        responses = self._send(commands)
+        with self._lock:
+            self.loaded.clear()
+            self._commands.clear()
+            self._sent.clear()
+        for grammar, response in zip(grammars, responses):
+            self._confirm([response], grammar.name, grammar.digest, [grammar.command('ADDGRAM', self.client.encoding)])
+        return responses
+
+    def remove(self, names):
+        """Delete grammars from the server
+
+        :param names: names of the grammars
+        :type names: list of string
+        :return: the responses of the commands sent
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        responses = self._send([grammars_command('DELGRAM', names)] if names else [])
+        for name in names:
+            self.forget(name)
+        return responses
+
+    def switch(self, activate=(), deactivate=()):
+        """Activate and deactivate many grammars in a single batch
+
+        :param activate: names of the grammars to activate
+        :type activate: list of string
+        :param deactivate: names of the grammars to deactivate
+        :type deactivate: list of string
+        :return: the responses of the commands sent
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        commands = []
+        if deactivate:
+            commands.append(grammars_command('DEACTIVATEGRAM', deactivate))
+        if activate:
+            commands.append(grammars_command('ACTIVATEGRAM', activate))
+        return self._send(commands)
+
+    def add_words(self, name, dict):
+        """Add words to a grammar of the server
+
+        The grammar no longer has the content it was loaded with, so the next :meth:`load` of that content
+        replaces it.
+
+        :param string name: name of the grammar
+        :param string dict: the words, in the format of a *.dict* file
+        :return: the response of the command
+        :rtype: :class:`~pyjulius.results.Response`
+
+        """
+        encoding = self.client.encoding
+        command = 'ADDWORD\n%s\n%s\nDICEND' % (native(name, encoding), native(dict, encoding).rstrip('\n'))
+        with self._lock:
+            digest = self.loaded.get(name)
+            commands = self._commands.get(name, [])
+        response = self._send([command])[0]
+        if digest is not None:
+            digest = hashlib.sha1(to_bytes(digest) + b'\0' + to_bytes(dict)).hexdigest()
+            self._confirm([response], name, digest, commands + [command])
+        return response
+
+    def reload(self):
+        """Load the grammars again, for instance once the client reconnected
+
+        The grammars are deleted before they are added so that they are loaded once whether the server
+        kept them or not.
+
+        :return: the responses of the commands sent
+        :rtype: list of :class:`~pyjulius.results.Response`
+
+        """
+        with self._lock:
+            loaded = dict(self.loaded)
+            grammars = collections.OrderedDict(self._commands)
+        if not grammars:
+            return []
+        commands = [grammars_command('DELGRAM', list(grammars))]
+        for grammar in grammars.values():
+            commands.extend(grammar)
+        logger.info(u'Reloading %d grammars' % len(grammars))
+        try:
+            responses = self._send(commands)
+        except Exception:
+            with self._lock:
+                self.loaded.update(loaded)
+                self._commands.update(grammars)
+            raise
+        index = 1
+        for name, grammar in grammars.items():
+            self._confirm(responses[index:index + len(grammar)], name, loaded[name], grammar)
+            index += len(grammar)
+        return responses
+
+    def forget(self, name):
+        """Forget that a grammar is loaded so that it is sent again by the next :meth:`load`
+
+        :param string name: name of the grammar
+
+        """
+        with self._lock:
+            self.loaded.pop(name, None)
+            self._commands.pop(name, None)
+            self._sent.pop(name, None)
+
+    def invalidate(self):
+        """Forget all the loaded grammars, for instance when the server was restarted"""
+        with self._lock:
+            self.loaded.clear()
+            self._commands.clear()
+            self._sent.clear()
+
+    def _confirm(self, responses, name, digest, commands):
+        """Mark a grammar as loaded once the server accepted all the commands sent to load it, forget it otherwise
+
+        :param responses: responses of the commands
+        :type responses: list of :class:`~pyjulius.results.Response`
+        :param string name: name of the grammar
+        :param string digest: digest of the content of the grammar
+        :param commands: commands that load the grammar
+        :type commands: list of string
+
+        """
+        with self._lock:
+            self._sent[name] = digest
+
+        def done(response):
+            with self._lock:
+                if self._sent.get(name) == digest:
+                    del self._sent[name]
+                if all(self._accepted(r) for r in responses):
+                    self.loaded[name] = digest
+                    self._commands[name] = commands
+                else:
+                    self.loaded.pop(name, None)
+                    self._commands.pop(name, None)
+        responses[-1].add_done_callback(done)
+
+    def _accepted(self, response):
+        try:
+            result = response.result(0)
+        except Exception:
+            return False
+        return result is not None and result.get('STATUS') != 'ERROR'
+
+    def _send(self, commands):
+        if not commands:
+            return []
+        return self.client.calls(commands)
@@ -15,9 +15,84 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
-__all__ = ['Sentence', 'Word']
+from array import array
+from pyjulius.compat import range, text_type, unicode_compatible
+from pyjulius.results import TimedResult
+import time
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
+__all__ = ['Sentence', 'PartialSentence', 'Word', 'SentenceBatch', 'SentenceView', 'Recognition', 'Hypothesis', 'HypothesisWord', 'Utterance']
+
+
+#: Sentence delimiters
+DELIMITERS = ['<s>', '</s>']
+
+
+def decode(value, encoding='utf-8'):
+    """Decode a value read from an xml attribute
+
+    :param string value: the value
+    :param string encoding: encoding of the value if it is not already unicode
+    :rtype: unicode
+
+    """
+    if isinstance(value, text_type):
+        return value
+    return value.decode(encoding)
+
+
+class xmlattribute(object):
+    """Descriptor that converts an attribute of the xml element of a model on first access
+
+    The converted value is cached in the slot named after the attribute prefixed with ``_``.
+    The value is ``None`` if the attribute is missing.
+
+    :param string name: name of the xml attribute
+    :param convert: function to convert the value with, called with the value and the encoding of the model
+
+    """
+    def __init__(self, name, convert=decode):
+        self.name = name
+        self.slot = '_' + name.lower()
+        self.convert = convert
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            value = obj._xml.get(self.name)
+            if value is not None:
+                value = self.convert(value, obj._encoding)
+            setattr(obj, self.slot, value)
+            return value
+
+
+def _numpy(values, dtype):
+    """Copy an :class:`~array.array` in a :class:`numpy.ndarray`
+
+    The array is copied rather than viewed so that it can still be extended.
+
+    """
+    if not values:
+        return numpy.zeros(0, dtype)
+    return numpy.frombuffer(values, dtype).copy()
+
+
+def _float(value, encoding):
+    return float(value)
+
+
+def _int(value, encoding):
+    return int(value)
+
+
+@unicode_compatible
 class Sentence(object):
     """A recognized sentence
 
@@ -33,7 +108,19 @@ class Sentence(object):
 
         Score of the sentence
 
+    .. attribute:: tag
+
+        Tag of the xml element the sentence comes from
+
+    .. attribute:: final
+
+        Whether the sentence is the final result of the recognition, ``False`` for a :class:`PartialSentence`
+
     """
+    __slots__ = ('words', 'score')
+    tag = 'RECOGOUT'
+    final = True
+
     def __init__(self, words, score=0):
         self.words = words
         self.score = score
@@ -47,14 +134,14 @@ class Sentence(object):
 
         """
         score = float(xml.get('SCORE'))
-        words = [Word.from_whypo(w_xml, encoding) for w_xml in xml.findall('WHYPO') if w_xml.get('WORD') not in ['<s>', '</s>']]
+        words = [Word.from_whypo(w_xml, encoding) for w_xml in xml.findall('WHYPO') if w_xml.get('WORD') not in DELIMITERS]
         return cls(words, score)
 
     def __repr__(self):
         return "<Sentence(%.2f, %r)>" % (self.score, self.words)
 
     def __unicode__(self):
-        return u' '.join([unicode(w) for w in self.words])
+        return u' '.join([text_type(w) for w in self.words])
 
     def __str__(self):
         return str(self.__unicode__())
@@ -63,6 +150,60 @@ class Sentence(object):
         return len(self.words)
 
 
+class PartialSentence(Sentence):
+    """An interim :class:`Sentence` of the first pass, from julius' progressive output (*-progout* option)
+
+    Julius outputs the best hypothesis so far many times while the speech goes on, in *RECOGOUT* blocks made
+    of a *PHYPO* element. Words of a partial sentence have no confidence.
+
+    :param words: words in the sentence
+    :type words: list of :class:`~pyjulius.core.Word`
+    :param integer score: score of the sentence
+    :param integer frame: number of frames processed so far
+    :param integer time: time given by julius
+
+    .. attribute:: frame
+
+        Number of frames processed so far
+
+    .. attribute:: time
+
+        Time given by julius
+
+    .. attribute:: tag
+
+        ``PARTIAL``, so that partial sentences are not mistaken for a *RECOGOUT* result
+
+    """
+    __slots__ = ('frame', 'time')
+    tag = 'PARTIAL'
+    final = False
+
+    def __init__(self, words, score=0, frame=None, time=None):
+        super(PartialSentence, self).__init__(words, score)
+        self.frame = frame
+        self.time = time
+
+    @classmethod
+    def from_phypo(cls, xml, encoding='utf-8'):
+        """Constructor from xml element *PHYPO*
+
+        :param xml.etree.ElementTree xml: the xml *PHYPO* element
+        :param string encoding: encoding of the xml
+
+        """
+        score = float(xml.get('SCORE'))
+        words = [Word(decode(w_xml.get('WORD'), encoding), float(w_xml.get('CM', 0.0))) for w_xml in xml.findall('WHYPO')
+                 if w_xml.get('WORD') not in DELIMITERS]
+        frame = xml.get('FRAME')
+        time = xml.get('TIME')
+        return cls(words, score, int(frame) if frame is not None else None, int(time) if time is not None else None)
+
+    def __repr__(self):
+        return "<PartialSentence(%.2f, %r)>" % (self.score, self.words)
+
+
+@unicode_compatible
 class Word(object):
     """A word within a :class:`~pyjulius.core.Sentence`
 
@@ -78,6 +219,8 @@ class Word(object):
         Confidence of the recognized word
 
     """
+    __slots__ = ('word', 'confidence')
+
     def __init__(self, word, confidence=0.0):
         self.word = word
         self.confidence = confidence
@@ -90,7 +233,7 @@ class Word(object):
         :param string encoding: encoding of the xml
 
         """
-        word = unicode(xml.get('WORD'), encoding)
+        word = decode(xml.get('WORD'), encoding)
         confidence = float(xml.get('CM'))
         return cls(word, confidence)
 
@@ -102,3 +245,549 @@ class Word(object):
 
     def __len__(self):
         return len(self.word)
+
+
+class SentenceBatch(object):
+    """Columnar storage for many :class:`Sentence`
+
+    Scores, words, confidences and timestamps of all the sentences are stored in contiguous
+    :class:`~array.array` and words are interned in a vocabulary, which is much more compact
+    than keeping :class:`Sentence` and :class:`Word` objects around. Items of the batch are
+    :class:`SentenceView` that read the arrays without copying them.
+
+    Sentences can be filtered and ranked on the whole batch at once, with :mod:`numpy` if it is
+    installed, and only the selected ones turned back into :class:`Sentence` with :meth:`select`::
+
+        batch = SentenceBatch.from_results(client.results.drain())
+        sentences = batch.select(batch.top(5, batch.filter(min_confidence=0.5)))
+
+    Raw *RECOGOUT* blocks, such as those of a :class:`~pyjulius.recording.Recording`, are added with
+    :func:`~pyjulius.parser.parse_batch` without building any :class:`Sentence`.
+
+    Per-sentence values and indexes are :class:`numpy.ndarray` if :mod:`numpy` is installed, :class:`~array.array`
+    and :class:`list` otherwise. Confidences of sentences without words are *NaN*.
+
+    :param sentences: initial sentences
+    :type sentences: iterable of :class:`Sentence`
+
+    .. attribute:: scores
+
+        Score of each sentence
+
+    .. attribute:: timestamps
+
+        Timestamp of each sentence
+
+    .. attribute:: offsets
+
+        Index of the first word of each sentence in :attr:`words`, followed by the total number of words
+
+    .. attribute:: words
+
+        Index of each word in :attr:`vocabulary`
+
+    .. attribute:: confidences
+
+        Confidence of each word
+
+    .. attribute:: vocabulary
+
+        Distinct words
+
+    """
+    def __init__(self, sentences=()):
+        self.scores = array('d')
+        self.timestamps = array('d')
+        self.offsets = array('l', [0])
+        self.words = array('l')
+        self.confidences = array('d')
+        self.vocabulary = []
+        self._indexes = {}
+        self.extend(sentences)
+
+    def append(self, sentence, timestamp=None):
+        """Add a sentence to the batch
+
+        :param sentence: the sentence
+        :type sentence: :class:`Sentence`
+        :param float timestamp: timestamp of the sentence, defaults to now
+
+        """
+        self.append_words([(word.word, word.confidence) for word in sentence.words], sentence.score, timestamp)
+
+    def append_words(self, words, score, timestamp=None):
+        """Add a sentence to the batch from its words, without a :class:`Sentence`
+
+        :param words: the ``(word, confidence)`` of the sentence
+        :type words: iterable of tuple
+        :param float score: score of the sentence
+        :param float timestamp: timestamp of the sentence, defaults to now
+
+        """
+        for word, confidence in words:
+            index = self._indexes.get(word)
+            if index is None:
+                index = self._indexes[word] = len(self.vocabulary)
+                self.vocabulary.append(word)
+            self.words.append(index)
+            self.confidences.append(confidence)
+        self.offsets.append(len(self.words))
+        self.scores.append(score)
+        self.timestamps.append(time.time() if timestamp is None else timestamp)
+
+    def extend(self, sentences):
+        """Add many sentences to the batch
+
+        :param sentences: the sentences
+        :type sentences: iterable of :class:`Sentence`
+
+        """
+        for sentence in sentences:
+            self.append(sentence)
+
+    @classmethod
+    def from_results(cls, results):
+        """Constructor from results of a client, such as those drained with
+        :meth:`ResultQueue.drain <pyjulius.results.ResultQueue.drain>`
+
+        :class:`Sentence` are added to the batch as well as the best hypothesis of :class:`Recognition`,
+        other results, :class:`PartialSentence` included, are ignored. Results are unwrapped from their
+        :class:`~pyjulius.results.TimedResult` if the client tracks latencies.
+
+        :param results: the results
+        :rtype: :class:`SentenceBatch`
+
+        """
+        batch = cls()
+        for result in results:
+            if isinstance(result, TimedResult):
+                result = result.result
+            if isinstance(result, Recognition):
+                result = result.best
+            if isinstance(result, Sentence) and result.final:
+                batch.append(result)
+        return batch
+
+    def _reduce(self, ufunc, identity, function):
+        """Reduce the confidences of the words of each sentence
+
+        :param ufunc: :mod:`numpy` ufunc to reduce with
+        :param float identity: value that does not change the reduction
+        :param function: function to reduce with when :mod:`numpy` is not installed, called with the confidences of a sentence
+        :return: value for each sentence, *NaN* for sentences without words
+
+        """
+        if numpy is None:
+            values = array('d')
+            offsets, confidences = self.offsets, self.confidences
+            for index in range(len(self)):
+                start, end = offsets[index], offsets[index + 1]
+                values.append(function(confidences[start:end]) if end > start else float('nan'))
+            return values
+        if not len(self):
+            return numpy.zeros(0, 'd')
+        # the identity lets the last sentences end after the last word
+        confidences = numpy.append(_numpy(self.confidences, 'd'), identity)
+        offsets = _numpy(self.offsets, 'l')
+        values = ufunc.reduceat(confidences, offsets[:-1])
+        values[offsets[1:] == offsets[:-1]] = numpy.nan
+        return values
+
+    def mean_confidences(self):
+        """Mean confidence of the words of each sentence"""
+        if numpy is None:
+            return self._reduce(None, None, lambda confidences: sum(confidences) / len(confidences))
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return self._reduce(numpy.add, 0.0, None) / numpy.diff(_numpy(self.offsets, 'l'))
+
+    def min_confidences(self):
+        """Minimum confidence of the words of each sentence"""
+        if numpy is None:
+            return self._reduce(None, None, min)
+        return self._reduce(numpy.minimum, numpy.inf, None)
+
+    def filter(self, min_score=None, min_confidence=None, mean_confidence=None):
+        """Indexes of the sentences that pass all the given thresholds
+
+        :param float min_score: minimum score of the sentence
+        :param float min_confidence: minimum confidence of every word of the sentence
+        :param float mean_confidence: minimum mean confidence of the words of the sentence
+        :return: the indexes, in order
+
+        """
+        thresholds = []
+        if min_score is not None:
+            thresholds.append((self.scores, min_score))
+        if min_confidence is not None:
+            thresholds.append((self.min_confidences(), min_confidence))
+        if mean_confidence is not None:
+            thresholds.append((self.mean_confidences(), mean_confidence))
+        if numpy is None:
+            return [index for index in range(len(self)) if all(values[index] >= threshold for values, threshold in thresholds)]
+        keep = numpy.ones(len(self), bool)
+        with numpy.errstate(invalid='ignore'):
+            for values, threshold in thresholds:
+                if not isinstance(values, numpy.ndarray):
+                    values = _numpy(values, 'd')
+                keep &= values >= threshold
+        return numpy.flatnonzero(keep)
+
+    def top(self, k, indexes=None):
+        """Indexes of the *k* sentences with the best score, best first. Sentences with the same score keep their order
+
+        :param integer k: number of sentences
+        :param indexes: indexes of the sentences to choose from, e.g. returned by :meth:`filter`, ``None`` for all
+        :return: the indexes
+
+        """
+        if numpy is None:
+            if indexes is None:
+                indexes = range(len(self))
+            return sorted(indexes, key=lambda index: -self.scores[index])[:k]
+        scores = _numpy(self.scores, 'd')
+        if indexes is None:
+            return numpy.argsort(-scores, kind='mergesort')[:k]
+        indexes = numpy.asarray(indexes, 'l')
+        return indexes[numpy.argsort(-scores[indexes], kind='mergesort')[:k]]
+
+    def select(self, indexes):
+        """Build the :class:`Sentence` and its :class:`Word` for the given sentences
+
+        :param indexes: indexes of the sentences, e.g. returned by :meth:`filter` or :meth:`top`
+        :rtype: list of :class:`Sentence`
+
+        """
+        vocabulary, words, confidences, offsets = self.vocabulary, self.words, self.confidences, self.offsets
+        sentences = []
+        for index in indexes:
+            index = int(index)
+            sentence = Sentence([Word(vocabulary[words[i]], confidences[i]) for i in range(offsets[index], offsets[index + 1])],
+                                self.scores[index])
+            sentences.append(sentence)
+        return sentences
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SentenceBatch index out of range')
+        return SentenceView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield SentenceView(self, index)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __repr__(self):
+        return "<SentenceBatch(%d sentences, %d words)>" % (len(self), len(self.words))
+
+
+class SentenceView(Sentence):
+    """A :class:`Sentence` stored in a :class:`SentenceBatch`
+
+    Attributes are read from the batch when accessed and :class:`Word` objects are created on demand.
+
+    .. attribute:: batch
+
+        The batch the sentence is stored in
+
+    .. attribute:: index
+
+        Index of the sentence in the batch
+
+    """
+    __slots__ = ('batch', 'index')
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def words(self):
+        batch = self.batch
+        start, end = batch.offsets[self.index], batch.offsets[self.index + 1]
+        return [Word(batch.vocabulary[batch.words[i]], batch.confidences[i]) for i in range(start, end)]
+
+    @property
+    def score(self):
+        return self.batch.scores[self.index]
+
+    @property
+    def timestamp(self):
+        """Timestamp of the sentence"""
+        return self.batch.timestamps[self.index]
+
+    def __len__(self):
+        return self.batch.offsets[self.index + 1] - self.batch.offsets[self.index]
+
+
+@unicode_compatible
+class Recognition(object):
+    """All the hypotheses of a recognition, from the xml element *RECOGOUT*
+
+    Hypotheses and their attributes are decoded on first access so that using only the best
+    hypothesis costs little more than a :class:`Sentence`.
+
+    :param xml.etree.ElementTree xml: the xml *RECOGOUT* element
+    :param string encoding: encoding of the xml
+
+    .. attribute:: hypotheses
+
+        The N-best :class:`Hypothesis`, best first
+
+    .. attribute:: best
+
+        The best :class:`Hypothesis`, ``None`` if there is none
+
+    .. attribute:: tag
+
+        Tag of the xml element the recognition comes from
+
+    .. attribute:: final
+
+        Whether the recognition is final, always ``True``
+
+    """
+    __slots__ = ('_xml', '_encoding', '_hypotheses', '_best')
+    tag = 'RECOGOUT'
+    final = True
+
+    def __init__(self, xml, encoding='utf-8'):
+        self._xml = xml
+        self._encoding = encoding
+
+    @classmethod
+    def from_recogout(cls, xml, encoding='utf-8'):
+        """Constructor from xml element *RECOGOUT*
+
+        :param xml.etree.ElementTree xml: the xml *RECOGOUT* element
+        :param string encoding: encoding of the xml
+
+        """
+        return cls(xml, encoding)
+
+    @property
+    def hypotheses(self):
+        try:
+            return self._hypotheses
+        except AttributeError:
+            shypos = self._xml.findall('SHYPO')
+            hypotheses = [Hypothesis(shypo, self._encoding) for shypo in shypos[1:]]
+            if shypos:
+                hypotheses.insert(0, self.best)
+            self._hypotheses = hypotheses
+            return hypotheses
+
+    @property
+    def best(self):
+        try:
+            return self._best
+        except AttributeError:
+            shypo = self._xml.find('SHYPO')
+            self._best = Hypothesis(shypo, self._encoding) if shypo is not None else None
+            return self._best
+
+    def __repr__(self):
+        return "<Recognition(%r)>" % self.hypotheses
+
+    def __unicode__(self):
+        best = self.best
+        return text_type(best) if best is not None else u''
+
+    def __str__(self):
+        return str(self.__unicode__())
+
+    def __iter__(self):
+        return iter(self.hypotheses)
+
+    def __getitem__(self, index):
+        return self.hypotheses[index]
+
+    def __len__(self):
+        return len(self.hypotheses)
+
+
+class Hypothesis(Sentence):
+    """A :class:`Sentence` from the xml element *SHYPO* with all its attributes, decoded on first access
+
+    :param xml.etree.ElementTree xml: the xml *SHYPO* element
+    :param string encoding: encoding of the xml
+
+    .. attribute:: words
+
+        :class:`HypothesisWord` that constitute the sentence, sentence delimiters excluded
+
+    .. attribute:: score
+
+        Score of the sentence
+
+    .. attribute:: rank
+
+        Rank of the hypothesis in the N-best list
+
+    .. attribute:: gram
+
+        Id of the grammar the hypothesis belongs to
+
+    .. attribute:: amscore
+
+        Acoustic model score, with julius' *-separatescore* option
+
+    .. attribute:: lmscore
+
+        Language model score, with julius' *-separatescore* option
+
+    """
+    __slots__ = ('_xml', '_encoding', '_words', '_score', '_rank', '_gram', '_amscore', '_lmscore')
+
+    score = xmlattribute('SCORE', _float)
+    rank = xmlattribute('RANK', _int)
+    gram = xmlattribute('GRAM', _int)
+    amscore = xmlattribute('AMSCORE', _float)
+    lmscore = xmlattribute('LMSCORE', _float)
+
+    def __init__(self, xml, encoding='utf-8'):
+        self._xml = xml
+        self._encoding = encoding
+
+    @classmethod
+    def from_shypo(cls, xml, encoding='utf-8'):
+        return cls(xml, encoding)
+
+    @property
+    def words(self):
+        try:
+            return self._words
+        except AttributeError:
+            self._words = [HypothesisWord(whypo, self._encoding) for whypo in self._xml.findall('WHYPO')
+                           if whypo.get('WORD') not in DELIMITERS]
+            return self._words
+
+
+class HypothesisWord(Word):
+    """A :class:`Word` from the xml element *WHYPO* with all its attributes, decoded on first access
+
+    :param xml.etree.ElementTree xml: the xml *WHYPO* element
+    :param string encoding: encoding of the xml
+
+    .. attribute:: word
+
+        Recognized word
+
+    .. attribute:: confidence
+
+        Confidence of the recognized word
+
+    .. attribute:: classid
+
+        Class of the word in the grammar or language model
+
+    .. attribute:: phone
+
+        Phoneme sequence of the word
+
+    .. attribute:: begin
+
+        First frame of the word, with julius' word alignment output
+
+    .. attribute:: end
+
+        Last frame of the word, with julius' word alignment output
+
+    """
+    __slots__ = ('_xml', '_encoding', '_word', '_cm', '_classid', '_phone', '_beginframe', '_endframe')
+
+    word = xmlattribute('WORD')
+    confidence = xmlattribute('CM', _float)
+    classid = xmlattribute('CLASSID')
+    phone = xmlattribute('PHONE')
+    begin = xmlattribute('BEGINFRAME', _int)
+    end = xmlattribute('ENDFRAME', _int)
+
+    def __init__(self, xml, encoding='utf-8'):
+        self._xml = xml
+        self._encoding = encoding
+
+    @classmethod
+    def from_whypo(cls, xml, encoding='utf-8'):
+        return cls(xml, encoding)
+
+
+class Utterance(object):
+    """An utterance, from the beginning of the speech to its recognition
+
+    Julius describes an utterance with many blocks: *INPUT* when the speech starts and ends, *STARTRECOG*
+    and *ENDRECOG* around the recognition, *INPUTPARAM* and finally *RECOGOUT*, or *RECOGFAIL* and *REJECTED*
+    when nothing is recognized. See :class:`~pyjulius.correlation.Correlator`.
+
+    .. attribute:: start
+
+        Time at which julius detected the beginning of the speech, from the *INPUT* block, in seconds since the epoch
+
+    .. attribute:: end
+
+        Time at which julius detected the end of the speech, from the *INPUT* block, in seconds since the epoch
+
+    .. attribute:: frames
+
+        Number of input frames, from the *INPUTPARAM* block
+
+    .. attribute:: msec
+
+        Length of the input, in milliseconds, from the *INPUTPARAM* block
+
+    .. attribute:: started
+
+        Time at which the *STARTRECOG* block was received, from :func:`~pyjulius.stats.clock`
+
+    .. attribute:: ended
+
+        Time at which the *ENDRECOG* block was received, from :func:`~pyjulius.stats.clock`
+
+    .. attribute:: completed
+
+        Time at which the block that completed the utterance was received, from :func:`~pyjulius.stats.clock`
+
+    .. attribute:: status
+
+        Tag of the block that completed the utterance: ``RECOGOUT``, ``RECOGFAIL`` or ``REJECTED``
+
+    .. attribute:: reason
+
+        Reason of the rejection of the input, for a ``REJECTED`` utterance
+
+    .. attribute:: result
+
+        Result of the recognition, a :class:`Sentence`, a :class:`Recognition` or the raw xml, ``None`` if nothing
+        was recognized
+
+    .. attribute:: tag
+
+        Tag of the utterances, to :meth:`~pyjulius.core.BaseClient.subscribe` to them
+
+    """
+    __slots__ = ('start', 'end', 'frames', 'msec', 'started', 'ended', 'completed', 'status', 'reason', 'result')
+    tag = 'UTTERANCE'
+
+    def __init__(self):
+        self.start = self.end = None
+        self.frames = self.msec = None
+        self.started = self.ended = self.completed = None
+        self.status = self.reason = self.result = None
+
+    @property
+    def recognized(self):
+        """Whether the recognition succeeded"""
+        return self.status == 'RECOGOUT'
+
+    @property
+    def delay(self):
+        """Delay between the end of the recognition and its result, in seconds, ``None`` if unknown"""
+        if self.ended is None or self.completed is None:
+            return None
+        return self.completed - self.ended
+
+    def __repr__(self):
+        return "<Utterance(%s, %r, %r)>" % (self.status, self.msec, self.result)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import PY2
+from pyjulius.models import DELIMITERS as SENTENCE_DELIMITERS, PartialSentence, Sentence, SentenceBatch, Word
+from xml.etree.ElementTree import XML, ParseError, TreeBuilder, XMLParser
+import re
+
+
+__all__ = ['escape', 'sniff', 'scan_recogout', 'parse_recogout', 'parse_batch', 'StreamParser']
+
+
+#: Sentence delimiters that julius does not escape in its xml output
+DELIMITERS = re.compile(r'<(/?)s>')
+
+#: Sentence delimiters in raw output
+RAW_DELIMITERS = re.compile(br'<(/?)s>')
+
+#: Start of an xml element in raw output
+START_TAG = re.compile(br'\s*<([^\s/>]+)')
+
+#: Attribute of an xml element
+ATTRIBUTE = re.compile(r'([A-Z]+)="([^"]*)"')
+
+#: Best hypothesis, or interim hypothesis of the progressive output, of a *RECOGOUT* block made only of *WHYPO* elements
+RECOGOUT_SHYPO = re.compile(r'\s*<RECOGOUT>\s*<([SP]HYPO)((?:\s+[A-Z]+="[^"]*")*)\s*>((?:\s*<WHYPO(?:\s+[A-Z]+="[^"]*")*\s*/>)*)\s*</\1>')
+
+#: *WHYPO* element
+WHYPO = re.compile(r'<WHYPO((?:\s+[A-Z]+="[^"]*")*)\s*/>')
+
+
+def escape(data):
+    """Escape the ``<s>`` and ``</s>`` sentence delimiters in raw julius output so it can be parsed as xml
+
+    :param data: raw or decoded output
+    :type data: bytes or unicode
+    :return: the escaped output
+    :rtype: string
+
+    """
+    if isinstance(data, bytes):
+        if b'<s>' not in data and b'</s>' not in data:
+            return data
+        return RAW_DELIMITERS.sub(br'&lt;\1s&gt;', data)
+    if u'<s>' not in data and u'</s>' not in data:
+        return data
+    return DELIMITERS.sub(r'&lt;\1s&gt;', data)
+
+
+def sniff(block):
+    """Find the tag of the root element of a block without parsing it
+
+    :param bytes block: the raw block
+    :return: the tag or ``None`` if the block does not start with an element
+    :rtype: string
+
+    """
+    match = START_TAG.match(block)
+    if match is None:
+        return None
+    if PY2:
+        return match.group(1)
+    return match.group(1).decode('ascii', 'replace')
+
+
+def scan_recogout(block, encoding='utf-8'):
+    """Read the best hypothesis, or interim hypothesis of the progressive output, of a raw *RECOGOUT* block
+    as plain values without building an xml tree nor any model
+
+    Only the layout julius outputs is understood, anything else must be parsed as xml. The block is
+    decoded once and words are taken from the decoded block.
+
+    :param bytes block: the raw block
+    :param string encoding: encoding of the block
+    :return: whether the hypothesis is interim, its attributes and its ``(word, confidence)``
+        without the sentence delimiters, or ``None`` if the block could not be understood
+    :rtype: tuple
+
+    """
+    if b'&' in block:
+        return None
+    match = RECOGOUT_SHYPO.match(block.decode(encoding))
+    if match is None:
+        return None
+    partial = match.group(1) == 'PHYPO'
+    attributes = dict(ATTRIBUTE.findall(match.group(2)))
+    if 'SCORE' not in attributes:
+        return None
+    words = []
+    for whypo in WHYPO.finditer(match.group(3)):
+        word_attributes = dict(ATTRIBUTE.findall(whypo.group(1)))
+        word = word_attributes.get('WORD')
+        confidence = word_attributes.get('CM', '0.0' if partial else None)
+        if word is None or confidence is None:
+            return None
+        if word not in SENTENCE_DELIMITERS:
+            words.append((word, float(confidence)))
+    return partial, attributes, words
+
+
+def parse_recogout(block, encoding='utf-8'):
+    """Build the :class:`~pyjulius.models.Sentence` of the best hypothesis of a raw *RECOGOUT* block without
+    building an xml tree, see :func:`scan_recogout`
+
+    Interim hypotheses of the progressive output are built as :class:`~pyjulius.models.PartialSentence`.
+
+    :param bytes block: the raw block
+    :param string encoding: encoding of the block
+    :return: the sentence or ``None`` if the block could not be understood
+    :rtype: :class:`~pyjulius.models.Sentence`
+
+    """
+    scanned = scan_recogout(block, encoding)
+    if scanned is None:
+        return None
+    partial, attributes, words = scanned
+    words = [Word(word, confidence) for word, confidence in words]
+    score = float(attributes['SCORE'])
+    if partial:
+        frame = attributes.get('FRAME')
+        time = attributes.get('TIME')
+        return PartialSentence(words, score, int(frame) if frame is not None else None,
+                               int(time) if time is not None else None)
+    return Sentence(words, score)
+
+
+def parse_batch(blocks, encoding='utf-8', batch=None):
+    """Fill a :class:`~pyjulius.models.SentenceBatch` with the best hypothesis of raw *RECOGOUT* blocks
+
+    Words and scores go straight from the blocks to the arrays of the batch, see :func:`scan_recogout`, so that
+    :class:`~pyjulius.models.Sentence` are only built for the sentences picked with
+    :meth:`~pyjulius.models.SentenceBatch.select`. Blocks in another layout are parsed as xml, other blocks
+    and interim hypotheses are ignored::
+
+        batch = parse_batch(Recording('julius.log'))
+
+    :param blocks: raw blocks, or ``(block, timestamp)`` tuples such as the items of a :class:`~pyjulius.recording.Recording`
+    :param string encoding: encoding of the blocks
+    :param batch: batch to fill, a new one if ``None``
+    :type batch: :class:`~pyjulius.models.SentenceBatch`
+    :rtype: :class:`~pyjulius.models.SentenceBatch`
+
+    """
+    if batch is None:
+        batch = SentenceBatch()
+    for block in blocks:
+        timestamp = None
+        if isinstance(block, tuple):
+            block, timestamp = block
+        if sniff(block) != 'RECOGOUT':
+            continue
+        scanned = scan_recogout(block, encoding)
+        if scanned is None:
+            try:
+                shypo = XML(escape(block.decode(encoding))).find('SHYPO')
+            except ParseError:
+                continue
+            if shypo is not None:
+                batch.append(Sentence.from_shypo(shypo, encoding), timestamp)
+        elif not scanned[0]:
+            batch.append_words(scanned[2], float(scanned[1]['SCORE']), timestamp)
+    return batch
+
+
+class StreamParser(object):
+    """Incremental parser for the output of a julius module server
+
+    The output is fed as it arrives and each top-level element is returned as soon as it is closed,
+    the ``.`` lines that terminate the blocks are ignored. Data must be fed in complete lines so that
+    sentence delimiters can be escaped.
+
+    :param string encoding: encoding of the output
+    :param accept: function called with the tag of each top-level element, elements for which it
+        returns ``False`` are skipped without being built
+
+    """
+    def __init__(self, encoding='utf-8', accept=None):
+        self.accept = accept
+        self._elements = []
+        self._builder = None
+        self._skip = False
+        self._depth = 0
+        self._parser = XMLParser(target=self, encoding=encoding)
+        self._parser.feed(b'<JULIUS>')
+
+    def feed(self, data):
+        """Feed the parser with complete lines
+
+        :param bytes data: raw output
+        :return: top-level elements closed by *data*
+        :rtype: list of :class:`~xml.etree.ElementTree.Element`
+        :raise xml.etree.ElementTree.ParseError: if *data* is not valid xml
+
+        """
+        self._parser.feed(escape(data))
+        elements, self._elements = self._elements, []
+        return elements
+
+    # XMLParser target interface
+    def start(self, tag, attrib):
+        self._depth += 1
+        if self._depth == 2:
+            self._skip = self.accept is not None and not self.accept(tag)
+            if not self._skip:
+                self._builder = TreeBuilder()
+        if self._depth >= 2 and not self._skip:
+            self._builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self._depth >= 2 and not self._skip:
+            self._builder.end(tag)
+        if self._depth == 2 and not self._skip:
+            self._elements.append(self._builder.close())
+            self._builder = None
+        self._depth -= 1
+
+    def data(self, data):
+        if self._depth >= 2 and not self._skip:
+            self._builder.data(data)
+
+    def close(self):
+        pass
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import DefaultSelector, EVENT_READ, EVENT_WRITE, to_bytes
+from pyjulius.core import CONNECTED, CONNECTING, DISCONNECTED, BaseClient
+from pyjulius.exceptions import ConnectionError
+from pyjulius.results import BLOCK, ResultQueue
+from pyjulius.stream import BlockReader, Wakeup
+import collections
+import errno
+import logging
+import os
+import socket
+import threading
+
+
+__all__ = ['ClientPool']
+logger = logging.getLogger(__name__)
+
+
+def endpoint_key(item):
+    """Tag of a ``(name, result)`` item of :attr:`ClientPool.results` and the key of the queued items it replaces,
+    so that results are only coalesced with those of the same endpoint, see :func:`~pyjulius.results.result_key`
+
+    :param tuple item: the item
+    :rtype: tuple
+
+    """
+    tag = getattr(item[1], 'tag', None)
+    return tag, (item[0], tag)
+
+
+class PoolClient(BaseClient):
+    """Client of a :class:`ClientPool` endpoint, served by the thread of the pool on a non-blocking socket
+
+    .. attribute:: name
+
+        Name of the endpoint
+
+    .. attribute:: host
+
+        Host of the server
+
+    .. attribute:: port
+
+        Port of the server
+
+    .. attribute:: reader
+
+        The :class:`~pyjulius.stream.BlockReader` that buffers data received on the socket
+
+    .. attribute:: state
+
+        Current state. State can be:
+
+        * :data:`~pyjulius.core.CONNECTED`
+        * :data:`~pyjulius.core.DISCONNECTED`
+
+    """
+    def __init__(self, pool, name, host, port):
+        BaseClient.__init__(self, pool.encoding, pool.modelize, maxsize=pool.maxsize, policy=pool.policy)
+        self.pool = pool
+        self.name = name
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.reader = None
+        self.state = DISCONNECTED
+        self.connecting = False
+        self._commands = collections.deque()
+        self._output = b''
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def connect(self):
+        """Start connecting to the server, the connection is established by the thread of the pool
+
+        :raise ConnectionError: If socket cannot start a connection
+
+        """
+        logger.info(u'Connecting %s:%d' % (self.host, self.port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.reader = BlockReader(self.sock)
+        error = self.sock.connect_ex((self.host, self.port))
+        if error and error not in CONNECTING:
+            self.sock.close()
+            raise ConnectionError()
+        self.connecting = True
+
+    def disconnect(self):
+        """Disconnect from the server"""
+        logger.info(u'Disconnecting')
+        self.close()
+
+    def close(self):
+        """Close the socket and fail the pending :class:`~pyjulius.results.Response`"""
+        if self.sock is not None:
+            self.sock.close()
+        self.state = DISCONNECTED
+        self.connecting = False
+        self._fail_pending(ConnectionError())
+
+    def send(self, command):
+        """Queue a command to be sent to the server by the thread of the pool. This can be called from any thread
+
+        :param string command: command to send
+
+        """
+        self._send([command])
+
+    def _sendall(self, commands):
+        for command in commands:
+            logger.info('Sending %s', command)
+            self._commands.append(to_bytes(command, self.encoding) + b'\n')
+        self.pool._write(self)
+
+    def _enqueue(self, result):
+        if not self.pool.shared:
+            BaseClient._enqueue(self, result)
+            return
+        self.pool.results.put((self.name, result))
+
+    def selectable(self):
+        """Whether the socket is to be watched by the pool"""
+        return self.connecting or self.state == CONNECTED
+
+    def writable(self):
+        """Whether the connection is being established or there are commands to send"""
+        return self.connecting or bool(self._output or self._commands)
+
+    def handle_write(self):
+        """Finish the connection or send the queued commands, called by the pool when the socket is writable"""
+        if self.connecting:
+            error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise socket.error(error, os.strerror(error))
+            self.connecting = False
+            self.state = CONNECTED
+            logger.info(u'Connected %s:%d' % (self.host, self.port))
+        while self._commands:
+            self._output += self._commands.popleft()
+        if not self._output:
+            return
+        try:
+            sent = self.sock.send(self._output)
+        except socket.error as e:
+            if e.args[0] in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return
+            raise
+        self._output = self._output[sent:]
+
+    def handle_read(self):
+        """Deliver the results of the blocks received, called by the pool when the socket is readable"""
+        received = self.reader.fill()
+        if not received:
+            logger.info(u'Connection closed %s:%d' % (self.host, self.port))
+            self.close()
+            return
+        if self._stats is not None:
+            self._stats.count('bytes', received)
+
+        # Disconnect on invalid XML
+        if not self._process_blocks(self._deliver):
+            self.close()
+
+
+class ClientPool(threading.Thread):
+    """Watch many julius module servers from a single thread
+
+    Every endpoint is a :class:`PoolClient` on a non-blocking socket and all of them are served by one
+    :class:`selectors.DefaultSelector` loop running in the thread of the pool, a :func:`select.select` loop
+    on Python 2. Sockets are registered when endpoints are added and unregistered when they are closed.
+
+    :param string encoding: encoding to use to decode socket's output
+    :param boolean modelize: try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+    :param boolean shared: put the results of all endpoints in :attr:`results` if ``True``,
+        in the :attr:`~pyjulius.core.BaseClient.results` of each endpoint otherwise
+    :param integer maxsize: maximum number of results in each queue, ``0`` means unbounded
+    :param integer policy: what to do when a queue is full, see :attr:`ResultQueue.policy <pyjulius.results.ResultQueue.policy>`.
+        :data:`~pyjulius.results.BLOCK` stops the whole pool until there is room
+
+    .. attribute:: encoding
+
+        Encoding to use to decode socket's output
+
+    .. attribute:: modelize
+
+        Try to interpret raw xml :class:`~xml.etree.ElementTree.Element` as :mod:`~pyjulius.models` if ``True``
+
+    .. attribute:: shared
+
+        Put the results of all endpoints in :attr:`results` if ``True``
+
+    .. attribute:: results
+
+        Results received from all the endpoints (if :attr:`shared`). This :class:`~pyjulius.results.ResultQueue` is filled with
+        ``(name, result)`` tuples where *name* is the name of the endpoint, results are coalesced per endpoint
+
+    .. attribute:: clients
+
+        Dict of :class:`PoolClient` by endpoint name
+
+    """
+    def __init__(self, encoding='utf-8', modelize=True, shared=True, maxsize=0, policy=BLOCK):
+        super(ClientPool, self).__init__()
+        self.encoding = encoding
+        self.modelize = modelize
+        self.shared = shared
+        self.maxsize = maxsize
+        self.policy = policy
+        self.results = ResultQueue(maxsize, policy, key=endpoint_key)
+        self.clients = {}
+        self._wakeup = Wakeup()
+        self._selector = DefaultSelector()
+        self._selector.register(self._wakeup, EVENT_READ)
+        self._lock = threading.Lock()
+        self._added = []
+        self._removed = []
+        self._writers = set()
+        self._running = False
+        self._closed = False
+        self._stopping = False
+
+    def add(self, host='localhost', port=10500, name=None):
+        """Add an endpoint to the pool and start connecting to it
+
+        :param string host: host of the server
+        :param integer port: port of the server
+        :param string name: name of the endpoint, defaults to ``host:port``
+        :return: the name of the endpoint
+        :rtype: string
+        :raise ConnectionError: If socket cannot start a connection
+
+        """
+        if name is None:
+            name = '%s:%d' % (host, port)
+        if name in self.clients:
+            raise ValueError('Endpoint %s already exists' % name)
+        client = PoolClient(self, name, host, port)
+        client.connect()
+        with self._lock:
+            self.clients[name] = client
+            self._added.append(client)
+        self._wakeup.wake()
+        return name
+
+    def remove(self, name):
+        """Disconnect an endpoint and remove it from the pool
+
+        If the thread is running, it unregisters and disconnects the endpoint itself so that the socket is never
+        closed while it is being watched.
+
+        :param string name: name of the endpoint
+
+        """
+        with self._lock:
+            client = self.clients.pop(name)
+            if self._running:
+                self._removed.append(client)
+                self._wakeup.wake()
+                return
+            self._unwatch(client)
+        client.disconnect()
+
+    def send(self, name, command):
+        """Send a command to an endpoint
+
+        :param string name: name of the endpoint
+        :param string command: command to send
+
+        """
+        self.clients[name].send(command)
+        self._wakeup.wake()
+
+    def call(self, name, command):
+        """Send a command to an endpoint and return its :class:`~pyjulius.results.Response`,
+        see :meth:`~pyjulius.core.BaseClient.call`
+
+        :param string name: name of the endpoint
+        :param string command: command to send
+        :rtype: :class:`~pyjulius.results.Response`
+
+        """
+        response = self.clients[name].call(command)
+        self._wakeup.wake()
+        return response
+
+    def stop(self):
+        """Stop the thread"""
+        self._stopping = True
+        self._wakeup.wake()
+
+    def run(self):
+        """Start listening to the endpoints"""
+        logger.info(u'Started listening')
+        with self._lock:
+            self._running = not self._stopping
+        while not self._stopping:
+            self._poll()
+        with self._lock:
+            self._running = False
+            removed, self._removed = self._removed, []
+            closed = self._closed
+        for client in removed:
+            self._unwatch(client)
+            client.disconnect()
+        if closed:
+            self._selector.close()
+            self._wakeup.close()
+        logger.info(u'Stopped listening')
+
+    def _poll(self, timeout=None):
+        """Wait until an endpoint is ready or the pool is woken up and serve the ready endpoints
+
+        :param float timeout: maximum time to wait, in seconds, ``None`` to wait forever
+
+        """
+        with self._lock:
+            added, self._added = self._added, []
+            removed, self._removed = self._removed, []
+            writers, self._writers = self._writers, set()
+        for client in removed:
+            self._unwatch(client)
+            client.disconnect()
+        for client in added:
+            if client.selectable():
+                self._selector.register(client, EVENT_READ | EVENT_WRITE)
+        for client in writers:
+            if client.selectable() and client not in added:
+                self._selector.modify(client, EVENT_READ | EVENT_WRITE)
+        for key, events in self._selector.select(timeout):
+            client = key.fileobj
+            if client is self._wakeup:
+                self._wakeup.clear()
+                continue
+            if events & EVENT_WRITE:
+                self._handle(client, client.handle_write)
+            if events & EVENT_READ and client.state == CONNECTED:
+                self._handle(client, client.handle_read)
+            if not client.selectable():
+                self._unwatch(client)
+            elif not client.writable() and key.events & EVENT_WRITE:
+                self._selector.modify(client, EVENT_READ)
+
+    def _handle(self, client, handler):
+        """Call a handler of an endpoint, closing the endpoint if it fails"""
+        try:
+            handler()
+        except Exception:
+            logger.exception(u'Error on %s:%d' % (client.host, client.port))
+            client.close()
+
+    def _write(self, client):
+        """Watch an endpoint for writing once commands are queued, called from any thread
+
+        :param client: the endpoint
+        :type client: :class:`PoolClient`
+
+        """
+        with self._lock:
+            self._writers.add(client)
+        self._wakeup.wake()
+
+    def _unwatch(self, client):
+        """Stop watching an endpoint, with the pool lock held or from the thread of the pool
+
+        :param client: the endpoint
+        :type client: :class:`PoolClient`
+
+        """
+        if client in self._added:
+            self._added.remove(client)
+            return
+        try:
+            self._selector.unregister(client)
+        except (KeyError, ValueError):  # never registered, or already unregistered
+            pass
+
+    def close(self):
+        """Disconnect all the endpoints and stop the thread"""
+        for name in list(self.clients):
+            self.remove(name)
+        with self._lock:
+            self._closed = True
+            if self._running:
+                self.stop()
+                return
+        self._selector.close()
+        self._wakeup.close()
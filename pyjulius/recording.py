@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import range
+from pyjulius.stream import TERMINATOR
+import mmap
+import os
+import struct
+import time
+
+
+__all__ = ['Recorder', 'Recording']
+
+
+#: Index entry of a block: offset and length of the block in the log, receive timestamp
+ENTRY = struct.Struct('<QId')
+
+
+class Recorder(object):
+    """Append the raw output of a julius module server to a log file
+
+    The log is the stream exactly as it was received. Each complete block is indexed in a second file,
+    named after the log with an ``.idx`` extension, with its offset and length in the log and the time
+    it was received so that it can be read back with a :class:`Recording`.
+
+    :param string path: path of the log, created if it does not exist
+
+    .. attribute:: path
+
+        Path of the log
+
+    .. attribute:: blocks
+
+        Number of blocks indexed since the recorder was opened
+
+    """
+    def __init__(self, path):
+        self.path = path
+        self.blocks = 0
+        self._log = open(path, 'ab')
+        self._index = open(path + '.idx', 'ab')
+        self._offset = os.path.getsize(path)
+        self._tail = b''
+
+    def write(self, data, timestamp=None):
+        """Append received data to the log and index the blocks it completes
+
+        :param string data: the received data
+        :param float timestamp: when the data was received, defaults to now
+
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._log.write(data)
+        tail = self._tail + data if self._tail else data
+        position = 0
+        while 1:
+            if tail.startswith(TERMINATOR[1:], position):  # empty block
+                end, size = position, len(TERMINATOR) - 1
+            else:
+                end = tail.find(TERMINATOR, position)
+                if end == -1:
+                    break
+                size = end - position + len(TERMINATOR)
+            self._index.write(ENTRY.pack(self._offset, end - position, timestamp))
+            self._offset += size
+            self.blocks += 1
+            position += size
+        self._tail = tail[position:]
+
+    def reset(self):
+        """Forget the incomplete block at the end of the log, when the connection is lost"""
+        self._offset += len(self._tail)
+        self._tail = b''
+
+    def flush(self):
+        """Flush the log and then its index"""
+        self._log.flush()
+        self._index.flush()
+
+    def close(self):
+        """Close the log and its index"""
+        self.flush()
+        self._log.close()
+        self._index.close()
+
+
+class Recording(object):
+    """Memory-mapped log written by a :class:`Recorder`
+
+    Blocks are read directly from the mapped log, by index, without being loaded in memory first.
+
+    :param string path: path of the log
+
+    .. attribute:: path
+
+        Path of the log
+
+    """
+    def __init__(self, path):
+        self.path = path
+        self._log = self._map(path)
+        self._index = self._map(path + '.idx')
+        self._length = len(self._index) // ENTRY.size if self._index is not None else 0
+
+    @staticmethod
+    def _map(path):
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                return None  # empty files cannot be mapped
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        """Get a block and the time it was received
+
+        :param integer index: index of the block
+        :return: the raw block and its timestamp
+        :rtype: tuple
+
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('recording index out of range')
+        offset, length, timestamp = ENTRY.unpack_from(self._index, index * ENTRY.size)
+        return self._log[offset:offset + length], timestamp
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def close(self):
+        """Unmap the log and its index"""
+        for mapped in (self._log, self._index):
+            if mapped is not None:
+                mapped.close()
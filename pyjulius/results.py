@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.exceptions import ResponseTimeoutError
+from pyjulius.compat import queue
+import threading
+
+
+__all__ = ['BLOCK', 'DROP_OLDEST', 'DROP_NEWEST', 'COALESCE', 'result_key', 'ResultQueue', 'Response', 'TimedResult']
+
+
+#: Block until there is room in the queue
+BLOCK = 1
+
+#: Drop the oldest result to make room for the new one
+DROP_OLDEST = 2
+
+#: Drop the new result
+DROP_NEWEST = 3
+
+#: Replace the queued result with the same tag, drop the oldest result if there is none
+COALESCE = 4
+
+
+def result_key(item):
+    """Tag of a queued result and the key of the queued results it replaces, its tag as well
+
+    :param item: the result
+    :rtype: tuple
+
+    """
+    tag = getattr(item, 'tag', None)
+    return tag, tag
+
+
+class ResultQueue(queue.Queue):
+    """A :class:`~queue.Queue` of results with a policy to apply when it is full
+
+    Results are raw xml :class:`~xml.etree.ElementTree.Element` or :mod:`~pyjulius.models`,
+    their tag is the one of the xml element they come from.
+
+    :param integer maxsize: maximum number of results in the queue, ``0`` means unbounded
+    :param integer policy: what to do when the queue is full, see :attr:`policy`
+    :param coalesce: tags of the results to coalesce with the :data:`COALESCE` policy
+    :type coalesce: iterable of string
+    :param latest: tags of the results that replace the queued result with the same tag whatever the policy
+    :type latest: iterable of string
+    :param key: function called with a queued item that returns its tag and the key of the queued items it replaces,
+        see :func:`result_key`
+
+    .. attribute:: policy
+
+        What to do when a result is put in a full queue. Policy can be:
+
+        * :data:`~pyjulius.results.BLOCK`
+        * :data:`~pyjulius.results.DROP_OLDEST`
+        * :data:`~pyjulius.results.DROP_NEWEST`
+        * :data:`~pyjulius.results.COALESCE`, results with a tag in :attr:`coalesce` replace the queued result
+          with the same tag even if the queue is not full
+
+    .. attribute:: coalesce
+
+        Tags of the results to coalesce with the :data:`COALESCE` policy
+
+    .. attribute:: latest
+
+        Tags of the results that replace the queued result with the same tag whatever the policy, so that
+        only the latest :class:`~pyjulius.models.PartialSentence` waits for a consumer that lags behind
+
+    .. attribute:: key
+
+        Function called with a queued item that returns its tag and the key of the queued items it replaces
+
+    .. attribute:: dropped
+
+        Number of results dropped
+
+    .. attribute:: coalesced
+
+        Number of results replaced by a newer one, with the :data:`COALESCE` policy or because of :attr:`latest`
+
+    """
+    def __init__(self, maxsize=0, policy=BLOCK, coalesce=('INPUT',), latest=('PARTIAL',), key=result_key):
+        queue.Queue.__init__(self, maxsize)
+        self.policy = policy
+        self.coalesce = frozenset(coalesce)
+        self.latest = frozenset(latest)
+        self.key = key
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, item, block=True, timeout=None):
+        if self.latest and self._replace(item):
+            return
+        if self.policy == BLOCK:
+            return queue.Queue.put(self, item, block, timeout)
+        self.not_full.acquire()
+        try:
+            if self.policy == COALESCE and self._coalesce(item, self.coalesce):
+                self.coalesced += 1
+            elif self.maxsize > 0 and self._qsize() >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self._discard(self.queue[0])
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        finally:
+            self.not_full.release()
+
+    def drain(self, maxsize=0, block=False, timeout=None):
+        """Remove and return all the queued results at once
+
+        :param integer maxsize: maximum number of results to return, ``0`` for all of them
+        :param boolean block: wait for a result if the queue is empty
+        :param float timeout: maximum time to wait for a result, in seconds, ``None`` to wait forever
+        :return: the results, in order
+        :rtype: list
+        :raise queue.Empty: if *block* and no result was queued within *timeout*
+
+        """
+        items = []
+        if block:
+            items.append(self.get(True, timeout))
+        self.not_empty.acquire()
+        try:
+            while self._qsize() and (not maxsize or len(items) < maxsize):
+                items.append(self._get())
+            if items:
+                self.not_full.notify_all()
+        finally:
+            self.not_empty.release()
+        return items
+
+    def _replace(self, item):
+        """Replace the queued result with the same key as *item* if its tag is in :attr:`latest`
+
+        :return: whether *item* was queued
+        :rtype: boolean
+
+        """
+        if self.key(item)[0] not in self.latest:
+            return False
+        self.not_full.acquire()
+        try:
+            if not self._coalesce(item, self.latest):
+                return False
+            self.coalesced += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        finally:
+            self.not_full.release()
+        return True
+
+    def _coalesce(self, item, tags):
+        """Discard the queued result with the same key as *item*
+
+        :param tags: tags of the results to coalesce
+        :type tags: frozenset of string
+        :return: whether a result was discarded
+        :rtype: boolean
+
+        """
+        tag, key = self.key(item)
+        if tag not in tags:
+            return False
+        for queued in self.queue:
+            if self.key(queued)[1] == key:
+                self._discard(queued)
+                return True
+        return False
+
+    def _discard(self, item):
+        """Remove a queued result that will never be processed"""
+        self.queue.remove(item)
+        self.unfinished_tasks -= 1
+        if not self.unfinished_tasks:
+            self.all_tasks_done.notify_all()
+
+
+class Response(object):
+    """Response to a command, set once the server answers it
+
+    :param string command: the command
+
+    .. attribute:: command
+
+        The command
+
+    """
+    def __init__(self, command):
+        self.command = command
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def done(self):
+        """Whether the response was received or the command failed
+
+        :rtype: boolean
+
+        """
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the response
+
+        :param float timeout: maximum time to wait, in seconds, ``None`` to wait forever
+        :return: the response, raw xml :class:`~xml.etree.ElementTree.Element` or ``None`` for
+            commands the server does not answer
+        :raise ResponseTimeoutError: if the response was not received in time
+        :raise ConnectionError: if the connection was lost before the response was received
+
+        """
+        if not self._event.wait(timeout) and not self._event.is_set():
+            raise ResponseTimeoutError()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def set_result(self, result):
+        """Set the response
+
+        :param result: the response
+
+        """
+        self._result = result
+        self._finish()
+
+    def set_error(self, error):
+        """Fail the command
+
+        :param error: the exception to raise from :meth:`result`
+
+        """
+        self._error = error
+        self._finish()
+
+    def add_done_callback(self, callback):
+        """Call *callback* with the response once it is done, at once if it already is
+
+        :param callback: function that takes the response
+
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def __repr__(self):
+        return "<Response(%r, %s)>" % (self.command, 'done' if self.done() else 'pending')
+
+
+class TimedResult(object):
+    """A result with the time it went through each stage, as given by :func:`~pyjulius.stats.clock`
+
+    :param float received: when the first byte of the block was received
+    :param float completed: when the last byte of the block was received
+    :param float speech_end: when julius detected the end of the speech, for *RECOGOUT*
+
+    .. attribute:: result
+
+        The result
+
+    .. attribute:: speech_end
+
+        When the *INPUT* block with the *ENDREC* status that precedes a *RECOGOUT* was received, ``None`` otherwise
+
+    .. attribute:: received
+
+        When the first byte of the block was received
+
+    .. attribute:: completed
+
+        When the last byte of the block was received
+
+    .. attribute:: parsed
+
+        When the block was turned into the result
+
+    .. attribute:: enqueued
+
+        When the result was dispatched to the subscribers or put in the results
+
+    .. attribute:: tag
+
+        Tag of the result
+
+    """
+    __slots__ = ('result', 'speech_end', 'received', 'completed', 'parsed', 'enqueued')
+
+    #: Stages of the processing of a result, see :meth:`stages`
+    STAGES = ('recognizer', 'network', 'parse', 'deliver', 'total')
+
+    def __init__(self, received=None, completed=None, speech_end=None):
+        self.result = None
+        self.speech_end = speech_end
+        self.received = received
+        self.completed = completed
+        self.parsed = None
+        self.enqueued = None
+
+    @property
+    def tag(self):
+        return getattr(self.result, 'tag', None)
+
+    @property
+    def latency(self):
+        """Time from the end of the speech, or the first byte of the block, to the delivery of the result"""
+        return self.enqueued - (self.speech_end if self.speech_end is not None else self.received)
+
+    def stages(self):
+        """Duration of each stage, in seconds
+
+        * ``recognizer``: from the end of the speech to the first byte of the block, only for *RECOGOUT*
+        * ``network``: from the first to the last byte of the block
+        * ``parse``: from the last byte of the block to the result, including the time the block was buffered
+        * ``deliver``: from the result to its delivery
+        * ``total``: :attr:`latency`
+
+        :rtype: dict
+
+        """
+        stages = {'network': self.completed - self.received, 'parse': self.parsed - self.completed,
+                  'deliver': self.enqueued - self.parsed, 'total': self.latency}
+        if self.speech_end is not None:
+            stages['recognizer'] = self.received - self.speech_end
+        return stages
+
+    def __repr__(self):
+        if self.enqueued is None:
+            return "<TimedResult(%r, pending)>" % self.result
+        return "<TimedResult(%r, %.3fms)>" % (self.result, self.latency * 1e3)
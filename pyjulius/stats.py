@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from bisect import bisect_left
+import collections
+import logging
+import threading
+try:
+    from time import monotonic as clock
+except ImportError:
+    from time import time as clock
+
+
+__all__ = ['clock', 'Histogram', 'RollingHistogram', 'Stats', 'BlockStats']
+logger = logging.getLogger(__name__)
+
+
+class Histogram(object):
+    """Histogram of durations with logarithmic buckets
+
+    :param float minimum: upper bound of the first bucket, in seconds
+    :param float maximum: upper bound of the last bucket, longer durations are counted in an overflow bucket
+    :param float factor: ratio between the bounds of consecutive buckets
+
+    .. attribute:: bounds
+
+        Upper bound of each bucket
+
+    .. attribute:: counts
+
+        Number of durations in each bucket, the last one is the overflow bucket
+
+    .. attribute:: count
+
+        Number of durations
+
+    .. attribute:: total
+
+        Sum of the durations
+
+    .. attribute:: max
+
+        Longest duration
+
+    """
+    def __init__(self, minimum=1e-6, maximum=10.0, factor=1.25):
+        self.bounds = []
+        bound = minimum
+        while bound < maximum:
+            self.bounds.append(bound)
+            bound *= factor
+        self.bounds.append(maximum)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """Add a duration
+
+        :param float value: the duration, in seconds
+
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the durations of another histogram with the same buckets
+
+        :param other: the other histogram
+        :type other: :class:`Histogram`
+
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def percentile(self, p):
+        """Approximate percentile of the durations, as the upper bound of the bucket it falls in
+
+        :param float p: the percentile, between ``0`` and ``100``
+        :rtype: float
+
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        """Summary of the histogram
+
+        :return: ``count``, ``total``, ``mean``, ``p50``, ``p90``, ``p99`` and ``max``
+        :rtype: dict
+
+        """
+        return {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0,
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'p99': self.percentile(99), 'max': self.max}
+
+
+class RollingHistogram(object):
+    """:class:`Histogram` of the durations added during the last *window* seconds
+
+    Durations are added to one of *slots* histograms, the oldest is dropped every *window* / *slots* seconds.
+
+    :param float window: duration covered by the histogram, in seconds
+    :param integer slots: number of histograms the window is split into
+
+    .. attribute:: window
+
+        Duration covered by the histogram, in seconds
+
+    """
+    def __init__(self, window=60.0, slots=6):
+        self.window = window
+        self.slots = slots
+        self._step = float(window) / slots
+        self._histograms = collections.deque()
+
+    def add(self, value, now=None):
+        """Add a duration
+
+        :param float value: the duration, in seconds
+        :param float now: current :func:`clock`
+
+        """
+        index = int((clock() if now is None else now) / self._step)
+        if not self._histograms or self._histograms[-1][0] != index:
+            self._histograms.append((index, Histogram()))
+            while self._histograms[0][0] <= index - self.slots:
+                self._histograms.popleft()
+        self._histograms[-1][1].add(value)
+
+    def histogram(self, now=None):
+        """Merge the histograms of the window
+
+        :param float now: current :func:`clock`
+        :rtype: :class:`Histogram`
+
+        """
+        index = int((clock() if now is None else now) / self._step)
+        merged = Histogram()
+        for start, histogram in list(self._histograms):
+            if start > index - self.slots:
+                merged.merge(histogram)
+        return merged
+
+    def snapshot(self, now=None):
+        """Summary of the durations of the window, see :meth:`Histogram.snapshot`"""
+        return self.histogram(now).snapshot()
+
+
+class Stats(object):
+    """Counters and timers of a client
+
+    Stats can be updated and snapshot from many threads, such as the thread of a client and the one that
+    delivers the results parsed by its workers.
+
+    :param exporter: function called with a :meth:`snapshot` every *interval* seconds
+    :param float interval: interval between two calls of *exporter*, in seconds
+
+    .. attribute:: counters
+
+        Dict of counters by name
+
+    .. attribute:: timers
+
+        Dict of :class:`Histogram` by name
+
+    .. attribute:: exporter
+
+        Function called with a :meth:`snapshot` every :attr:`interval` seconds
+
+    .. attribute:: interval
+
+        Interval between two calls of :attr:`exporter`, in seconds
+
+    """
+    def __init__(self, exporter=None, interval=10.0):
+        self.counters = {}
+        self.timers = {}
+        self.exporter = exporter
+        self.interval = interval
+        self._exported = clock()
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        """Increment a counter
+
+        :param string name: name of the counter
+        :param integer value: increment
+
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def time(self, name, value):
+        """Add a duration to a timer
+
+        :param string name: name of the timer
+        :param float value: the duration, in seconds
+
+        """
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Histogram()
+            timer.add(value)
+
+    def tick(self):
+        """Call :attr:`exporter` if :attr:`interval` has elapsed since the last call"""
+        if self.exporter is None:
+            return
+        now = clock()
+        with self._lock:
+            if now - self._exported < self.interval:
+                return
+            self._exported = now
+        try:
+            self.exporter(self.snapshot())
+        except Exception:
+            logger.exception(u'Error in exporter %r' % self.exporter)
+
+    def snapshot(self):
+        """Current value of the counters and summary of the timers
+
+        :return: ``counters`` and ``timers`` dicts
+        :rtype: dict
+
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            timers = dict((name, timer.snapshot()) for name, timer in list(self.timers.items()))
+        return {'counters': counters, 'timers': timers}
+
+    def merge(self, other):
+        """Add the counters and durations recorded for a block elsewhere, such as in a worker process
+
+        :param other: the recorded stats
+        :type other: :class:`BlockStats`
+
+        """
+        with self._lock:
+            for name, value in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, value in other.durations:
+                timer = self.timers.get(name)
+                if timer is None:
+                    timer = self.timers[name] = Histogram()
+                timer.add(value)
+
+
+class BlockStats(object):
+    """Counters and durations of a single block, recorded where it is parsed and merged into
+    the :class:`Stats` of the client with :meth:`Stats.merge`
+
+    It has the :meth:`~Stats.count`, :meth:`~Stats.time` and :meth:`~Stats.tick` methods of :class:`Stats`
+    but no lock nor :class:`Histogram` so that it is cheap to create and to pickle.
+
+    .. attribute:: counters
+
+        Dict of counters by name
+
+    .. attribute:: durations
+
+        List of ``(name, duration)`` tuples in the order they were recorded
+
+    """
+    def __init__(self):
+        self.counters = {}
+        self.durations = []
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def time(self, name, value):
+        self.durations.append((name, value))
+
+    def tick(self):
+        pass
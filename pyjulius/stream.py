@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import socketpair
+from pyjulius.stats import clock
+import errno
+import select
+import socket
+import threading
+
+
+__all__ = ['BlockReader', 'Wakeup']
+
+
+#: Line that terminates a block in julius module mode
+TERMINATOR = b'\n.\n'
+
+
+class BlockReader(object):
+    """Buffered reader that splits the output of a julius module server into lines and blocks
+
+    Data is received with :meth:`~socket.socket.recv_into` in a reusable :class:`bytearray` so that lines
+    and ``.``-terminated blocks can be extracted without a system call per byte. Consumed data is tracked
+    with offsets and the buffer is only compacted or grown when it runs out of room, so extracted data is
+    copied once, when it is handed out.
+
+    :param sock: the socket to read from, ``None`` if data is added with :meth:`feed`
+    :param integer bufsize: minimum amount of data to read from the socket at once, initial size of the buffer
+    :param recorder: recorder to write the received data to
+    :type recorder: :class:`~pyjulius.recording.Recorder`
+
+    .. attribute:: sock
+
+        The socket to read from
+
+    .. attribute:: bufsize
+
+        Minimum amount of data to read from the socket at once
+
+    .. attribute:: recorder
+
+        :class:`~pyjulius.recording.Recorder` the received data is written to, if any
+
+    .. attribute:: received
+
+        :func:`~pyjulius.stats.clock` when the first byte of the last extracted data was received
+
+    .. attribute:: completed
+
+        :func:`~pyjulius.stats.clock` when the last byte of the last extracted data was received
+
+    .. attribute:: buffer
+
+        Data read from the socket but not yet consumed
+
+    """
+    def __init__(self, sock, bufsize=65536, recorder=None):
+        self.sock = sock
+        self.bufsize = bufsize
+        self.recorder = recorder
+        self._buffer = bytearray(bufsize)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+        self.received = None
+        self.completed = None
+        self._filled = None
+        self._first = None
+
+    @property
+    def buffer(self):
+        return self._view[self._start:self._end].tobytes()
+
+    def fill(self):
+        """Read available data from the socket into the buffer
+
+        :return: number of bytes read, ``0`` means the server closed the connection
+        :rtype: integer
+
+        """
+        if len(self._buffer) - self._end < self.bufsize:
+            self._reserve(self.bufsize)
+        received = self.sock.recv_into(self._view[self._end:])
+        self._advance(received)
+        return received
+
+    def feed(self, data):
+        """Add data received by other means than :attr:`sock` to the buffer, such as an :mod:`asyncio` stream
+
+        :param bytes data: the data
+
+        """
+        if len(self._buffer) - self._end < len(data):
+            self._reserve(len(data))
+        self._buffer[self._end:self._end + len(data)] = data
+        self._advance(len(data))
+
+    def _advance(self, received):
+        """Account for data just written at the end of the buffer
+
+        :param integer received: number of bytes written
+
+        """
+        self._filled = clock()
+        if self._start == self._end:
+            self._first = self._filled
+        if received and self.recorder is not None:
+            self.recorder.write(self._view[self._end:self._end + received].tobytes())
+        self._end += received
+
+    def _reserve(self, size):
+        """Make room for at least *size* bytes at the end of the buffer"""
+        if self._start:
+            used = self._end - self._start
+            self._buffer[:used] = self._buffer[self._start:self._end]
+            self._scan = max(0, self._scan - self._start)
+            self._start, self._end = 0, used
+        if len(self._buffer) - self._end < size:
+            self._view = None  # release the export so that the buffer can be resized
+            self._buffer.extend(bytearray(max(size, self.bufsize, len(self._buffer))))
+            self._view = memoryview(self._buffer)
+
+    def _consume(self, start, end, position):
+        """Hand out data from the buffer
+
+        :param integer start: start of the data
+        :param integer end: end of the data
+        :param integer position: start of the unconsumed data
+        :rtype: string
+
+        """
+        data = self._view[start:end].tobytes()
+        self.received, self.completed = self._first, self._filled
+        if position == self._end:
+            self._start = self._end = 0
+        else:
+            self._start = position
+            # data is extracted until none is complete before filling the buffer again,
+            # so what is left was received by the last fill
+            self._first = self._filled
+        self._scan = self._start
+        return data
+
+    def readline(self):
+        """Extract a line from the buffer
+
+        :return: the line without its trailing ``\\n`` or ``None`` if no complete line is buffered
+        :rtype: string
+
+        """
+        index = self._buffer.find(b'\n', self._start, self._end)
+        if index == -1:
+            return None
+        return self._consume(self._start, index, index + 1)
+
+    def readlines(self):
+        """Extract all the complete lines from the buffer
+
+        :return: the lines with their trailing ``\\n`` or ``None`` if no complete line is buffered
+        :rtype: string
+
+        """
+        index = self._buffer.rfind(b'\n', self._start, self._end)
+        if index == -1:
+            return None
+        return self._consume(self._start, index + 1, index + 1)
+
+    def readblock(self):
+        """Extract a block from the buffer. The terminating ``.`` line is not part of the block
+
+        :return: the block or ``None`` if no complete block is buffered
+        :rtype: string
+
+        """
+        # a lone ``.`` line is an empty block, only look at buffered data as the rest of the buffer is stale
+        end = self._start + len(TERMINATOR) - 1
+        if end <= self._end and self._buffer.find(TERMINATOR[1:], self._start, end) == self._start:
+            return self._consume(self._start, self._start, end)
+        index = self._buffer.find(TERMINATOR, max(self._start, self._scan), self._end)
+        if index == -1:
+            # do not scan the same data again when more is received
+            self._scan = max(self._start, self._end - len(TERMINATOR) + 1)
+            return None
+        return self._consume(self._start, index, index + len(TERMINATOR))
+
+
+class Wakeup(object):
+    """Pair of connected sockets that interrupts a :func:`select.select` from another thread
+
+    The read end is added to the selected files and becomes readable once :meth:`wake` is called,
+    so a thread can wait for data without a timeout and still be stopped at once. Sockets can be
+    selected on every platform, unlike pipes on Windows.
+
+    .. attribute:: closed
+
+        Whether the sockets are closed
+
+    """
+    def __init__(self):
+        self._read, self._write = socketpair()
+        self._read.setblocking(False)
+        self._write.setblocking(False)
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def fileno(self):
+        return self._read.fileno()
+
+    def wake(self):
+        """Make the read end readable, it stays readable until :meth:`clear` is called"""
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._write.send(b'x')
+            except socket.error as e:
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):  # already readable
+                    raise
+
+    def clear(self):
+        """Make the read end not readable anymore, until the next :meth:`wake`"""
+        try:
+            while self._read.recv(4096):
+                pass
+        except socket.error as e:
+            if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+
+    def wait(self, timeout=None):
+        """Wait until :meth:`wake` is called or *timeout* seconds have passed
+
+        :param float timeout: maximum time to wait, in seconds, ``None`` to wait forever
+        :return: whether :meth:`wake` was called
+        :rtype: boolean
+
+        """
+        readable, _, __ = select.select([self], [], [], timeout)
+        return bool(readable)
+
+    def close(self):
+        """Close the sockets"""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._read.close()
+                self._write.close()
@@ -17,7 +17,7 @@
 # You should have received a copy of the Lesser GNU Lesser General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
 from setuptools import setup
-execfile('pyjulius/infos.py')
+exec(open('pyjulius/infos.py').read())
 
 
 setup(name='pyjulius',
@@ -30,8 +30,8 @@ setup(name='pyjulius',
         'License :: OSI Approved :: GNU Library or Lesser General Public License (LGPL)',
         'Intended Audience :: Developers',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2.6',
         'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
         'Topic :: Software Development :: Libraries :: Python Modules'],
     keywords='julius speech recognition',
     author='Antoine Bertin',
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from benchmarks.fakejulius import FakeServer, recogout
+from pyjulius.core import DISCONNECTED
+from pyjulius.exceptions import ConnectionError
+import socket
+import unittest
+try:
+    import asyncio
+    from pyjulius.aio import AsyncioClient
+except ImportError:
+    asyncio = None
+
+
+STATUS = b'<SYSINFO PROCESS="ACTIVE"/>\n.\n'
+
+
+@unittest.skipIf(asyncio is None, 'asyncio is not available')
+class AsyncioClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+
+    def tearDown(self):
+        if self.server is not None:
+            self.wait(self.client.disconnect())
+            self.server.join(5)
+        self.loop.close()
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(asyncio.wait_for(coroutine, 5))
+
+    def start(self, payload=(), **kwargs):
+        self.server = FakeServer(list(payload), **kwargs)
+        self.server.start()
+        self.client = AsyncioClient(self.server.host, self.server.port)
+        self.wait(self.client.connect())
+
+    def collect(self):
+        results = []
+        while 1:
+            try:
+                results.append(self.wait(self.client.__anext__()))
+            except StopAsyncIteration:
+                return results
+
+    def test_results(self):
+        self.start([recogout(words=i) for i in range(3)])
+        self.assertEqual([len(r.words) for r in self.collect()], [0, 1, 2])
+        self.assertEqual(self.client.state, DISCONNECTED)
+
+    def test_send(self):
+        self.start(responses={'STATUS': STATUS + recogout()})
+        self.wait(self.client.send('STATUS'))
+        # the answer to a command sent without call() is not a result either
+        self.assertEqual(self.wait(self.client.__anext__()).tag, 'RECOGOUT')
+        self.assertEqual(self.server.received[0], b'STATUS\n')
+
+    def test_call(self):
+        self.start(responses={'STATUS': STATUS + recogout()})
+        response = self.client.call('STATUS')
+        self.assertEqual(self.wait(self.client.__anext__()).tag, 'RECOGOUT')
+        self.assertEqual(response.result(0).tag, 'SYSINFO')
+
+    def test_disconnect(self):
+        self.start(responses={'GRAMINFO': None})
+        response = self.client.call('GRAMINFO')
+        self.wait(self.client.disconnect())
+        self.assertRaises(ConnectionError, response.result, 0)
+        self.assertRaises(ConnectionError, self.client.call, 'STATUS')
+        self.assertEqual(self.collect(), [])
+
+    def test_connection_error(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('localhost', 0))
+        port = listener.getsockname()[1]
+        listener.close()
+        self.client = AsyncioClient('localhost', port)
+        self.assertRaises(ConnectionError, self.wait, self.client.connect())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.cache import DUPLICATE, BlockCache
+from pyjulius.core import BaseClient
+from pyjulius.models import Utterance
+import unittest
+
+
+RECOGOUT = b'<RECOGOUT>\n  <SHYPO RANK="1" SCORE="-10.0">\n    <WHYPO WORD="hello" CM="0.9"/>\n  </SHYPO>\n</RECOGOUT>'
+
+
+class BlockCacheTestCase(unittest.TestCase):
+    def test_lru(self):
+        cache = BlockCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.snapshot(), {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'duplicates': 0})
+
+    def test_window(self):
+        cache = BlockCache(2, window=1.0)
+        cache.put('a', 1, 10.0)
+        self.assertTrue(cache.get('a', 10.5) is DUPLICATE)
+        self.assertEqual(cache.get('a', 11.0), 1)
+        self.assertTrue(cache.get('a', 11.5) is DUPLICATE)
+        self.assertEqual(cache.duplicates, 2)
+        self.assertEqual(cache.get('a', 11.6, dedup=False), 1)
+        self.assertTrue(cache.get('a', 12.0) is DUPLICATE)
+
+
+class MemoizeTestCase(unittest.TestCase):
+    def test_shared(self):
+        client = BaseClient()
+        client.memoize(16)
+        sentence = client._process(RECOGOUT)
+        self.assertTrue(client._process(RECOGOUT) is sentence)
+        self.assertEqual(client.stats()['cache']['hits'], 1)
+
+    def test_invalid(self):
+        client = BaseClient()
+        client.memoize(16)
+        self.assertEqual(client._process(b'<A>'), None)
+        self.assertEqual(len(client.cache), 0)
+
+    def test_window(self):
+        client = BaseClient()
+        client.memoize(16, window=60)
+        self.assertNotEqual(client._process(RECOGOUT), None)
+        self.assertTrue(client._process(RECOGOUT) is DUPLICATE)
+
+    def test_window_markers(self):
+        client = BaseClient()
+        client.memoize(16, window=60)
+        client.correlate()
+        for score in ('-10.0', '-20.0'):
+            for block in (b'<STARTRECOG/>', b'<ENDRECOG/>', RECOGOUT.replace(b'-10.0', score.encode('ascii'))):
+                result = client._process(block)
+                self.assertFalse(result is DUPLICATE)
+                client._deliver(result)
+        utterances = client.results.drain()
+        self.assertEqual([type(u) for u in utterances], [Utterance, Utterance])
+        self.assertEqual([u.result.score for u in utterances], [-10.0, -20.0])
+
+    def test_disable(self):
+        client = BaseClient()
+        client.memoize(16)
+        client.memoize(0)
+        self.assertEqual(client.cache, None)
+        self.assertTrue('cache' not in client.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
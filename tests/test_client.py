@@ -15,11 +15,27 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
-from pyjulius.core import Client
+from benchmarks.fakejulius import FakeServer, recogout
+from multiprocessing.pool import ThreadPool
+from pyjulius.core import DISCONNECTED, BaseClient, Client
+from pyjulius.exceptions import ConnectionError
+from pyjulius.models import Sentence
 from xml.etree.ElementTree import Element
+import threading
+import time
 import unittest
 
 
+def grammar(name):
+    return 'ADDGRAM %s\n0 1 1 0 1\nDFAEND\n0 [HELLO] h e l o\nDICEND' % name
+
+
+def status():
+    """Answer each *STATUS* with a *SYSINFO* numbered in the order the commands were received"""
+    counter = iter(range(1000))
+    return lambda line: '<SYSINFO PROCESS="ACTIVE" ID="%d"/>\n.\n' % next(counter)
+
+
 class ClientTestCase(unittest.TestCase):
     tests = ['test_data_received', 'test_modelize_off', 'test_command']
 
@@ -57,7 +73,303 @@ class ClientTestCase(unittest.TestCase):
                 break
 
 
+class SubscribeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = BaseClient()
+        self.handled = []
+
+    def test_tag(self):
+        self.client.subscribe(self.handled.append, 'RECOGOUT')
+        self.client._deliver(Sentence([], -1.0))
+        self.client._deliver(Element('INPUT'))
+        self.assertEqual([r.tag for r in self.handled], ['RECOGOUT'])
+        self.assertEqual([r.tag for r in self.client.results.drain()], ['INPUT'])
+
+    def test_predicate(self):
+        self.client.subscribe(self.handled.append, predicate=lambda r: r.score > -5)
+        self.client._deliver(Sentence([], -1.0))
+        self.client._deliver(Sentence([], -10.0))
+        self.assertEqual([r.score for r in self.handled], [-1.0])
+        self.assertEqual([r.score for r in self.client.results.drain()], [-10.0])
+
+    def test_predicate_error(self):
+        self.client.subscribe(self.handled.append, predicate=lambda r: r.missing)
+        self.client._deliver(Sentence([], -1.0))
+        self.assertEqual(self.handled, [])
+        self.assertEqual(self.client.results.qsize(), 1)
+
+    def test_handler_error(self):
+        def handler(result):
+            raise ValueError()
+        self.client.subscribe(handler)
+        self.client._deliver(Sentence([], -1.0))
+        self.assertEqual(self.client.results.qsize(), 0)
+
+    def test_unsubscribe(self):
+        subscription = self.client.subscribe(self.handled.append)
+        self.client.unsubscribe(subscription)
+        self.client._deliver(Sentence([], -1.0))
+        self.assertEqual(self.handled, [])
+        self.assertEqual(self.client.results.qsize(), 1)
+
+    def test_pool(self):
+        pool = ThreadPool(1)
+        threads = []
+        self.client.subscribe(lambda r: threads.append(threading.current_thread()), pool=pool)
+        self.client._deliver(Sentence([], -1.0))
+        pool.close()
+        pool.join()
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0] is not threading.current_thread())
+        self.client._deliver(Sentence([], -2.0))
+        self.assertEqual([r.score for r in self.client.results.drain()], [-2.0])
+
+
+class ReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def record(self, *commands):
+        for command in commands:
+            self.client._record(command)
+
+    def test_net_state(self):
+        self.record(grammar('a'), 'DELGRAM\na', grammar('a'), 'DEACTIVATEGRAM\na', 'ACTIVATEGRAM\na')
+        self.assertEqual(self.client.replay, [grammar('a')])
+        self.record(grammar('b'), 'DEACTIVATEGRAM\nb', 'ACTIVATEGRAM\nstartup', 'ADDWORD\nb\n1 [WORLD] w o r l d\nDICEND')
+        self.assertEqual(self.client.replay, [grammar('a'), grammar('b'), 'ADDWORD\nb\n1 [WORLD] w o r l d\nDICEND',
+                                              'DEACTIVATEGRAM\nb', 'ACTIVATEGRAM\nstartup'])
+
+    def test_pause(self):
+        self.record('PAUSE', 'INPUTONCHANGE TERMINATE', 'RESUME', 'TERMINATE', 'STATUS')
+        self.assertEqual(self.client.replay, ['INPUTONCHANGE TERMINATE', 'TERMINATE'])
+
+    def test_changegram(self):
+        self.record(grammar('a'), 'DEACTIVATEGRAM\nstartup', 'CHANGE' + grammar('b')[3:], grammar('c'), 'DELGRAM\nb')
+        self.assertEqual(self.client.replay, ['CHANGE' + grammar('c')[3:]])
+
+    def test_bounded(self):
+        for _ in range(100):
+            self.record(grammar('a'), 'DEACTIVATEGRAM\na', 'ACTIVATEGRAM\na', 'DELGRAM\na')
+        self.assertEqual(self.client.replay, [])
+
+
+class ReconnectTestCase(unittest.TestCase):
+    def test_reconnect(self):
+        server = FakeServer([recogout()], connections=2)
+        server.start()
+        client = Client(server.host, server.port, reconnect=True)
+        client.reconnect_delay = 0.01
+        client.connect()
+        for command in (grammar('a'), 'DELGRAM\na', grammar('b'), 'DEACTIVATEGRAM\nb', 'PAUSE', 'RESUME'):
+            client.send(command)
+        client.start()
+        results = [client.results.get(timeout=5) for _ in range(2)]
+        server.join(5)
+        client.stop()
+        client.disconnect()
+        client.join(5)
+        self.assertFalse(client.is_alive())
+        self.assertEqual([r.tag for r in results], ['RECOGOUT', 'RECOGOUT'])
+        self.assertTrue(client.reconnects >= 1)
+        self.assertEqual(server.received[1], (grammar('b') + '\nDEACTIVATEGRAM\nb\n').encode('ascii'))
+
+    def test_stop_connect(self):
+        client = Client('10.255.255.1', 10500)
+        client.stop()
+        start = time.time()
+        self.assertRaises(ConnectionError, client.connect)
+        self.assertTrue(time.time() - start < 1)
+
+    def test_stop_connected(self):
+        server = FakeServer([])
+        server.start()
+        client = Client(server.host, server.port)
+        errors = []
+
+        def connect():
+            try:
+                client.connect()
+            except ConnectionError as e:
+                errors.append(e)
+        thread = threading.Thread(target=connect)
+        with client._state_lock:
+            thread.start()
+            deadline = time.time() + 5
+            while (not server.received or client.sock.gettimeout() is not None) and time.time() < deadline:
+                time.sleep(0.01)  # until connected and waiting for the lock
+            client.stop()
+        thread.join(5)
+        server.join(5)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(client.state, DISCONNECTED)
+
+    def test_disconnect_reconnecting(self):
+        server = FakeServer([recogout()])
+        server.start()
+        client = Client(server.host, server.port, reconnect=True)
+        client.reconnect_delay = 0.01
+        client.connect()
+        client.start()
+        client.results.get(timeout=5)
+        server.join(5)
+        client.disconnect()
+        client.join(1)
+        self.assertFalse(client.is_alive())
+
+
+class GatedPool(object):
+    """Pool of workers that do not parse until the gate is opened"""
+    def __init__(self, processes=2):
+        self.pool = ThreadPool(processes)
+        self.gate = threading.Event()
+        self.submitted = 0
+
+    def apply_async(self, func, args):
+        self.submitted += 1
+        return self.pool.apply_async(self.run, (func, args))
+
+    def run(self, func, args):
+        self.gate.wait(5)
+        return func(*args)
+
+
+class WorkersTestCase(unittest.TestCase):
+    def start(self, workers, count=10):
+        self.server = FakeServer([recogout(words=i) for i in range(count)])
+        self.server.start()
+        self.client = Client(self.server.host, self.server.port, workers=workers)
+        self.client.connect()
+
+    def tearDown(self):
+        self.client.disconnect()
+        self.client.join(5)
+        self.server.join(5)
+        self.workers.pool.terminate()
+
+    def blocked(self):
+        """Whether the inflight queue is full and the reader submitted the block it waits to queue"""
+        inflight = self.client._inflight
+        return inflight is not None and inflight.full() and self.workers.submitted > self.client.inflight + 1
+
+    def test_order(self):
+        self.workers = GatedPool(4)
+        self.workers.gate.set()
+        self.start(self.workers)
+        self.client.start()
+        results = [self.client.results.get(timeout=5) for _ in range(10)]
+        self.assertEqual([len(r.words) for r in results], sorted(len(r.words) for r in results))
+
+    def test_stats(self):
+        self.workers = GatedPool()
+        self.workers.gate.set()
+        self.start(self.workers)
+        self.client.instrument()
+        self.client.start()
+        for _ in range(10):
+            self.client.results.get(timeout=5)
+        stats = self.client.stats()
+        self.assertEqual(stats['counters']['blocks'], 10)
+        self.assertEqual(stats['counters']['results'], 10)
+        self.assertEqual(stats['timers']['fastpath']['count'], 10)
+
+    def test_backpressure(self):
+        self.workers = GatedPool()
+        self.start(self.workers)
+        self.client.inflight = 2
+        self.client.start()
+        deadline = time.time() + 5
+        while not self.blocked() and time.time() < deadline:
+            time.sleep(0.01)
+        # One block being delivered, inflight blocks queued and one waiting for room: reading stops
+        # until the gate is opened as the delivery thread waits for the parsing of the first block
+        self.assertTrue(self.client._inflight.full())
+        self.assertEqual(self.workers.submitted, 4)
+        self.workers.gate.set()
+        self.assertEqual(len([self.client.results.get(timeout=5) for _ in range(10)]), 10)
+
+
+class CallTestCase(unittest.TestCase):
+    def start(self, payload=(), **kwargs):
+        self.server = FakeServer(list(payload), responses={'STATUS': status(), 'GRAMINFO': None})
+        self.server.start()
+        self.client = Client(self.server.host, self.server.port, **kwargs)
+        self.client.connect()
+        self.client.start()
+
+    def tearDown(self):
+        self.client.disconnect()
+        self.client.join(5)
+        self.server.join(5)
+
+    def test_call(self):
+        self.start()
+        for i in range(3):
+            response = self.client.call('STATUS')
+            self.assertEqual(response.result(5).get('ID'), str(i))
+
+    def test_calls(self):
+        self.start()
+        responses = self.client.calls(['STATUS'] * 5)
+        self.assertEqual([r.result(5).get('ID') for r in responses], [str(i) for i in range(5)])
+        self.assertEqual(self.server.received[0], b'STATUS\n' * 5)
+
+    def test_not_in_results(self):
+        self.start([recogout()])
+        self.client.call('STATUS').result(5)
+        self.assertEqual(self.client.results.get(timeout=5).tag, 'RECOGOUT')
+        self.assertTrue(self.client.results.empty())
+
+    def test_threads(self):
+        def echo(line):
+            return '<SYSINFO PROCESS="ACTIVE" ID="%s"/>\n.\n' % line.split()[1]
+        self.server = FakeServer([], responses={'STATUS': echo})
+        self.server.start()
+        self.client = Client(self.server.host, self.server.port)
+        self.client.connect()
+        self.client.start()
+        mismatches = []
+
+        def run(thread):
+            for i in range(50):
+                self.client.send('STATUS sent-%d-%d' % (thread, i))
+                command = 'STATUS called-%d-%d' % (thread, i)
+                response = self.client.call(command)
+                if response.result(5).get('ID') != command.split()[1]:
+                    mismatches.append(command)
+        threads = [threading.Thread(target=run, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(mismatches, [])
+        self.assertTrue(self.client.results.empty())
+        self.assertEqual(len(self.server.received[0].splitlines()), 400)
+
+    def test_allow(self):
+        self.start(allow=['RECOGOUT'])
+        self.assertEqual(self.client.call('STATUS').result(5).tag, 'SYSINFO')
+
+    def test_memoize(self):
+        self.server = FakeServer([], responses={'STATUS': b'<SYSINFO PROCESS="ACTIVE"/>\n.\n'})
+        self.server.start()
+        self.client = Client(self.server.host, self.server.port)
+        self.client.memoize(16, window=60)
+        self.client.connect()
+        self.client.start()
+        for _ in range(2):
+            self.assertEqual(self.client.call('STATUS').result(5).get('PROCESS'), 'ACTIVE')
+
+    def test_disconnect(self):
+        self.start()
+        response = self.client.call('GRAMINFO')
+        self.client.disconnect()
+        self.assertRaises(ConnectionError, response.result, 5)
+
+
 if __name__ == '__main__':
     suite = unittest.TestSuite()
     suite.addTests(map(ClientTestCase, ClientTestCase.tests))
+    for case in (SubscribeTestCase, ReplayTestCase, ReconnectTestCase, WorkersTestCase, CallTestCase):
+        suite.addTests(unittest.TestLoader().loadTestsFromTestCase(case))
     unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.core import BaseClient
+from pyjulius.correlation import Correlator
+from pyjulius.models import Sentence, Utterance
+from pyjulius.results import TimedResult
+from xml.etree.ElementTree import XML
+import unittest
+
+
+BLOCKS = [b'<INPUT STATUS="STARTREC" TIME="100"/>', b'<STARTRECOG/>', b'<INPUT STATUS="ENDREC" TIME="102"/>',
+          b'<ENDRECOG/>', b'<INPUTPARAM FRAMES="200" MSEC="2000"/>']
+RECOGOUT = b'<RECOGOUT>\n  <SHYPO RANK="1" SCORE="-10.0">\n    <WHYPO WORD="hello" CM="0.9"/>\n  </SHYPO>\n</RECOGOUT>'
+
+
+class CorrelatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.correlator = Correlator()
+
+    def feed(self, blocks):
+        return [self.correlator.feed(XML(block)) for block in blocks]
+
+    def test_utterance(self):
+        self.assertEqual(self.feed(BLOCKS), [None] * 5)
+        sentence = Sentence([], -10.0)
+        utterance = self.correlator.feed(sentence)
+        self.assertTrue(isinstance(utterance, Utterance))
+        self.assertEqual((utterance.start, utterance.end, utterance.frames, utterance.msec), (100, 102, 200, 2000))
+        self.assertTrue(utterance.recognized)
+        self.assertTrue(utterance.result is sentence)
+        self.assertTrue(utterance.started <= utterance.ended <= utterance.completed)
+        self.assertEqual(self.correlator.utterance, None)
+        self.assertEqual(self.correlator.utterances, 1)
+
+    def test_rejected(self):
+        utterance = self.feed(BLOCKS[:2] + [b'<REJECTED REASON="too short"/>'])[-1]
+        self.assertEqual((utterance.status, utterance.reason, utterance.result), ('REJECTED', 'too short', None))
+        self.assertFalse(utterance.recognized)
+
+    def test_other(self):
+        listen = XML(b'<INPUT STATUS="LISTEN" TIME="100"/>')
+        self.assertTrue(self.correlator.feed(listen) is listen)
+        self.assertEqual(self.correlator.utterance, None)
+
+    def test_restart(self):
+        self.feed(BLOCKS)
+        self.feed(BLOCKS[:1])
+        self.assertEqual(self.correlator.utterance.frames, None)
+
+    def test_timed(self):
+        timing = TimedResult(received=10.0, completed=10.5)
+        timing.result = XML(b'<ENDRECOG/>')
+        self.assertEqual(self.correlator.feed(timing), None)
+        timing = TimedResult(received=11.0, completed=11.25)
+        timing.result = XML(b'<RECOGFAIL/>')
+        self.assertTrue(self.correlator.feed(timing) is timing)
+        self.assertEqual((timing.result.status, timing.result.delay), ('RECOGFAIL', 0.75))
+
+
+class CorrelateTestCase(unittest.TestCase):
+    def test_deliver(self):
+        client = BaseClient()
+        client.correlate()
+        for block in BLOCKS + [RECOGOUT]:
+            client._deliver(client._process(block))
+        self.assertEqual(client.results.qsize(), 1)
+        utterance = client.results.get()
+        self.assertEqual(utterance.result.words[0].word, u'hello')
+
+    def test_subscribe(self):
+        client = BaseClient()
+        client.correlate()
+        utterances = []
+        client.subscribe(utterances.append, 'UTTERANCE')
+        for block in BLOCKS + [RECOGOUT]:
+            client._deliver(client._process(block))
+        self.assertEqual(len(utterances), 1)
+        self.assertEqual(client.results.qsize(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
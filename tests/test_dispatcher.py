@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+from benchmarks.fakejulius import FakeServer, recogout
+from pyjulius.core import DISCONNECTED
+import time
+import unittest
+try:
+    import asyncore
+    from pyjulius.dispatcher import DispatcherClient
+except ImportError:
+    asyncore = None
+
+
+STATUS = b'<SYSINFO PROCESS="ACTIVE"/>\n.\n'
+
+
+@unittest.skipIf(asyncore is None, 'asyncore is not available')
+class DispatcherClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.map = {}
+        self.servers = []
+
+    def tearDown(self):
+        for client in list(self.map.values()):
+            client.disconnect()
+        for server in self.servers:
+            server.join(5)
+
+    def connect(self, payload=(), **kwargs):
+        server = FakeServer(list(payload), **kwargs)
+        server.start()
+        self.servers.append(server)
+        client = DispatcherClient(server.host, server.port, map=self.map)
+        client.connect()
+        return client
+
+    def loop(self, done):
+        deadline = time.time() + 5
+        while not done() and self.map and time.time() < deadline:
+            asyncore.loop(0.05, map=self.map, count=1)
+
+    def test_results(self):
+        clients = [self.connect([recogout()]) for _ in range(2)]
+        self.loop(lambda: all(c.state == DISCONNECTED and not c.results.empty() for c in clients))
+        for client in clients:
+            self.assertEqual([result.tag for result in client], ['RECOGOUT'])
+            self.assertEqual(client.state, DISCONNECTED)
+        self.assertEqual(self.map, {})
+
+    def test_call(self):
+        client = self.connect([recogout()], responses={'STATUS': STATUS})
+        response = client.call('STATUS')
+        self.loop(lambda: response.done() and not client.results.empty())
+        self.assertEqual(response.result(0).get('PROCESS'), 'ACTIVE')
+        self.assertEqual([result.tag for result in client], ['RECOGOUT'])
+        self.assertEqual(self.servers[0].received[0], b'STATUS\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from benchmarks.fakejulius import FakeServer
+from pyjulius.core import Client
+from pyjulius.grammar import Grammar, GrammarManager
+from pyjulius.results import Response
+from xml.etree import ElementTree
+import socket
+import time
+import unittest
+
+
+class FakeClient(object):
+    """Client that answers the commands at once with :attr:`status`, or not at all if it is ``None``"""
+    encoding = 'utf-8'
+
+    def __init__(self):
+        self.sent = []
+        self.status = 'RECEIVED'
+
+    def calls(self, commands):
+        self.sent.append(commands)
+        responses = [Response(command) for command in commands]
+        if self.status is not None:
+            for response in responses:
+                response.set_result(ElementTree.Element('GRAMMAR', STATUS=self.status))
+        return responses
+
+
+class GrammarManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.manager = GrammarManager(self.client)
+        self.a = Grammar('a', '0 1 1 0 1\n', '0 [HELLO] h e l o\n')
+        self.b = Grammar('b', '0 1 1 0 1\n', '0 [WORLD] w o r l d\n')
+
+    def test_command(self):
+        self.assertEqual(self.a.command('ADDGRAM'), 'ADDGRAM a\n0 1 1 0 1\nDFAEND\n0 [HELLO] h e l o\nDICEND')
+
+    def test_load_cached(self):
+        self.manager.load([self.a, self.b])
+        self.manager.load([self.a, self.b])
+        self.assertEqual(len(self.client.sent), 1)
+        self.assertEqual([c.split()[0] for c in self.client.sent[0]], ['ADDGRAM', 'ADDGRAM'])
+
+    def test_load_changed(self):
+        self.manager.load([self.a, self.b])
+        self.manager.load([self.a, Grammar('b', '0 1 1 0 1\n', '0 [EARTH] e r th\n')])
+        self.assertEqual(self.client.sent[1][0], 'DELGRAM\nb')
+        self.assertEqual(self.client.sent[1][1].split('\n')[0], 'ADDGRAM b')
+
+    def test_invalidate(self):
+        self.manager.load([self.a])
+        self.manager.invalidate()
+        self.manager.load([self.a])
+        self.assertEqual(len(self.client.sent), 2)
+
+    def test_remove(self):
+        self.manager.load([self.a, self.b])
+        self.manager.remove(['a', 'b'])
+        self.assertEqual(self.client.sent[1], ['DELGRAM\na b'])
+        self.assertEqual(self.manager.loaded, {})
+
+    def test_switch(self):
+        self.manager.switch(['a', 'b'], ['c'])
+        self.assertEqual(self.client.sent, [['DEACTIVATEGRAM\nc', 'ACTIVATEGRAM\na b']])
+
+    def test_add_words(self):
+        self.manager.load([self.a])
+        self.manager.add_words('a', '1 [WORLD] w o r l d\n')
+        self.assertEqual(self.client.sent[1], ['ADDWORD\na\n1 [WORLD] w o r l d\nDICEND'])
+        self.manager.load([self.a])
+        self.assertEqual(self.client.sent[2][0], 'DELGRAM\na')
+
+    def test_rejected(self):
+        self.client.status = 'ERROR'
+        self.manager.load([self.a])
+        self.assertEqual(self.manager.loaded, {})
+        self.client.status = 'RECEIVED'
+        self.manager.load([self.a])
+        self.assertEqual(self.client.sent[1], [self.a.command('ADDGRAM')])
+        self.assertEqual(self.manager.loaded, {'a': self.a.digest})
+
+    def test_pending(self):
+        self.client.status = None
+        responses = self.manager.load([self.a])
+        self.manager.load([self.a])
+        self.assertEqual(len(self.client.sent), 1)
+        self.assertEqual(self.manager.loaded, {})
+        responses[0].set_result(ElementTree.Element('GRAMMAR', STATUS='RECEIVED'))
+        self.assertEqual(self.manager.loaded, {'a': self.a.digest})
+
+    def test_reload(self):
+        self.manager.load([self.a, self.b])
+        self.manager.add_words('a', '1 [WORLD] w o r l d\n')
+        self.manager.reload()
+        self.assertEqual(self.client.sent[2], ['DELGRAM\na b', self.a.command('ADDGRAM'),
+                                               'ADDWORD\na\n1 [WORLD] w o r l d\nDICEND', self.b.command('ADDGRAM')])
+        self.assertEqual(sorted(self.manager.loaded), ['a', 'b'])
+
+
+class GrammarSocketTestCase(unittest.TestCase):
+    def test_wire(self):
+        server = FakeServer([])
+        server.start()
+        client = Client(server.host, server.port)
+        client.connect()
+        manager = GrammarManager(client)
+        manager.load([Grammar('a', '0 1 1 0 1\n', '0 [HELLO] h e l o\n')])
+        manager.remove(['a', 'b'])
+        manager.switch(['c'], ['d'])
+        client.disconnect()
+        server.join(5)
+        self.assertEqual(server.received[0], b'ADDGRAM a\n0 1 1 0 1\nDFAEND\n0 [HELLO] h e l o\nDICEND\n'
+                                             b'DELGRAM\na b\nDEACTIVATEGRAM\nd\nACTIVATEGRAM\nc\n')
+
+    def test_reconnect(self):
+        received = b'<GRAMMAR STATUS="RECEIVED"/>\n.\n'
+        server = FakeServer([], connections=2, responses={'ADDGRAM': received, 'DELGRAM': received,
+                                                          'STATUS': b'<SYSINFO PROCESS="ACTIVE"/>\n.\n'})
+        server.start()
+        client = Client(server.host, server.port, reconnect=True)
+        client.reconnect_delay = 0.01
+        client.connect()
+        client.start()
+        manager = GrammarManager(client)
+        grammar = Grammar('a', '0 1 1 0 1\n', '0 [HELLO] h e l o\n')
+        manager.load([grammar])[0].result(5)
+        client.sock.shutdown(socket.SHUT_RDWR)
+        deadline = time.time() + 5
+        while not client.reconnects and time.time() < deadline:
+            time.sleep(0.01)
+        client.call('STATUS').result(5)
+        client.disconnect()
+        client.join(5)
+        server.join(5)
+        self.assertEqual(server.received[1], ('DELGRAM\na\n%s\nSTATUS\n' % grammar.command('ADDGRAM')).encode('ascii'))
+        self.assertEqual(manager.loaded, {'a': grammar.digest})
+
+
+if __name__ == '__main__':
+    unittest.main()
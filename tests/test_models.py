@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius import models
+from pyjulius.compat import text_type
+from pyjulius.models import PartialSentence, Recognition, Sentence, SentenceBatch, Word
+from pyjulius.parser import escape
+from pyjulius.results import TimedResult
+from xml.etree.ElementTree import XML
+import unittest
+
+
+RECOGOUT = '''<RECOGOUT>
+  <SHYPO RANK="1" SCORE="-6737.229004" GRAM="0" AMSCORE="-6700.5" LMSCORE="-36.7">
+    <WHYPO WORD="<s>" CLASSID="39" PHONE="silB" CM="1.000"/>
+    <WHYPO WORD="HELLO" CLASSID="2" PHONE="h e l o" CM="0.873"/>
+    <WHYPO WORD="WORLD" CLASSID="5" PHONE="w o r l d" CM="0.512"/>
+    <WHYPO WORD="</s>" CLASSID="40" PHONE="silE" CM="1.000"/>
+  </SHYPO>
+  <SHYPO RANK="2" SCORE="-6790.000000" GRAM="1">
+    <WHYPO WORD="<s>" CLASSID="39" PHONE="silB" CM="1.000"/>
+    <WHYPO WORD="YELLOW" CLASSID="3" PHONE="y e l o" CM="0.127"/>
+    <WHYPO WORD="</s>" CLASSID="40" PHONE="silE" CM="1.000"/>
+  </SHYPO>
+</RECOGOUT>'''
+
+PHYPO = b'''<RECOGOUT>
+  <PHYPO PASS="1" SCORE="-1234.5" FRAME="57" TIME="1234">
+    <WHYPO WORD="<s>" CLASSID="39" PHONE="silB"/>
+    <WHYPO WORD="HELLO" CLASSID="2" PHONE="h e l o"/>
+  </PHYPO>
+</RECOGOUT>'''
+
+
+class PartialSentenceTestCase(unittest.TestCase):
+    def test_from_phypo(self):
+        sentence = PartialSentence.from_phypo(XML(escape(PHYPO)).find('PHYPO'))
+        self.assertEqual((sentence.score, sentence.frame, sentence.time), (-1234.5, 57, 1234))
+        self.assertEqual(text_type(sentence), u'hello')
+        self.assertEqual(sentence.words[0].confidence, 0.0)
+        self.assertEqual((sentence.tag, sentence.final), ('PARTIAL', False))
+        self.assertTrue(Sentence([]).final)
+
+
+class RecognitionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.xml = XML(escape(RECOGOUT))
+        self.recognition = Recognition.from_recogout(self.xml)
+
+    def test_nbest(self):
+        self.assertEqual(len(self.recognition), 2)
+        self.assertEqual([h.rank for h in self.recognition], [1, 2])
+        self.assertEqual([h.gram for h in self.recognition], [0, 1])
+        self.assertEqual(self.recognition[1].amscore, None)
+
+    def test_best(self):
+        best = self.recognition.best
+        sentence = Sentence.from_shypo(self.xml.find('SHYPO'))
+        self.assertEqual(text_type(best), text_type(sentence))
+        self.assertEqual(best.score, sentence.score)
+        self.assertEqual([w.confidence for w in best.words], [w.confidence for w in sentence.words])
+        self.assertEqual((best.amscore, best.lmscore), (-6700.5, -36.7))
+
+    def test_best_cached(self):
+        best = self.recognition.best
+        self.assertTrue(self.recognition.best is best)
+        self.assertTrue(best.words is best.words)
+        self.assertTrue(self.recognition[0] is best)
+        self.assertEqual(Recognition.from_recogout(XML('<RECOGOUT/>')).best, None)
+
+    def test_words(self):
+        word = self.recognition.best.words[1]
+        self.assertEqual((word.word, word.classid, word.phone), (u'WORLD', u'5', u'w o r l d'))
+        self.assertEqual(word.begin, None)
+
+
+class SentenceBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        sentences = [Sentence([Word(u'a', 0.9), Word(u'b', 0.5)], -10.0),
+                     Sentence([], -5.0),
+                     Sentence([Word(u'c', 0.8)], -20.0),
+                     Sentence([Word(u'a', 0.7), Word(u'c', 0.6)], -5.0),
+                     Sentence([], -1.0)]
+        self.batch = SentenceBatch.from_results(sentences + [Recognition.from_recogout(XML(escape(RECOGOUT))), None,
+                                                             PartialSentence([Word(u'a', 0.0)], -1.0)])
+
+    def assertValues(self, values, expected):
+        values = list(values)
+        self.assertEqual(len(values), len(expected))
+        for value, e in zip(values, expected):
+            if e is None:
+                self.assertTrue(value != value)  # NaN
+            else:
+                self.assertAlmostEqual(value, e)
+
+    def test_from_results(self):
+        self.assertEqual(len(self.batch), 6)
+        self.assertEqual(text_type(self.batch[5]), u'hello world')
+
+    def test_from_timed_results(self):
+        timed = TimedResult()
+        timed.result = self.batch[0]
+        self.assertEqual(text_type(SentenceBatch.from_results([timed])[0]), text_type(self.batch[0]))
+
+    def test_confidences(self):
+        self.assertValues(self.batch.mean_confidences(), [0.7, None, 0.8, 0.65, None, 0.6925])
+        self.assertValues(self.batch.min_confidences(), [0.5, None, 0.8, 0.6, None, 0.512])
+
+    def test_filter(self):
+        self.assertEqual(list(self.batch.filter()), list(range(6)))
+        self.assertEqual(list(self.batch.filter(min_score=-10)), [0, 1, 3, 4])
+        self.assertEqual(list(self.batch.filter(min_confidence=0.55)), [2, 3])
+        self.assertEqual(list(self.batch.filter(min_score=-10, mean_confidence=0.6)), [0, 3])
+
+    def test_top(self):
+        self.assertEqual(list(self.batch.top(3)), [4, 1, 3])
+        self.assertEqual(list(self.batch.top(2, self.batch.filter(min_confidence=0))), [3, 0])
+        self.assertEqual(list(self.batch.top(2, [])), [])
+
+    def test_select(self):
+        sentences = self.batch.select(self.batch.top(1, self.batch.filter(min_confidence=0)))
+        self.assertEqual(len(sentences), 1)
+        self.assertEqual(type(sentences[0]), Sentence)
+        self.assertEqual(sentences[0].score, -5.0)
+        self.assertEqual([(w.word, w.confidence) for w in sentences[0].words], [(u'a', 0.7), (u'c', 0.6)])
+
+    def test_empty(self):
+        batch = SentenceBatch()
+        self.assertEqual(list(batch.mean_confidences()), [])
+        self.assertEqual(list(batch.filter(min_confidence=0.5)), [])
+        self.assertEqual(list(batch.top(3)), [])
+
+
+class PureSentenceBatchTestCase(SentenceBatchTestCase):
+    """Same as :class:`SentenceBatchTestCase` without :mod:`numpy`"""
+    def setUp(self):
+        self.numpy, models.numpy = models.numpy, None
+        SentenceBatchTestCase.setUp(self)
+
+    def tearDown(self):
+        models.numpy = self.numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.models import PartialSentence, Sentence, SentenceBatch
+from pyjulius.parser import StreamParser, escape, parse_batch, parse_recogout, sniff
+from xml.etree.ElementTree import XML
+import random
+import unittest
+
+
+class StreamParserTestCase(unittest.TestCase):
+    def setUp(self):
+        self.parser = StreamParser()
+
+    def test_escape(self):
+        self.assertEqual(escape(b'<WHYPO WORD="<s>"/><WHYPO WORD="</s>"/>'), b'<WHYPO WORD="&lt;s&gt;"/><WHYPO WORD="&lt;/s&gt;"/>')
+        self.assertEqual(escape(u'<WHYPO WORD="<s>"/>'), u'<WHYPO WORD="&lt;s&gt;"/>')
+
+    def test_element_closed(self):
+        self.assertEqual(self.parser.feed(b'<RECOGOUT>\n  <SHYPO RANK="1" SCORE="-1.0">\n'), [])
+        self.assertEqual(self.parser.feed(b'    <WHYPO WORD="<s>" CM="1.000"/>\n  </SHYPO>\n'), [])
+        elements = self.parser.feed(b'</RECOGOUT>\n.\n<INPUT STATUS="LISTEN" TIME="1"/>\n.\n')
+        self.assertEqual([e.tag for e in elements], ['RECOGOUT', 'INPUT'])
+        self.assertEqual(elements[0].find('SHYPO/WHYPO').get('WORD'), '<s>')
+        self.assertEqual(elements[1].get('STATUS'), 'LISTEN')
+
+
+    def test_accept(self):
+        parser = StreamParser(accept=lambda tag: tag != 'STARTPROC')
+        elements = parser.feed(b'<STARTPROC/>\n.\n<INPUT STATUS="LISTEN" TIME="1"/>\n.\n')
+        self.assertEqual([e.tag for e in elements], ['INPUT'])
+
+
+class SniffTestCase(unittest.TestCase):
+    def test_sniff(self):
+        self.assertEqual(sniff(b'<RECOGOUT>\n  <SHYPO RANK="1">'), 'RECOGOUT')
+        self.assertEqual(sniff(b'<INPUT STATUS="LISTEN" TIME="1"/>'), 'INPUT')
+        self.assertEqual(sniff(b'<STARTPROC/>'), 'STARTPROC')
+        self.assertEqual(sniff(b''), None)
+
+
+class ParseRecogoutTestCase(unittest.TestCase):
+    def recogout(self, rng):
+        lines = ['<RECOGOUT>']
+        for rank in range(1, rng.randint(1, 3) + 1):
+            lines.append('  <SHYPO RANK="%d" SCORE="%f" GRAM="%d">' % (rank, rng.uniform(-9000, 0), rng.randint(0, 3)))
+            lines.append('    <WHYPO WORD="<s>" CLASSID="<s>" PHONE="silB" CM="1.000"/>')
+            for _ in range(rng.randint(0, 8)):
+                word = rng.choice(['HELLO', 'WORLD', 'ONE', "DON'T", 'A-B'])
+                lines.append('    <WHYPO WORD="%s" CLASSID="%s" PHONE="h e" CM="%.3f"/>' % (word, word, rng.random()))
+            lines.append('    <WHYPO WORD="</s>" CLASSID="</s>" PHONE="silE" CM="1.000"/>')
+            lines.append('  </SHYPO>')
+        lines.append('</RECOGOUT>')
+        return '\n'.join(lines).encode('utf-8')
+
+    def assertSameSentence(self, block):
+        expected = Sentence.from_shypo(XML(escape(block)).find('SHYPO'))
+        sentence = parse_recogout(block)
+        self.assertEqual(sentence.score, expected.score)
+        self.assertEqual([(w.word, w.confidence) for w in sentence.words], [(w.word, w.confidence) for w in expected.words])
+
+    def test_differential(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            self.assertSameSentence(self.recogout(rng))
+
+    def test_encoding(self):
+        block = u'<RECOGOUT><SHYPO SCORE="-1.0"><WHYPO WORD="caf\xe9" CM="0.5"/></SHYPO></RECOGOUT>'.encode('utf-8')
+        self.assertSameSentence(block)
+        self.assertEqual(parse_recogout(block).words[0].word, u'caf\xe9')
+
+    def test_partial(self):
+        block = b'<RECOGOUT>\n  <PHYPO PASS="1" SCORE="-12.5" FRAME="40" TIME="800">\n    <WHYPO WORD="<s>" CLASSID="39" PHONE="silB"/>\n    <WHYPO WORD="HELLO" CLASSID="2" PHONE="h e l o"/>\n  </PHYPO>\n</RECOGOUT>'
+        sentence = parse_recogout(block)
+        expected = PartialSentence.from_phypo(XML(escape(block)).find('PHYPO'))
+        self.assertTrue(isinstance(sentence, PartialSentence))
+        self.assertEqual((sentence.score, sentence.frame, sentence.time), (expected.score, expected.frame, expected.time))
+        self.assertEqual([(w.word, w.confidence) for w in sentence.words], [(w.word, w.confidence) for w in expected.words])
+
+    def test_fallback(self):
+        self.assertEqual(parse_recogout(b'<RECOGOUT><SHYPO SCORE="-1.0"><WHYPO WORD="A&amp;B" CM="0.5"/></SHYPO></RECOGOUT>'), None)
+        self.assertEqual(parse_recogout(b'<RECOGOUT><SHYPO SCORE="-1.0"><OTHER/></SHYPO></RECOGOUT>'), None)
+        self.assertEqual(parse_recogout(b'<RECOGOUT><SHYPO RANK="1"><WHYPO WORD="A" CM="0.5"/></SHYPO></RECOGOUT>'), None)
+        self.assertEqual(parse_recogout(b'<RECOGOUT><SHYPO SCORE="-1.0"><WHYPO WORD="A"/></SHYPO></RECOGOUT>'), None)
+        self.assertEqual(parse_recogout(b'<RECOGOUT><SHYPO SCORE="-1.0"><WHYPO WORD="A" CM="0.5"/></PHYPO></RECOGOUT>'), None)
+
+
+class ParseBatchTestCase(unittest.TestCase):
+    def test_batch(self):
+        rng = random.Random(42)
+        blocks = [ParseRecogoutTestCase('recogout').recogout(rng) for _ in range(20)]
+        batch = parse_batch(blocks)
+        expected = SentenceBatch([parse_recogout(block) for block in blocks])
+        self.assertEqual(list(batch.scores), list(expected.scores))
+        self.assertEqual(list(batch.offsets), list(expected.offsets))
+        self.assertEqual(list(batch.confidences), list(expected.confidences))
+        self.assertEqual([batch.vocabulary[i] for i in batch.words], [expected.vocabulary[i] for i in expected.words])
+
+    def test_blocks(self):
+        blocks = [(b'<RECOGOUT><SHYPO SCORE="-1.0"><WHYPO WORD="A" CM="0.5"/></SHYPO></RECOGOUT>', 10.0),
+                  (b'<RECOGOUT><SHYPO SCORE="-2.0"><WHYPO WORD="A&amp;B" CM="0.5"/></SHYPO></RECOGOUT>', 11.0),
+                  (b'<RECOGOUT><PHYPO SCORE="-3.0"><WHYPO WORD="A"/></PHYPO></RECOGOUT>', 12.0),
+                  (b'<INPUT STATUS="LISTEN" TIME="1"/>', 13.0), (b'<RECOGOUT><SHYPO', 14.0)]
+        batch = parse_batch(blocks)
+        self.assertEqual(list(batch.scores), [-1.0, -2.0])
+        self.assertEqual(list(batch.timestamps), [10.0, 11.0])
+        self.assertEqual([[w.word for w in s.words] for s in batch.select(range(2))], [['A'], ['A&B']])
+
+    def test_existing(self):
+        batch = SentenceBatch([Sentence([], -1.0)])
+        self.assertTrue(parse_batch([b'<RECOGOUT><SHYPO SCORE="-2.0"></SHYPO></RECOGOUT>'], batch=batch) is batch)
+        self.assertEqual(list(batch.scores), [-1.0, -2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from benchmarks.fakejulius import FakeServer, recogout
+from pyjulius.compat import PY2
+from pyjulius.models import PartialSentence
+from pyjulius.pool import ClientPool, PoolClient
+from pyjulius.results import COALESCE
+from xml.etree.ElementTree import XML
+import socket
+import time
+import unittest
+
+
+class ClientPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = ClientPool()
+        self.pool.start()
+
+    def tearDown(self):
+        self.pool.stop()
+        self.pool.join(5)
+        self.pool.close()
+
+    def serve(self, count=2):
+        servers = [FakeServer([recogout()]) for _ in range(count)]
+        for server in servers:
+            server.start()
+        return [self.pool.add(server.host, server.port) for server in servers]
+
+    def test_shared(self):
+        names = self.serve()
+        results = [self.pool.results.get(timeout=5) for _ in range(2)]
+        self.assertEqual(sorted(name for name, _ in results), sorted(names))
+        self.assertEqual([result.tag for _, result in results], ['RECOGOUT', 'RECOGOUT'])
+
+    def test_separate(self):
+        self.pool.shared = False
+        for name in self.serve():
+            self.assertEqual(self.pool.clients[name].results.get(timeout=5).tag, 'RECOGOUT')
+        self.assertTrue(self.pool.results.empty())
+
+    def test_send(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(('localhost', 0))
+        listener.listen(1)
+        name = self.pool.add(*listener.getsockname()[:2])
+        conn, _ = listener.accept()
+        self.pool.send(name, 'STATUS')
+        conn.settimeout(5)
+        self.assertEqual(conn.recv(4096), b'STATUS\n')
+        conn.close()
+        listener.close()
+
+    def test_call(self):
+        server = FakeServer([recogout()], responses={'STATUS': b'<SYSINFO PROCESS="ACTIVE"/>\n.\n'})
+        server.start()
+        name = self.pool.add(server.host, server.port)
+        self.assertEqual(self.pool.call(name, 'STATUS').result(5).tag, 'SYSINFO')
+        self.assertEqual(self.pool.results.get(timeout=5)[1].tag, 'RECOGOUT')
+        self.assertTrue(self.pool.results.empty())
+
+    def test_remove(self):
+        names = self.serve()
+        self.pool.remove(names[0])
+        self.assertEqual(list(self.pool.clients), names[1:])
+        self.assertRaises(ValueError, self.pool.add, 'localhost', 1, names[1])
+
+    def test_close(self):
+        self.serve()
+        self.pool.stop()
+        self.pool.join(5)
+        self.pool.close()
+        self.assertEqual(self.pool.clients, {})
+
+
+class PollTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = ClientPool()
+        self.sockets = []
+
+    def tearDown(self):
+        self.pool.close()
+        for sock in self.sockets:
+            sock.close()
+
+    def poll(self):
+        deadline = time.time() + 5
+        while self.pool.results.empty() and time.time() < deadline:
+            self.pool._poll(0.1)
+        return self.pool.results.get_nowait()
+
+    def test_unregister(self):
+        server = FakeServer([recogout()], responses={'STATUS': None})
+        server.start()
+        name = self.pool.add(server.host, server.port)
+        client = self.pool.clients[name]
+        self.assertEqual(self.poll()[1].tag, 'RECOGOUT')
+        self.pool.remove(name)
+        self.assertRaises((KeyError, ValueError), self.pool._selector.get_key, client)
+        server.join(5)
+
+    @unittest.skipIf(PY2, 'select.select is limited to FD_SETSIZE descriptors')
+    def test_many_descriptors(self):
+        while not self.sockets or self.sockets[-1].fileno() < 1100:
+            self.sockets.append(socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+        server = FakeServer([recogout()])
+        server.start()
+        name = self.pool.add(server.host, server.port)
+        self.assertTrue(self.pool.clients[name].fileno() > 1024)
+        self.assertEqual(self.poll()[1].tag, 'RECOGOUT')
+        self.pool.remove(name)
+        server.join(5)
+
+
+class SharedQueueTestCase(unittest.TestCase):
+    def deliver(self, pool, results):
+        clients = dict((name, PoolClient(pool, name, 'localhost', 10500)) for name in ('a', 'b'))
+        for name, result in results:
+            clients[name]._deliver(result)
+        return [(name, result.tag) for name, result in pool.results.drain()]
+
+    def test_latest(self):
+        pool = ClientPool()
+        results = [(name, PartialSentence([], -float(i))) for i in range(5) for name in ('a', 'b')]
+        self.assertEqual(self.deliver(pool, results), [('a', 'PARTIAL'), ('b', 'PARTIAL')])
+        self.assertEqual(pool.results.coalesced, 8)
+        pool.close()
+
+    def test_coalesce(self):
+        pool = ClientPool(maxsize=10, policy=COALESCE)
+        results = [(name, XML('<INPUT STATUS="LISTEN"/>')) for _ in range(3) for name in ('a', 'b')]
+        results.append(('a', XML('<SYSINFO/>')))
+        self.assertEqual(self.deliver(pool, results), [('a', 'INPUT'), ('b', 'INPUT'), ('a', 'SYSINFO')])
+        self.assertEqual(pool.results.coalesced, 4)
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
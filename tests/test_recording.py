@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.core import ReplayClient
+from pyjulius.exceptions import ConnectionError
+from pyjulius.models import Sentence
+from pyjulius.recording import Recorder, Recording
+import os
+import shutil
+import tempfile
+import unittest
+
+
+RECOGOUT = b'<RECOGOUT>\n  <SHYPO RANK="1" SCORE="-10.0">\n    <WHYPO WORD="hello" CM="0.9"/>\n  </SHYPO>\n</RECOGOUT>\n.\n'
+INPUT = b'<INPUT STATUS="LISTEN" TIME="1"/>\n.\n'
+
+
+class RecordingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'julius.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, *chunks):
+        recorder = Recorder(self.path)
+        for timestamp, chunk in enumerate(chunks):
+            recorder.write(chunk, float(timestamp))
+        recorder.close()
+
+    def test_blocks(self):
+        self.record(b'<A/>\n.\n<B>\n</B>\n.\n')
+        recording = Recording(self.path)
+        self.assertEqual(len(recording), 2)
+        self.assertEqual(list(recording), [(b'<A/>', 0.0), (b'<B>\n</B>', 0.0)])
+        recording.close()
+
+    def test_split(self):
+        data = b'<A/>\n.\n.\n<B/>\n.\n'
+        self.record(*[data[i:i + 1] for i in range(len(data))])
+        recording = Recording(self.path)
+        self.assertEqual([block for block, _ in recording], [b'<A/>', b'', b'<B/>'])
+        self.assertEqual(recording[-1], (b'<B/>', 15.0))
+        self.assertRaises(IndexError, recording.__getitem__, 3)
+        recording.close()
+
+    def test_append(self):
+        self.record(b'<A/>\n.\n<B')
+        recorder = Recorder(self.path)
+        recorder.write(b'<C/>\n.\n')
+        recorder.close()
+        recording = Recording(self.path)
+        self.assertEqual([block for block, _ in recording], [b'<A/>', b'<C/>'])
+        recording.close()
+
+    def test_reset(self):
+        recorder = Recorder(self.path)
+        recorder.write(b'<A/>\n.\n<B')
+        recorder.reset()
+        recorder.write(b'<C/>\n.\n')
+        recorder.close()
+        recording = Recording(self.path)
+        self.assertEqual([block for block, _ in recording], [b'<A/>', b'<C/>'])
+        self.assertEqual(open(self.path, 'rb').read(), b'<A/>\n.\n<B<C/>\n.\n')
+        recording.close()
+
+    def test_empty(self):
+        open(self.path, 'w').close()
+        open(self.path + '.idx', 'w').close()
+        recording = Recording(self.path)
+        self.assertEqual(len(recording), 0)
+        recording.close()
+
+    def test_replay(self):
+        self.record(RECOGOUT + INPUT, RECOGOUT)
+        client = ReplayClient(self.path, deny=['INPUT'])
+        client.start()
+        client.join()
+        self.assertEqual(client.results.qsize(), 2)
+        sentence = client.results.get()
+        self.assertTrue(isinstance(sentence, Sentence))
+        self.assertEqual(sentence.words[0].word, 'hello')
+
+    def test_replay_timing(self):
+        self.record(RECOGOUT, RECOGOUT)
+        client = ReplayClient(self.path, speed=20.0)
+        client.start()
+        client.join(0.01)
+        self.assertTrue(client.is_alive())
+        client.join()
+        self.assertEqual(client.results.qsize(), 2)
+
+    def test_replay_send(self):
+        self.record(RECOGOUT)
+        client = ReplayClient(self.path)
+        self.assertRaises(ConnectionError, client.send, 'STATUS')
+        self.assertRaises(ConnectionError, client.call, 'STATUS')
+        self.assertRaises(ConnectionError, client.calls, ['STATUS'])
+        client.start()
+        client.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
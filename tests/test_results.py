@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.compat import queue as Queue
+from pyjulius.core import BaseClient
+from pyjulius.models import PartialSentence, Sentence
+from pyjulius.results import BLOCK, COALESCE, DROP_NEWEST, DROP_OLDEST, ResultQueue, TimedResult
+from xml.etree.ElementTree import Element
+import unittest
+
+
+class ResultQueueTestCase(unittest.TestCase):
+    def drain(self, queue):
+        items = []
+        while not queue.empty():
+            items.append(queue.get())
+            queue.task_done()
+        return items
+
+    def test_block(self):
+        queue = ResultQueue(2, BLOCK)
+        queue.put(1)
+        queue.put(2)
+        self.assertRaises(Queue.Full, queue.put, 3, False)
+
+    def test_drop_oldest(self):
+        queue = ResultQueue(2, DROP_OLDEST)
+        for i in range(5):
+            queue.put(i)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual(self.drain(queue), [3, 4])
+        queue.join()
+
+    def test_drop_newest(self):
+        queue = ResultQueue(2, DROP_NEWEST)
+        for i in range(5):
+            queue.put(i)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual(self.drain(queue), [0, 1])
+
+    def test_coalesce(self):
+        queue = ResultQueue(3, COALESCE)
+        inputs = [Element('INPUT', STATUS=status) for status in ('LISTEN', 'STARTREC', 'ENDREC')]
+        queue.put(inputs[0])
+        queue.put(Element('RECOGOUT'))
+        queue.put(inputs[1])
+        queue.put(inputs[2])
+        self.assertEqual(queue.coalesced, 2)
+        self.assertEqual(queue.dropped, 0)
+        self.assertEqual([e.get('STATUS') for e in self.drain(queue)], [None, 'ENDREC'])
+        queue.join()
+
+    def test_latest(self):
+        queue = ResultQueue(2, BLOCK)
+        partials = [PartialSentence([], -float(i)) for i in range(3)]
+        queue.put(partials[0])
+        queue.put(partials[1])
+        self.assertEqual(queue.coalesced, 1)
+        queue.put(Element('RECOGOUT'))
+        queue.put(partials[2], False)
+        self.assertEqual(self.drain(queue)[0].tag, 'RECOGOUT')
+        self.assertEqual(queue.coalesced, 2)
+        queue.join()
+
+    def test_drain(self):
+        queue = ResultQueue(3, BLOCK)
+        for i in range(3):
+            queue.put(i)
+        self.assertEqual(queue.drain(2), [0, 1])
+        queue.put(3, False)
+        self.assertEqual(queue.drain(), [2, 3])
+        self.assertEqual(queue.drain(), [])
+        self.assertRaises(Queue.Empty, queue.drain, block=True, timeout=0.01)
+
+
+class TimedResultTestCase(unittest.TestCase):
+    def test_stages(self):
+        timing = TimedResult(received=10.0, completed=10.5, speech_end=8.0)
+        timing.result = Element('RECOGOUT')
+        timing.parsed, timing.enqueued = 11.0, 11.25
+        self.assertEqual(timing.tag, 'RECOGOUT')
+        self.assertEqual(timing.latency, 3.25)
+        self.assertEqual(timing.stages(), {'recognizer': 2.0, 'network': 0.5, 'parse': 0.5, 'deliver': 0.25, 'total': 3.25})
+
+    def test_no_speech(self):
+        timing = TimedResult(received=10.0, completed=10.0)
+        timing.parsed, timing.enqueued = 10.5, 11.0
+        self.assertEqual(timing.latency, 1.0)
+        self.assertTrue('recognizer' not in timing.stages())
+
+
+class ProgressiveTestCase(unittest.TestCase):
+    def test_disabled(self):
+        client = BaseClient()
+        client.progressive(False)
+        client._deliver(PartialSentence([], -1.0))
+        client._deliver(Sentence([], -1.0))
+        self.assertEqual([r.tag for r in client.results.drain()], ['RECOGOUT'])
+
+    def test_interval(self):
+        client = BaseClient()
+        client.progressive(interval=60)
+        for i in range(3):
+            client._deliver(PartialSentence([], -float(i)))
+        self.assertEqual([r.score for r in client.results.drain()], [-0.0])
+        client._deliver(Sentence([], -1.0))
+        client._deliver(PartialSentence([], -3.0))
+        self.assertEqual([r.final for r in client.results.drain()], [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
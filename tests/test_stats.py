@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.core import BaseClient
+from pyjulius.stats import BlockStats, Histogram, RollingHistogram, Stats
+import threading
+import unittest
+
+
+class HistogramTestCase(unittest.TestCase):
+    def test_percentile(self):
+        histogram = Histogram()
+        for i in range(1, 101):
+            histogram.add(i / 1000.0)
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.total, 5.05)
+        self.assertEqual(histogram.max, 0.1)
+        for p, value in ((50, 0.05), (90, 0.09), (99, 0.099)):
+            self.assertTrue(value <= histogram.percentile(p) <= value * 1.25)
+        self.assertEqual(histogram.percentile(100), 0.1)
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+    def test_overflow(self):
+        histogram = Histogram(maximum=1.0)
+        histogram.add(5.0)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.percentile(50), 5.0)
+
+    def test_merge(self):
+        a, b = Histogram(), Histogram()
+        a.add(0.001)
+        b.add(0.002)
+        b.add(0.004)
+        a.merge(b)
+        self.assertEqual((a.count, a.max), (3, 0.004))
+        self.assertAlmostEqual(a.total, 0.007)
+
+
+class RollingHistogramTestCase(unittest.TestCase):
+    def test_window(self):
+        histogram = RollingHistogram(window=10.0, slots=5)
+        histogram.add(0.001, now=100.0)
+        histogram.add(0.002, now=105.0)
+        self.assertEqual(histogram.snapshot(now=105.0)['count'], 2)
+        self.assertEqual(histogram.snapshot(now=110.0)['count'], 1)
+        histogram.add(0.003, now=121.0)
+        self.assertEqual(histogram.snapshot(now=121.0)['count'], 1)
+        self.assertEqual(histogram.snapshot(now=140.0)['count'], 0)
+
+
+class StatsTestCase(unittest.TestCase):
+    def test_counters(self):
+        stats = Stats()
+        stats.count('blocks')
+        stats.count('blocks')
+        stats.count('bytes', 42)
+        self.assertEqual(stats.snapshot()['counters'], {'blocks': 2, 'bytes': 42})
+
+    def test_timers(self):
+        stats = Stats()
+        stats.time('parse', 0.001)
+        stats.time('parse', 0.003)
+        timer = stats.snapshot()['timers']['parse']
+        self.assertEqual((timer['count'], timer['max']), (2, 0.003))
+        self.assertAlmostEqual(timer['mean'], 0.002)
+        self.assertEqual(sorted(timer), ['count', 'max', 'mean', 'p50', 'p90', 'p99', 'total'])
+
+    def test_merge(self):
+        stats = Stats()
+        stats.count('blocks')
+        block = BlockStats()
+        block.count('blocks')
+        block.time('parse', 0.001)
+        block.time('modelize', 0.002)
+        stats.merge(block)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['counters'], {'blocks': 2})
+        self.assertEqual(dict((name, timer['count']) for name, timer in snapshot['timers'].items()), {'parse': 1, 'modelize': 1})
+
+    def test_tick(self):
+        exported = []
+        stats = Stats(exported.append, interval=60)
+        stats.tick()
+        self.assertEqual(exported, [])
+        stats.interval = 0
+        stats.count('results')
+        stats.tick()
+        self.assertEqual([e['counters'] for e in exported], [{'results': 1}])
+
+    def test_exporter_error(self):
+        def exporter(snapshot):
+            raise ValueError()
+        stats = Stats(exporter, interval=0)
+        stats.tick()
+
+    def test_threads(self):
+        stats = Stats()
+
+        def update(n):
+            for i in range(2000):
+                stats.count('results')
+                stats.time('timer%d' % (i % 50), 0.001)
+        threads = [threading.Thread(target=update, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            stats.snapshot()
+        for thread in threads:
+            thread.join()
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['counters']['results'], 8000)
+        self.assertEqual(sum(timer['count'] for timer in snapshot['timers'].values()), 8000)
+
+
+class InstrumentTestCase(unittest.TestCase):
+    def test_instrument(self):
+        client = BaseClient()
+        self.assertEqual(client.stats()['counters'], {})
+        client.instrument()
+        client._deliver(client._process(b'<INPUT STATUS="LISTEN" TIME="1"/>'))
+        snapshot = client.stats()
+        self.assertEqual(snapshot['counters'], {'blocks': 1, 'results': 1})
+        self.assertEqual(sorted(snapshot['timers']), ['deliver', 'modelize', 'parse'])
+        self.assertEqual(snapshot['queue']['size'], 1)
+        client.instrument(False)
+        self.assertEqual(client.stats()['counters'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Copyright 2011-2012 Antoine Bertin <diaoulael@gmail.com>
+#
+# This file is part of pyjulius.
+#
+# pyjulius is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pyjulius is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pyjulius.  If not, see <http://www.gnu.org/licenses/>.
+from pyjulius.stream import BlockReader, Wakeup
+import socket
+import threading
+import time
+import unittest
+
+
+class BlockReaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server, client = socket.socketpair()
+        self.reader = BlockReader(client, bufsize=16)
+
+    def tearDown(self):
+        self.server.close()
+        self.reader.sock.close()
+
+    def feed(self, data):
+        self.server.sendall(data)
+        received = 0
+        while received < len(data):
+            received += self.reader.fill()
+
+    def test_blocks(self):
+        self.feed(b'<A/>\n.\n<B>\n</B>\n.\n<C')
+        self.assertEqual(self.reader.readblock(), b'<A/>')
+        self.assertEqual(self.reader.readblock(), b'<B>\n</B>')
+        self.assertEqual(self.reader.readblock(), None)
+        self.feed(b'/>\n.\n')
+        self.assertEqual(self.reader.readblock(), b'<C/>')
+        self.assertEqual(self.reader.buffer, b'')
+
+    def test_terminator_split(self):
+        self.feed(b'<A/>\n')
+        self.assertEqual(self.reader.readblock(), None)
+        self.feed(b'.')
+        self.assertEqual(self.reader.readblock(), None)
+        self.feed(b'\n')
+        self.assertEqual(self.reader.readblock(), b'<A/>')
+
+    def test_grow(self):
+        block = b'<A>' + b'x' * 100 + b'</A>'
+        for chunk in range(0, len(block), 10):
+            self.feed(block[chunk:chunk + 10])
+            self.assertEqual(self.reader.readblock(), None)
+        self.feed(b'\n.\n.\n')
+        self.assertEqual(self.reader.readblock(), block)
+        self.assertEqual(self.reader.readblock(), b'')
+
+    def test_timestamps(self):
+        self.feed(b'<A/>\n.\n<B')
+        self.assertEqual(self.reader.readblock(), b'<A/>')
+        first = self.reader.received
+        time.sleep(0.01)
+        self.feed(b'/>\n.\n')
+        self.assertEqual(self.reader.readblock(), b'<B/>')
+        self.assertEqual(self.reader.received, first)
+        self.assertTrue(self.reader.completed > first)
+
+    def test_lines(self):
+        self.feed(b'a\nb\nc')
+        self.assertEqual(self.reader.readline(), b'a')
+        self.assertEqual(self.reader.readlines(), b'b\n')
+        self.assertEqual(self.reader.readlines(), None)
+        self.assertEqual(self.reader.buffer, b'c')
+
+
+class FeedTestCase(unittest.TestCase):
+    def test_feed(self):
+        reader = BlockReader(None, bufsize=16)
+        reader.feed(b'<A/>\n.\n<B>')
+        self.assertEqual(reader.readblock(), b'<A/>')
+        reader.feed(b'x' * 100 + b'</B>\n.\n')
+        self.assertEqual(reader.readblock(), b'<B>' + b'x' * 100 + b'</B>')
+        self.assertEqual(reader.buffer, b'')
+        self.assertTrue(reader.received <= reader.completed)
+
+    def test_empty_block(self):
+        reader = BlockReader(None, bufsize=16)
+        reader.feed(b'.\n')
+        self.assertEqual(reader.readblock(), b'')
+        self.assertEqual(reader.readblock(), None)
+        reader.feed(b'<B/>\n.\n')
+        self.assertEqual(reader.readblock(), b'<B/>')
+        self.assertEqual(reader.buffer, b'')
+
+
+class WakeupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wakeup = Wakeup()
+
+    def tearDown(self):
+        self.wakeup.close()
+
+    def test_timeout(self):
+        self.assertFalse(self.wakeup.wait(0.01))
+
+    def test_wake(self):
+        timer = threading.Timer(0.01, self.wakeup.wake)
+        timer.start()
+        start = time.time()
+        self.assertTrue(self.wakeup.wait(5))
+        self.assertTrue(time.time() - start < 1)
+        self.assertTrue(self.wakeup.wait(0))
+        timer.join()
+
+    def test_clear(self):
+        for _ in range(100000):  # more than the buffer of the sockets
+            self.wakeup.wake()
+        self.wakeup.clear()
+        self.assertFalse(self.wakeup.wait(0))
+        self.wakeup.wake()
+        self.assertTrue(self.wakeup.wait(0))
+
+    def test_closed(self):
+        self.wakeup.close()
+        self.wakeup.wake()
+        self.wakeup.close()
+
+
+if __name__ == '__main__':
+    unittest.main()